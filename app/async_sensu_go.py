@@ -0,0 +1,120 @@
+# Copyright 2022 Two Sigma Open Source, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# <http://www.apache.org/licenses/LICENSE-2.0>
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from concurrent.futures import ThreadPoolExecutor
+from app.defaults import InternalDefaults
+from app.rate_limiter import Priorities
+from app.sensu_go import SensuGoHelper
+from typing import Any, Callable, Union, Tuple
+import functools
+import structlog
+import asyncio
+
+
+class AsyncSensuGoHelper:
+    """A coroutine interface for interacting with Sensu's backend API.
+
+    Every operation of SensuGoHelper is exposed as a coroutine. Requests
+    are run on a small thread pool against the keep-alive connection pool
+    of one shared SensuGoHelper, so authentication (including Kerberos)
+    behaves exactly like the synchronous client. At most
+    http_max_concurrency requests are in flight at the same time, which
+    lets list fetching, detail polling and bulk actions overlap on one
+    event loop without flooding the backend.
+    """
+
+    def __init__(self, state: dict, sensu_go_helper: SensuGoHelper = None) -> None:
+        """Initialize AsyncSensuGoHelper.
+
+        An existing SensuGoHelper can be injected to share its connection pool.
+        """
+
+        self.state = state
+        self.sensu_go_helper = sensu_go_helper or SensuGoHelper(state)
+        self.logger = structlog.get_logger(InternalDefaults.APPNAME)
+        self.max_concurrency = min(
+            self.sensu_go_helper.state_value("http_max_concurrency"),
+            self.sensu_go_helper.state_value("http_pool_maxsize"),
+        )
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency,
+            thread_name_prefix="AsyncSensuGoHelper",
+        )
+        self._semaphores = {}
+
+    @property
+    def auth_method(self) -> str:
+        """The authentication method of the wrapped SensuGoHelper."""
+
+        return self.sensu_go_helper.auth_method
+
+    def __semaphore(self) -> asyncio.Semaphore:
+        """Returns the concurrency limiting semaphore for the running loop."""
+
+        loop = asyncio.get_running_loop()
+        if loop not in self._semaphores:
+            self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphores[loop]
+
+    async def __run(self, func: Callable, *args, **kwargs) -> Any:
+        """Run a blocking SensuGoHelper call without blocking the event loop."""
+
+        async with self.__semaphore():
+            self.logger.debug("AsyncSensuGoHelper.__run", func=func.__name__)
+            return await asyncio.get_running_loop().run_in_executor(
+                self.executor, functools.partial(func, *args, **kwargs)
+            )
+
+    async def get_namespaces(self) -> dict:
+        return await self.__run(self.sensu_go_helper.get_namespaces)
+
+    async def execute_check(self, check_data: dict) -> dict:
+        return await self.__run(self.sensu_go_helper.execute_check, check_data)
+
+    async def get_event(
+        self, entity: str, check: str, priority: int = Priorities.INTERACTIVE
+    ) -> dict:
+        return await self.__run(self.sensu_go_helper.get_event, entity, check, priority)
+
+    async def new_silence(self, entry: str, reason: str) -> int:
+        return await self.__run(self.sensu_go_helper.new_silence, entry, reason)
+
+    async def delete_silence(self, entry: str) -> int:
+        return await self.__run(self.sensu_go_helper.delete_silence, entry)
+
+    async def update_event(self, event: dict) -> int:
+        return await self.__run(self.sensu_go_helper.update_event, event)
+
+    async def resource_fetch_request(self, **kwargs) -> Tuple[dict, str]:
+        return await self.__run(self.sensu_go_helper.resource_fetch_request, **kwargs)
+
+    async def authenticate(self, username: str = None, password: str = None) -> dict:
+        return await self.__run(self.sensu_go_helper.authenticate, username, password)
+
+    async def auth_test(
+        self, username: str = None, password: str = None
+    ) -> Union[bool, None]:
+        return await self.__run(self.sensu_go_helper.auth_test, username, password)
+
+    async def refresh(self) -> dict:
+        return await self.__run(self.sensu_go_helper.refresh)
+
+    async def refresh_access_token(self, stale_token: str = None) -> dict:
+        return await self.__run(self.sensu_go_helper.refresh_access_token, stale_token)
+
+    def close(self) -> None:
+        """Stop the request threads and close the connection pool."""
+
+        self.executor.shutdown(wait=False)
+        self.sensu_go_helper.close()
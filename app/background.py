@@ -0,0 +1,100 @@
+# Copyright 2022 Two Sigma Open Source, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# <http://www.apache.org/licenses/LICENSE-2.0>
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from app.defaults import InternalDefaults
+from concurrent.futures import Future
+from typing import Awaitable, Callable
+import threading
+import structlog
+import asyncio
+import queue
+
+
+class BackgroundLoop(threading.Thread):
+    """An asyncio event loop running on a daemon thread.
+
+    Coroutines (typically AsyncSensuGoHelper calls) are submitted from the
+    main loop and run here, so they never block the UI. Their done
+    callbacks are not run on this thread: they are queued, notify is
+    called (e.g. Waker.wake), and the main loop runs them with
+    run_callbacks(), where it is safe to draw.
+    """
+
+    def __init__(self, notify: Callable[[], None] = None) -> None:
+        """Initialize BackgroundLoop."""
+
+        super().__init__(name="BackgroundLoop", daemon=True)
+        self.loop = asyncio.new_event_loop()
+        self.notify = notify
+        self.callbacks = queue.Queue()
+        self.logger = structlog.get_logger(InternalDefaults.APPNAME)
+
+    def run(self) -> None:
+        """Run the event loop until stop() is called."""
+
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+        pending = asyncio.all_tasks(self.loop)
+        for task in pending:
+            task.cancel()
+        self.loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+        self.loop.close()
+        self.logger.debug("BackgroundLoop.run", stopped=True, cancelled=len(pending))
+
+    def submit(
+        self,
+        coro: Awaitable,
+        on_done: Callable[[Future], None] = None,
+    ) -> Future:
+        """Schedule a coroutine on the loop from any thread.
+
+        on_done(future) is run by run_callbacks() once the coroutine is done.
+        """
+
+        if not self.is_alive():
+            self.start()
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        if on_done is not None:
+            future.add_done_callback(lambda f: self.__completed(on_done, f))
+        return future
+
+    def __completed(self, on_done: Callable[[Future], None], future: Future) -> None:
+        """Hand a finished future to the main loop."""
+
+        self.callbacks.put((on_done, future))
+        if self.notify:
+            self.notify()
+
+    def run_callbacks(self) -> int:
+        """Run the done callbacks of finished coroutines on the calling thread.
+
+        Returns how many callbacks were run.
+        """
+
+        ran = 0
+        while True:
+            try:
+                on_done, future = self.callbacks.get_nowait()
+            except queue.Empty:
+                return ran
+            on_done(future)
+            ran += 1
+
+    def stop(self) -> None:
+        """Cancel pending coroutines and stop the loop."""
+
+        if not self.is_alive():
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.join(1)
@@ -0,0 +1,107 @@
+# Copyright 2022 Two Sigma Open Source, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# <http://www.apache.org/licenses/LICENSE-2.0>
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from app.utils import Utils
+import threading
+import requests
+
+
+class CircuitOpenError(requests.RequestException):
+    """A request was not sent because the circuit breaker is open."""
+
+
+class CircuitStates:
+    """Defines string values for the circuit breaker states."""
+
+    CLOSED = "CLOSED"
+    OPEN = "OPEN"
+    HALF_OPEN = "HALF_OPEN"
+
+
+class CircuitBreaker:
+    """Stops sending requests to a backend that keeps failing.
+
+    After failure_threshold consecutive failures (5xx responses, timeouts
+    and connection errors) the circuit opens, and requests fail right
+    away with a CircuitOpenError instead of adding to the load of an
+    overloaded backend. Once reset_timeout_ms has elapsed the circuit is
+    half-open: a single probe request is let through, which closes the
+    circuit if it succeeds, and opens it again if it fails.
+
+    The breaker is shared by every thread that sends requests.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout_ms: int) -> None:
+        """Initialize CircuitBreaker."""
+
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_ms = reset_timeout_ms
+        self.state = CircuitStates.CLOSED
+        self.failures = 0
+        self.opened_at = 0
+        self.probing = False
+        self.lock = threading.Lock()
+
+    def retry_time(self) -> int:
+        """The time, in milliseconds, an open circuit lets a probe through."""
+
+        return self.opened_at + self.reset_timeout_ms
+
+    def before(self) -> None:
+        """Call before sending a request.
+
+        Raises a CircuitOpenError if the request must not be sent.
+        """
+
+        with self.lock:
+            if self.state == CircuitStates.CLOSED:
+                return
+            if self.state == CircuitStates.OPEN:
+                if Utils.current_milli_time() < self.retry_time():
+                    raise CircuitOpenError("Circuit breaker is open")
+                self.state = CircuitStates.HALF_OPEN
+            if self.probing:
+                raise CircuitOpenError("Circuit breaker is half-open")
+            self.probing = True
+
+    def success(self) -> None:
+        """Call after a request succeeded."""
+
+        with self.lock:
+            self.state = CircuitStates.CLOSED
+            self.failures = 0
+            self.probing = False
+
+    def release(self) -> None:
+        """Call after a request ended without telling if the backend is up.
+
+        For example when it was aborted.
+        """
+
+        with self.lock:
+            self.probing = False
+
+    def failure(self) -> None:
+        """Call after a request failed."""
+
+        with self.lock:
+            self.failures += 1
+            if (
+                self.state == CircuitStates.HALF_OPEN
+                or self.failures >= self.failure_threshold
+            ):
+                self.state = CircuitStates.OPEN
+                self.opened_at = Utils.current_milli_time()
+            self.probing = False
@@ -12,7 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from app.display import header_pre_render
+from app.display import column_layout
 from app.colors import ColorPairs
 from app.window import Window
 from typing import Tuple
@@ -40,55 +40,16 @@ class ColumnHeader(Window):
         """Draw the window."""
 
         super().draw()
-        # stuff
-        self.win.clrtoeol()
-        curr_x = 0
+        self.paint()
 
-        # Pre-render
-        # This is to pre-determine what our available width will be
-        # for columns that want to use grow-pct instead of min-width.
-        # First run through all columns and determine which will be
-        # sized by their min-width or grow-pct. If they will be
-        # sized by min-width then reduce the available_width for
-        # other columns when using grow-pct.
-        available_width = header_pre_render(self.header_infos, self.w - 1)
-        # Render
-        # Second run through all the columns and actually draw
-        # based on the available_width. Any columns that will be
-        # drawn with min-width instead of their grow-pct will have
-        # their grow-pct added back to the pool for other columns
-        # to use.
-        add_back_pct = 0
-        calculated_width = 0
-        for header_info in self.header_infos:
-            column_name = header_info[0]
-            column_width = header_info[1]
-            column_grow_pct = header_info[2] + add_back_pct
-            add_back_pct = 0
+    def paint(self) -> None:
+        """Write the column headers into the window."""
 
-            if column_grow_pct != 0:
-                calculated_width = int(self.w * column_grow_pct) - 1
-                if calculated_width > column_width:
-                    column_width = int(available_width * column_grow_pct) - 1
-                else:
-                    add_back_pct += column_grow_pct
-
-            self.logger.debug(
-                "ColumnHeader.draw",
-                column_name=column_name,
-                header_width=header_info[1],
-                column_width=column_width,
-                calculated_width=calculated_width,
-                available_width=available_width,
-                curses_COLS=curses.COLS,
-                curr_x=curr_x,
-                add_back_pct=add_back_pct,
-                self_w=self.w,
-                column_grow_pct=column_grow_pct
-            )
-
-            self.win.addstr(0, curr_x, column_name, self.theme)
-            curr_x = curr_x + column_width
+        self.win.erase()
+        layout = column_layout(self.header_infos, self.w)
+        self.logger.debug("ColumnHeader.paint", layout=layout, self_w=self.w)
+        for header_info, (curr_x, _) in zip(self.header_infos, layout):
+            self.win.addstr(0, curr_x, header_info[0], self.theme)
 
         self.color(self.theme)
         self.win.noutrefresh()
@@ -22,7 +22,7 @@ from app.defaults import ViewOptions
 from app.eventitem import EventItem
 from app.colors import ColorPairs
 from app.window import Window
-from typing import Tuple
+from typing import List, Sequence, Tuple, Union
 import curses
 
 
@@ -67,41 +67,74 @@ class DataView(Window):
         self.container.draw()
         self.container.win.clrtobot()
         self.container.win.noutrefresh()
+        # Row windows are sized to the container, so they go with it.
+        self.row_pool = {}
+        self.row_class = None
 
     def make_column_headers(self) -> None:
         self.column_header = ColumnHeader(self)
-        if self.state["view"] in (ViewOptions.ALL, ViewOptions.NOT_PASSING):
-            headers = EventHeaders
-        if self.state["view"] in (ViewOptions.SILENCED):
-            headers = SilencedHeaders
-        self.column_header.set_headers(headers)
+        self.column_header.set_headers(self.get_headers())
         self.column_header.draw()
+        self.header_painted = self.column_header.header_infos
 
-    def render_view(
-        self,
-        items: dict,
-        index: int,
-    ) -> int:
-        """Draw the list items."""
+    def get_headers(self) -> Tuple[Tuple[str, int, int]]:
+        if self.state["view"] == ViewOptions.SILENCED:
+            return SilencedHeaders
+        return EventHeaders
+
+    def get_rows(self) -> List[Union[EventItem, SilencedItem]]:
+        """The pool of row windows for the current view.
+
+        One row window is made per line of the container, the first
+        time a view is rendered after draw(). Rendering only rewrites
+        the contents of these windows. The pools of the different views
+        overlap, so switching views invalidates the rows.
+        """
+
+        if self.state["view"] == ViewOptions.SILENCED:
+            item_class = SilencedItem
+        else:
+            item_class = EventItem
+        rows = self.row_pool.get(item_class)
+        if rows is None:
+            headers = self.get_headers()
+            rows = self.row_pool[item_class] = []
+            for y in range(self.container.h):
+                row = item_class(None, y, self.container, headers)
+                row.draw()
+                rows.append(row)
+        if item_class is not self.row_class:
+            self.row_class = item_class
+            self.invalidate()
+        return rows
+
+    def invalidate(self) -> None:
+        """Repaint every row on the next render.
+
+        Call this after another window was drawn over the DataView.
+        """
+
+        self.header_painted = None
+        for rows in self.row_pool.values():
+            for row in rows:
+                row.painted = False
+
+    def scroll(self, n_items: int, index: int) -> int:
+        """Move the cursor to index, scrolling the view when it leaves the page.
+
+        n_items is the number of items in the list.
+        Returns the index of the cursor within the page. Nothing is drawn,
+        so several movements can be applied before one render_view().
+        """
 
         self.index = index
         index_set = index
-        self.logger.debug(
-            "render_view (before)",
-            index=index,
-            index_set=index_set,
-            self_index=self.index,
-            self_offset=self.offset,
-            len_items=len(items),
-            self_max_items=self.max_items,
-        )
-        self.make_column_headers()
 
-        if self.index == self.max_items and not (index + self.offset) >= len(items):
+        if self.index == self.max_items and not (index + self.offset) >= n_items:
             # Key Down
             self.offset += 1
             index_set = self.max_items - 1
-        elif self.index > self.max_items and not (index + self.offset) >= len(items):
+        elif self.index > self.max_items and not (index + self.offset) >= n_items:
             # Page Down
             self.offset += self.index - self.max_items + 2
             index_set = 0
@@ -119,15 +152,42 @@ class DataView(Window):
             # Dont go below 0
             self.offset = 0
             index_set = 0
-        elif (index + self.offset) >= len(items):
+        elif (index + self.offset) >= n_items:
             # Dont go above len(items)
-            if not self.max_items > len(items):
-                self.offset = len(items) - self.max_items
-            index_set = abs((len(items) - 1) - self.offset)
+            if not self.max_items > n_items:
+                self.offset = n_items - self.max_items
+            index_set = abs((n_items - 1) - self.offset)
         else:
             index_set = self.index
 
-        viewable_items = items[self.offset :][0 : self.max_items]
+        if n_items == 0:
+            index_set = 0
+
+        return index_set
+
+    def render_view(
+        self,
+        items: Sequence,
+        index: int,
+    ) -> int:
+        """Draw the list items."""
+
+        self.logger.debug(
+            "render_view (before)",
+            index=index,
+            self_offset=self.offset,
+            len_items=len(items),
+            self_max_items=self.max_items,
+        )
+        headers = self.get_headers()
+        if self.header_painted is not headers:
+            self.column_header.set_headers(headers)
+            self.column_header.paint()
+            self.header_painted = headers
+
+        index_set = self.scroll(len(items), index)
+
+        viewable_items = items[self.offset : self.offset + self.max_items]
 
         self.logger.debug(
             "render_view (after)",
@@ -139,38 +199,16 @@ class DataView(Window):
             self_max_items=self.max_items,
         )
 
-        i = 0
-        curr_y = 0
-        self.clear_sub_windows()
-        self.container.clear_sub_windows()
-
-        for item in viewable_items:
-            if i == index_set:
-                selected = True
-                self.selected_item = item
+        # Only the rows whose record or selection changed are painted.
+        painted = 0
+        for i, row in enumerate(self.get_rows()):
+            if i < len(viewable_items):
+                selected = i == index_set
+                if selected:
+                    self.selected_item = viewable_items[i]
+                painted += row.update(viewable_items[i], selected)
             else:
-                selected = False
-
-            if self.state["view"] == ViewOptions.SILENCED:
-                e_item = SilencedItem(
-                    item, curr_y, self.container, SilencedHeaders, selected
-                )
-            else:
-                e_item = EventItem(item, curr_y, self.container, EventHeaders, selected)
-            e_item.draw()
-            curr_y += 1
-            i += 1
-
-        if len(viewable_items) < self.max_items:
-            # for i in range(len(viewable_items) + 1, self.container.h):
-            for i in range(len(viewable_items), self.container.h):
-                blank = Window(1, self.w, i, 0, parent=self.container)
-                blank.draw()
-                blank.win.move(0, 0)
-                blank.win.clrtoeol()
-                blank.win.noutrefresh()
-
-        if len(items) == 0:
-            index_set = 0
+                painted += row.update(None)
+        self.logger.debug("render_view (painted)", rows=painted)
 
         return index_set
@@ -0,0 +1,88 @@
+# Copyright 2022 Two Sigma Open Source, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# <http://www.apache.org/licenses/LICENSE-2.0>
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from app.rate_limiter import Priorities
+from app.sensu_go import SensuGoHelper
+from app.colors import ColorPairs
+from app.window import Window
+from typing import List
+import curses
+
+
+class DebugOverlay(Window):
+    """Shows how much load Tensu puts on the backend, over the data view.
+
+    The counters of the rate limiter, the request latency, the timeouts
+    and the state of the circuit breaker are read from SensuGoHelper.
+    The overlay sits in the bottom right corner of area, a window that
+    is entirely repainted once the overlay is gone.
+    """
+
+    WIDTH = 46
+    HEIGHT = 12
+
+    def __init__(self, sensu_go_helper: SensuGoHelper, area: Window) -> None:
+        """Initialize the window."""
+
+        y, x = area.win.getbegyx()
+        h = min(self.HEIGHT, area.h)
+        w = min(self.WIDTH, area.w)
+        super().__init__(h, w, y + area.h - h, x + area.w - w)
+        self.sensu_go_helper = sensu_go_helper
+        self.delayed_refresh = True
+        self.painted = None
+
+    def lines(self) -> List[str]:
+        """The text of the overlay, one string per line."""
+
+        helper = self.sensu_go_helper
+        lines = [f"{'Requests':<14}{'admitted':>10}{'throttled':>11}{'waiting':>9}"]
+        for name, admitted, throttled, waiting in helper.rate_limiter.counters():
+            lines.append(f"{name:<14}{admitted:>10}{throttled:>11}{waiting:>9}")
+        lines.append("")
+        lines.append(
+            f"Latency p50/p90  {helper.latency.quantile(0.5)}"
+            f"/{helper.latency.quantile(0.9)} ms"
+        )
+        prefetch = helper.detail_latency[Priorities.PREFETCH]
+        lines.append(
+            f"Prefetch p50/p90 {prefetch.quantile(0.5)}/{prefetch.quantile(0.9)} ms"
+        )
+        lines.append(f"Timeouts         {int(helper.timeouts)}")
+        lines.append(f"Circuit          {helper.circuit_breaker.state}")
+        return lines
+
+    def draw(self) -> None:
+        """Draw the window."""
+
+        super().draw()
+        self.color(curses.color_pair(ColorPairs.POPUP_WINDOW))
+        self.painted = None
+        self.update()
+
+    def update(self) -> None:
+        """Write the current counters, and put the overlay back on top."""
+
+        lines = self.lines()
+        if lines != self.painted:
+            self.win.erase()
+            self.win.box()
+            self.win.addstr(0, 2, " Debug ")
+            for y, line in enumerate(lines[: self.h - 2]):
+                self.win.addstr(y + 1, 1, line[: self.w - 2])
+            self.painted = lines
+        # Rows of the data view may have been painted over the overlay.
+        self.win.touchwin()
+        self.win.noutrefresh()
@@ -58,8 +58,41 @@ class InternalDefaults:
         "status_message": "Welcome to Tensu!",
         "status_is_error": False,
         "update_interval_ms": 10000,
+        "update_interval_adaptive": True,
+        "update_interval_min_ms": 2000,
+        "update_interval_max_ms": 60000,
         "max_fetch_events": 500,
         "fetch_interval_ms": 700,
+        "fetch_pipelined": True,
+        "fetch_prefetch_depth": 4,
+        "fetch_selector_pushdown": True,
+        "main_loop_max_sleep_ms": 1000,
+        "auth_refresh_ahead_s": 30,
+        "auth_retry_interval_ms": 10000,
+        "event_cache_size": 1000,
+        "event_cache_ttl_ms": 60000,
+        "prefetch_rows": 3,
+        "prefetch_max_concurrency": 2,
+        "prefetch_rate_per_s": 4,
+        "prefetch_max_age_ms": 5000,
+        "prefetch_latency_budget_ms": 500,
+        "prefetch_backoff_ms": 2000,
+        "detail_latency_max_age_ms": 30000,
+        "http_pool_connections": 4,
+        "http_pool_maxsize": 10,
+        "http_keep_alive": True,
+        "http_max_concurrency": 4,
+        "http_connect_timeout_s": 3.05,
+        "http_read_timeout_s": 10,
+        "http_retries": 2,
+        "http_backoff_base_ms": 200,
+        "http_backoff_max_ms": 3000,
+        "circuit_failure_threshold": 5,
+        "circuit_reset_timeout_ms": 15000,
+        "rate_limit_requests_per_s": 10,
+        "rate_limit_bytes_per_s": 4000000,
+        "rate_limit_burst_s": 2,
+        "fetch_cycle_deadline_ms": 30000,
         "view": ViewOptions.NOT_PASSING,
         "keymap": DEFAULT_KEYMAP,
     }
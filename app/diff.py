@@ -0,0 +1,97 @@
+# Copyright 2022 Two Sigma Open Source, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# <http://www.apache.org/licenses/LICENSE-2.0>
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Any, Callable, Hashable, List, Tuple
+
+
+class Delta:
+    """The keys that were added, removed or changed between two snapshots.
+
+    A reset Delta means the previous snapshot was thrown away, so
+    anything remembered about it must be forgotten too.
+    """
+
+    def __init__(
+        self,
+        added: List[Hashable] = None,
+        removed: List[Hashable] = None,
+        changed: List[Hashable] = None,
+        reset: bool = False,
+    ) -> None:
+        """Initialize Delta."""
+
+        self.added = added or []
+        self.removed = removed or []
+        self.changed = changed or []
+        self.reset = reset
+
+    def __len__(self) -> int:
+        return len(self.added) + len(self.removed) + len(self.changed)
+
+    def __bool__(self) -> bool:
+        return self.reset or len(self) > 0
+
+    def __repr__(self) -> str:
+        return (
+            f"Delta(added={len(self.added)}, removed={len(self.removed)},"
+            f" changed={len(self.changed)}, reset={self.reset})"
+        )
+
+    def stale_keys(self) -> List[Hashable]:
+        """Keys whose previous records are no longer valid."""
+
+        return self.changed + self.removed
+
+    def combine(self, other: "Delta") -> "Delta":
+        """Return a Delta covering this one followed by other."""
+
+        if other.reset:
+            return other
+        return Delta(
+            self.added + other.added,
+            self.removed + other.removed,
+            self.changed + other.changed,
+            self.reset,
+        )
+
+
+def merge(
+    previous: dict, fresh: List[Any], key: Callable[[Any], Hashable]
+) -> Tuple[List[Any], dict, Delta]:
+    """Merge a freshly fetched list of items into the previous snapshot.
+
+    previous maps keys to the items of the last snapshot. Items that did
+    not change are replaced by the object from the previous snapshot, so
+    anything cached against that object stays valid.
+
+    Returns the merged items, the new key index and the Delta.
+    """
+
+    index = {}
+    items = []
+    added = []
+    changed = []
+    for item in fresh:
+        k = key(item)
+        old = previous.get(k)
+        if old is None:
+            added.append(k)
+        elif old != item:
+            changed.append(k)
+        else:
+            item = old
+        index[k] = item
+        items.append(item)
+    removed = [k for k in previous if k not in index]
+    return (items, index, Delta(added, removed, changed))
@@ -14,8 +14,11 @@
 
 from app.defaults import InternalDefaults
 from typing import Tuple
+import functools
 import structlog
 import curses
+import sys
+import os
 
 StatusBarTopHeight = 1
 ControlBarHeight = 2
@@ -101,7 +104,75 @@ def header_pre_render(header_infos: Tuple[str, int, float], available_width: int
     return ret
 
 
+@functools.lru_cache(maxsize=32)
+def column_layout(
+    header_infos: Tuple[Tuple[str, int, float]], width: int
+) -> Tuple[Tuple[int, int]]:
+    """Return the (x, width) of every column of a window that is width wide.
+
+    First run through all columns and determine which will be sized by
+    their min-width or grow-pct (header_pre_render). Then any columns
+    that are drawn with min-width instead of their grow-pct have their
+    grow-pct added back to the pool for the next column to use.
+    The layout only depends on its arguments, so it is computed once and
+    shared by the column header and every row.
+
+    >>> headers = (("FooBar", 10, 0), ("Baz", 60, 0.90), ("Bar", 10, 0.10))
+    >>> column_layout(headers, 80)
+    ((0, 10), (10, 52), (62, 10))
+    >>> column_layout(headers, 160)
+    ((0, 10), (10, 133), (143, 13))
+    """
+
+    available_width = header_pre_render(header_infos, width - 1)
+    layout = []
+    curr_x = 0
+    add_back_pct = 0
+    for header_info in header_infos:
+        column_width = header_info[1]
+        column_grow_pct = header_info[2] + add_back_pct
+        add_back_pct = 0
+
+        if column_grow_pct != 0:
+            calculated_width = int(width * column_grow_pct) - 1
+            if calculated_width > column_width:
+                column_width = int(available_width * column_grow_pct) - 1
+            else:
+                add_back_pct += column_grow_pct
+
+        layout.append((curr_x, column_width))
+        curr_x += column_width
+    return tuple(layout)
+
+
+# Set by the SIGWINCH handler, see resize_terminal().
+_resize_pending = False
+
+
+def note_terminal_resized() -> None:
+    """Remember that the terminal was resized, from the SIGWINCH handler."""
+
+    global _resize_pending
+    _resize_pending = True
+
+
+def resize_terminal() -> None:
+    """Tell curses about the new terminal size, after a SIGWINCH.
+
+    Tensu handles SIGWINCH itself, to wake up its main loop, which replaces
+    the handler of ncurses. Every loop that waits for keys calls this, so
+    that curses.is_term_resized() sees the new size.
+    """
+
+    global _resize_pending
+    if _resize_pending:
+        _resize_pending = False
+        cols, lines = os.get_terminal_size(sys.__stdin__.fileno())
+        curses.resizeterm(lines, cols)
+
+
 def handle_terminal_resize(stdscr):
+    column_layout.cache_clear()
     logger = structlog.get_logger(InternalDefaults.APPNAME)
     logger.debug(
         "handle_terminal_resize", y=stdscr.getmaxyx()[0], x=stdscr.getmaxyx()[1]
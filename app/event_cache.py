@@ -0,0 +1,83 @@
+# Copyright 2022 Two Sigma Open Source, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# <http://www.apache.org/licenses/LICENSE-2.0>
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Hashable, Iterable, Tuple, Union
+from collections import OrderedDict
+from app.utils import Utils
+import threading
+
+
+class EventCache:
+    """A least recently used cache of full event payloads.
+
+    The list fetcher puts every event it receives here, keyed like
+    EventRecord.key, before the event is trimmed into a record. The detail
+    window reads from it, so it can be drawn without waiting on the backend.
+    At most maxsize events are kept, and an event is no longer served
+    ttl_ms after it was put. The cache is shared between threads.
+    """
+
+    def __init__(self, maxsize: int, ttl_ms: int) -> None:
+        """Initialize EventCache."""
+
+        self.maxsize = maxsize
+        self.ttl_ms = ttl_ms
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def put_many(self, items: Iterable[Tuple[Hashable, dict]]) -> None:
+        """Cache (key, event) pairs, evicting the least recently used events."""
+
+        now = Utils.current_milli_time()
+        with self.lock:
+            for key, event in items:
+                self.entries[key] = (now, event)
+                self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def put(self, key: Hashable, event: dict) -> None:
+        """Cache one event."""
+
+        self.put_many(((key, event),))
+
+    def get(self, key: Hashable, max_age_ms: int = None) -> Union[dict, None]:
+        """Returns the cached event, or None if it is absent or expired.
+
+        With max_age_ms, an event put longer ago than that is not returned
+        either, but it stays in the cache.
+        """
+
+        now = Utils.current_milli_time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            age = now - entry[0]
+            if age >= self.ttl_ms:
+                del self.entries[key]
+                return None
+            if max_age_ms is not None and age >= max_age_ms:
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def clear(self) -> None:
+        """Forget every event."""
+
+        with self.lock:
+            self.entries.clear()
@@ -0,0 +1,167 @@
+# Copyright 2022 Two Sigma Open Source, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# <http://www.apache.org/licenses/LICENSE-2.0>
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from app.records import EventRecord
+from typing import Dict, Iterable, List, Pattern, Sequence, Union
+from array import array
+import itertools
+
+# Maps a status byte to 1 when the check is not passing.
+NOT_PASSING_TABLE = bytes([0] + [1] * 255)
+
+
+class StringTable:
+    """Interns strings into small integer ids.
+
+    The table only grows, so ids stay valid across refresh cycles.
+    """
+
+    def __init__(self) -> None:
+        """Initialize StringTable."""
+
+        self.strings = []
+        self.ids = {}
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+    def intern(self, s: str) -> int:
+        """Return the id of s, adding it to the table when it is new."""
+
+        i = self.ids.get(s)
+        if i is None:
+            i = self.ids[s] = len(self.strings)
+            self.strings.append(s)
+        return i
+
+
+class Selection(Sequence):
+    """The rows of an EventStore selected by an index array.
+
+    Only the rows that are sliced out are looked up, so a view can
+    page through a large selection without copying it.
+    """
+
+    def __init__(self, records: List[EventRecord], indices: Sequence[int]) -> None:
+        """Initialize Selection."""
+
+        self.records = records
+        self.indices = indices
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def __getitem__(
+        self, i: Union[int, slice]
+    ) -> Union[EventRecord, List[EventRecord]]:
+        if isinstance(i, slice):
+            return [self.records[j] for j in self.indices[i]]
+        return self.records[self.indices[i]]
+
+
+class EventStore:
+    """Hot event fields kept as parallel columns.
+
+    status is a byte per row, issued/executed/last_ok are int64 arrays
+    and entity/check names are ids into a StringTable per column.
+    Filters narrow an index list with C level passes (translate,
+    compress, map) and evaluate name regexes once per distinct string;
+    the result can be sorted and wrapped in a Selection.
+    """
+
+    NAME_COLUMNS = ("entity", "check")
+
+    def __init__(self, tables: Dict[str, StringTable] = None) -> None:
+        """Initialize EventStore.
+
+        Share the tables dict between stores to keep string ids stable.
+        """
+
+        self.tables = tables if tables is not None else {}
+        for column in self.NAME_COLUMNS:
+            self.tables.setdefault(column, StringTable())
+        self.records = []
+        self.status = bytearray()
+        self.issued = array("q")
+        self.executed = array("q")
+        self.last_ok = array("q")
+        self.entity = array("l")
+        self.check = array("l")
+        self.output = []
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def append_page(self, records: Iterable[EventRecord]) -> None:
+        """Append a page of records to the columns."""
+
+        entity = self.tables["entity"].intern
+        check = self.tables["check"].intern
+        for r in records:
+            self.records.append(r)
+            self.status.append(r.status if 0 <= r.status < 255 else 255)
+            self.issued.append(r.issued)
+            self.executed.append(r.executed)
+            self.last_ok.append(r.last_ok)
+            self.entity.append(entity(r.entity))
+            self.check.append(check(r.check))
+            self.output.append(r.output)
+
+    def all(self) -> Sequence[int]:
+        """Indices of every row."""
+
+        return range(len(self))
+
+    def not_passing(self) -> List[int]:
+        """Indices of rows whose check status is not 0."""
+
+        mask = self.status.translate(NOT_PASSING_TABLE)
+        return list(itertools.compress(range(len(mask)), mask))
+
+    def string_mask(self, column: str, regex: Pattern) -> bytearray:
+        """Evaluate regex once per distinct string of an entity/check column.
+
+        Returns a mask indexed by string id.
+        """
+
+        return bytearray(map(bool, map(regex.search, self.tables[column].strings)))
+
+    def select(self, indices: Sequence[int], column: str, regex: Pattern) -> List[int]:
+        """Keep the indices where an entity/check name matches regex."""
+
+        mask = self.string_mask(column, regex)
+        ids = map(getattr(self, column).__getitem__, indices)
+        return list(itertools.compress(indices, map(mask.__getitem__, ids)))
+
+    def select_output(self, indices: Sequence[int], regex: Pattern) -> List[int]:
+        """Keep the indices where the check output matches regex."""
+
+        outputs = map(self.output.__getitem__, indices)
+        return list(itertools.compress(indices, map(regex.search, outputs)))
+
+    def sort_by(
+        self, indices: Sequence[int], column: str, reverse: bool = False
+    ) -> List[int]:
+        """Sort indices by a numeric column (status, issued, executed, last_ok)."""
+
+        return sorted(indices, key=getattr(self, column).__getitem__, reverse=reverse)
+
+    def count_by_status(self, indices: Sequence[int] = None) -> Dict[int, int]:
+        """Count rows per status byte."""
+
+        if indices is None or len(indices) == len(self):
+            column = self.status
+        else:
+            column = bytes(map(self.status.__getitem__, indices))
+        return {s: column.count(s) for s in set(column)}
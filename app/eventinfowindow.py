@@ -17,9 +17,14 @@ from app.display import (
     get_max_lines,
     get_max_line_length,
 )
+from app.async_sensu_go import AsyncSensuGoHelper
 from app.newsilencingentry import NewSilencingEntry
 from app.checkedselect import CheckedSelect
 from app.actionbutton import ActionButton
+from app.background import BackgroundLoop
+from app.event_cache import EventCache
+from concurrent.futures import CancelledError, Future
+from app.records import EventRecord
 from app.defaults import InternalDefaults
 from datetime import datetime, timedelta
 from app.sensu_go import SensuGoHelper
@@ -29,6 +34,7 @@ from app.window import Window
 from app.utils import Utils
 from typing import Tuple
 import curses
+import copy
 import time
 
 
@@ -36,9 +42,21 @@ class EventInfoWindow(Window):
     """The window that shows up when you hit enter on an item."""
 
     def __init__(
-        self, stdscr, item: dict, sensugo: SensuGoHelper, parent: Window
+        self,
+        stdscr,
+        item: EventRecord,
+        sensugo: SensuGoHelper,
+        parent: Window,
+        async_sensugo: AsyncSensuGoHelper,
+        background: BackgroundLoop,
+        event_cache: EventCache,
     ) -> None:
-        """Initialize the window."""
+        """Initialize the window.
+
+        The window opens with the event from event_cache, when it is there,
+        and is revalidated with async_sensugo on the background loop, so a
+        slow backend never blocks the keyboard.
+        """
         self.parent = parent
         dim = self.get_dimensions()
 
@@ -52,9 +70,15 @@ class EventInfoWindow(Window):
             parent=parent,
         )
         self.sensu_go_helper = sensugo
+        self.async_sensu_go_helper = async_sensugo
+        self.background = background
+        self.in_flight = None
         self.delayed_refresh = True
         self.theme = curses.color_pair(ColorPairs.POPUP_WINDOW)
-        self.item = item
+        self.record = item
+        self.event_cache = event_cache
+        self.item = event_cache.get(item.key)
+        self.logger.debug("EventInfoWindow", cached=self.item is not None)
         self.next_update_time = datetime.utcnow() + timedelta(seconds=-1)
         self.output_pad_min_row = 0
         self.action_message = ""
@@ -67,13 +91,68 @@ class EventInfoWindow(Window):
         x = 0
         return (h, w, y, x)
 
-    def retrieve_and_draw(self) -> None:
+    def retrieve(self) -> None:
+        """Request the event in the background, unless a request is in flight."""
+
+        if self.in_flight is None:
+            self.in_flight = self.background.submit(self.__fetch(self.record))
+
+    async def __fetch(self, record: EventRecord) -> dict:
+        """Get the event, and cache it even if the window is closed by then."""
+
+        item = await self.async_sensu_go_helper.get_event(record.entity, record.check)
+        # Raises on a malformed event, which must not be cached.
+        EventRecord(item)
+        self.event_cache.put(record.key, item)
+        return item
+
+    def receive(self, future: Future) -> None:
+        """Show a retrieved event, if it is newer than the one on screen."""
+
+        self.in_flight = None
+        self.next_update_time = datetime.utcnow() + timedelta(seconds=3)
+        try:
+            item = future.result()
+            record = EventRecord(item)
+            unchanged = self.item is not None and self.is_unchanged(self.item, item)
+        except (Exception, CancelledError):
+            # Keep showing the last known event, and try again later.
+            self.logger.exception("EventInfoWindow.receive")
+            return
+        self.item = item
+        self.record = record
+        if unchanged:
+            self.logger.debug("EventInfoWindow.receive", repaint=False)
+            return
+        self.draw_item()
+
+    @staticmethod
+    def is_unchanged(old: dict, new: dict) -> bool:
+        """Returns True if both payloads would be drawn the same way.
+
+        They must be from the same check execution, with the same status
+        and the same silencing entries.
+        """
+
+        old_check, new_check = old["check"], new["check"]
+        return (
+            old["timestamp"] == new["timestamp"]
+            and old_check["executed"] == new_check["executed"]
+            and old_check["status"] == new_check["status"]
+            and old_check.get("is_silenced") == new_check.get("is_silenced")
+            and old_check.get("silenced") == new_check.get("silenced")
+        )
+
+    def draw_item(self) -> None:
         """Show the item information."""
 
-        self.item = self.sensu_go_helper.get_event(
-            self.item["entity"]["metadata"]["name"],
-            self.item["check"]["metadata"]["name"],
-        )
+        if self.item is None:
+            self.win.addstr(
+                2, 1, "Loading...", curses.color_pair(ColorPairs.POPUP_WINDOW)
+            )
+            self.win.noutrefresh()
+            return
+
         check_status = self.item["check"]["status"]
         if check_status == 0:
             state_theme = curses.color_pair(ColorPairs.GREEN_ON_BLACK)
@@ -234,7 +313,7 @@ class EventInfoWindow(Window):
 
     def draw_after_resize(self) -> None:
         self.draw()
-        self.retrieve_and_draw()
+        self.draw_item()
         curses.doupdate()
 
     def draw(self) -> None:
@@ -275,7 +354,7 @@ class EventInfoWindow(Window):
         button_win.win.clrtoeol()
         button_win.win.noutrefresh()
 
-        if self.item["check"]["status"] != 0:
+        if self.record.status != 0:
             self.action_button_resolve = ActionButton(
                 parent=button_win,
                 hotkey=" Ctrl+R ",
@@ -287,7 +366,7 @@ class EventInfoWindow(Window):
 
             button_x += self.action_button_resolve.w + 1
 
-        if not self.item["check"]["proxy_entity_name"]:
+        if not self.record.proxy_entity_name:
             self.action_button_rerun = ActionButton(
                 parent=button_win,
                 hotkey=" Ctrl+E ",
@@ -299,7 +378,7 @@ class EventInfoWindow(Window):
             button_x += self.action_button_rerun.w + 1
 
         silence_button_text = " Silence "
-        if self.item["check"]["is_silenced"]:
+        if self.record.is_silenced:
             silence_button_text = " Clear Silence "
 
         self.action_button_silence = ActionButton(
@@ -312,14 +391,30 @@ class EventInfoWindow(Window):
         self.action_button_silence.draw(False)
 
     def update_item(self) -> None:
-        """Redraw the information when appropriate."""
+        """Show retrieved events, and request the next one when it is time."""
 
+        # Only this window's request is polled, the callbacks of the main
+        # loop wait until the window is closed.
+        if self.in_flight is not None and self.in_flight.done():
+            self.receive(self.in_flight)
         if datetime.utcnow() >= self.next_update_time:
-            # retrieve item
-            self.retrieve_and_draw()
-            self.next_update_time = datetime.utcnow() + timedelta(seconds=3)
+            self.retrieve()
+
+    def redraw(self) -> None:
+        """Repaint the whole window after an action, and revalidate the event.
+
+        Dialogs opened by the actions are drawn over the window, and the
+        action may have changed the event, e.g. its silencing entries.
+        """
+
+        self.record = EventRecord(self.item)
+        self.next_update_time = datetime.utcnow()
+        self.draw()
+        self.draw_item()
 
     def resolve(self) -> None:
+        # The event on screen is shared with the EventCache.
+        self.item = copy.deepcopy(self.item)
         self.item["check"]["status"] = 0
         self.item["check"][
             "output"
@@ -344,7 +439,7 @@ class EventInfoWindow(Window):
 
     def clear_silence(self) -> None:
         s_list = []
-        for item in self.item["check"]["silenced"]:
+        for item in self.record.silenced:
             s_list.append({"text": item, "checked": True})
         checked_select = CheckedSelect(
             self.stdscr,
@@ -379,6 +474,7 @@ class EventInfoWindow(Window):
 
     def input_loop(self) -> None:
         """Main control loop of app is here now."""
+        self.draw_item()
         while True:
             self.check_resized()
             self.update_item()
@@ -392,14 +488,20 @@ class EventInfoWindow(Window):
                 self.data_pane.page_back()
             if key == curses.KEY_RIGHT:
                 self.data_pane.page_next()
-            if key == 18:
+            if self.item is None:
+                # The actions need the full event.
+                pass
+            elif key == 18:
                 self.resolve()
-            if key == 5:
+                self.redraw()
+            elif key == 5:
                 self.re_run()
-            if key == 9:
-                if self.item["check"]["is_silenced"]:
+                self.redraw()
+            elif key == 9:
+                if self.record.is_silenced:
                     self.clear_silence()
                 else:
                     self.silence()
+                self.redraw()
 
             curses.napms(110)
@@ -12,21 +12,29 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from app.display import header_pre_render
+from app.display import column_layout
+from app.records import EventRecord
 from app.colors import ColorPairs
 from app.window import Window
-from datetime import datetime
 from app.utils import Utils
-from typing import Tuple
+from typing import Tuple, Union
 import curses
 
+# The color pair of each EventRecord.state_label.
+STATE_COLORS = {
+    "passing": ColorPairs.EVENT_PASSING,
+    "warning": ColorPairs.EVENT_WARNING,
+    "failing": ColorPairs.EVENT_FAILING,
+    "unknown": ColorPairs.EVENT_UNKNOWN,
+}
+
 
 class EventItem(Window):
     """An item that represents an event."""
 
     def __init__(
         self,
-        event: dict,
+        event: Union[EventRecord, None],
         y: int,
         parent: Window,
         header_infos: Tuple[Tuple[str, int, int]],
@@ -40,6 +48,7 @@ class EventItem(Window):
         self.event = event
         self.selected = selected
         self.header_infos = header_infos
+        self.painted = False
         super().__init__(height, width, y, x, parent=parent)
         self.delayed_refresh = True
 
@@ -47,15 +56,35 @@ class EventItem(Window):
         """Draw the window."""
 
         super().draw()
-        check_status = self.event["check"]["status"]
-        check_state = self.event["check"][
-            "state"
-        ]  # For initialization purposes, but we dont use it.
-        name = self.event["check"]["metadata"]["name"]
-        hostname = self.event["entity"]["metadata"]["name"]
-        issued = self.event["check"]["issued"]
-        output = self.event["check"]["output"]
-        is_silenced = self.event["check"]["is_silenced"]
+        self.paint()
+
+    def update(self, event: Union[EventRecord, None], selected: bool = False) -> bool:
+        """Show another event, or nothing, in the same window.
+
+        Nothing is written when the window already shows this exact record
+        with the same selection state. Returns True if the row was painted.
+        """
+
+        if self.painted and self.event is event and self.selected == selected:
+            return False
+        self.event = event
+        self.selected = selected
+        self.paint()
+        return True
+
+    def paint(self) -> None:
+        """Write the event into the window."""
+
+        self.painted = True
+        if self.event is None:
+            self.win.bkgd(self.parent.win.getbkgd())
+            self.win.erase()
+            self.win.noutrefresh()
+            return
+
+        name = self.event.check
+        hostname = self.event.entity
+        is_silenced = self.event.is_silenced
 
         if self.selected:
             theme = curses.color_pair(ColorPairs.ITEM_ROW_SELECTED)
@@ -67,20 +96,7 @@ class EventItem(Window):
             output_theme = curses.color_pair(ColorPairs.ITEM_OUTPUT)
         self.win.erase()
 
-        if check_status == 0:
-            state_theme = curses.color_pair(ColorPairs.EVENT_PASSING)
-            check_state = "passing"
-        elif check_status == 1:
-            state_theme = curses.color_pair(ColorPairs.EVENT_WARNING)
-            check_state = "warning"
-        elif check_status == 2:
-            state_theme = curses.color_pair(ColorPairs.EVENT_FAILING)
-            check_state = "failing"
-        else:
-            state_theme = curses.color_pair(ColorPairs.EVENT_UNKNOWN)
-            check_state = "unknown"
-
-        issued_str = f"{datetime.fromtimestamp(issued).strftime('%Y-%m-%d %H:%M:%S')}"
+        state_theme = curses.color_pair(STATE_COLORS[self.event.state_label])
 
         if is_silenced:
             if self.selected:
@@ -93,44 +109,16 @@ class EventItem(Window):
             output_theme = silenced_theme
 
         columns = (
-            (check_state, state_theme),
+            (self.event.state_label, state_theme),
             (hostname, hostname_theme),
             (name, theme),
-            (output, output_theme),
-            (issued_str, theme),
+            (self.event.output_line, output_theme),
+            (self.event.issued_text, theme),
         )
-        curr_x = 0
-
-        # Pre-Render
-        available_width = header_pre_render(self.header_infos, self.w - 1)
-
-        # Render
-        add_back_pct = 0
-        for idx, header_info in enumerate(self.header_infos):
-            column_width = header_info[1]
-            column_grow_pct = header_info[2] + add_back_pct
-            add_back_pct = 0
-
-            if column_grow_pct != 0:
-                calculated_width = int(self.w * column_grow_pct) - 1
-                if calculated_width > column_width:
-                    column_width = int(available_width * column_grow_pct) - 1
-                else:
-                    add_back_pct += column_grow_pct
-
-            col_item = columns[idx]
-            col_item_value = col_item[0]
-            col_item_theme = col_item[1]
-
-            value = Utils.truncate(col_item_value, column_width)
-            self.logger.debug(
-                "EventItem.draw",
-                col_item_value=col_item_value,
-                column_width=column_width,
-                available_width=available_width,
-            )
+        layout = column_layout(self.header_infos, self.w)
+        for (value, col_item_theme), (curr_x, column_width) in zip(columns, layout):
+            value = Utils.clip(value, column_width)
             self.win.addstr(0, curr_x, value, col_item_theme)
-            curr_x += column_width
 
         self.color(theme)
         self.win.noutrefresh()
@@ -0,0 +1,185 @@
+# Copyright 2022 Two Sigma Open Source, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# <http://www.apache.org/licenses/LICENSE-2.0>
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from app.defaults import InternalDefaults
+from app.event_cache import EventCache
+from app.sensu_go import SensuGoHelper
+from app.records import ingest
+from typing import Callable, Tuple
+import threading
+import structlog
+import requests
+import queue
+
+
+class FetchJob:
+    """A request for one page, or for every page of a resource.
+
+    Responses are put on the job's Queue as (error, (records, continue))
+    tuples. When follow_continue is set the worker keeps following the
+    Sensu-Continue token until the last page; a bounded Queue limits how
+    many pages are fetched ahead of the consumer.
+
+    generation identifies the ResourceHandler snapshot the job fetches
+    for. Once a job is cancelled its pages are dropped as they arrive.
+    """
+
+    def __init__(
+        self,
+        q: queue.Queue,
+        follow_continue: bool = False,
+        generation: int = 0,
+        **kwargs,
+    ):
+        """Initialize FetchJob."""
+
+        self.q = q
+        self.follow_continue = follow_continue
+        self.generation = generation
+        self.kwargs = kwargs
+        self.cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        """Stop fetching pages for this job."""
+
+        self.cancelled.set()
+
+
+class FetchWorker(threading.Thread):
+    """A long-lived background thread that fetches Sensu resources.
+
+    FetchJobs are sent over a command Queue. Each job carries the Queue
+    its responses should be put on, so a caller can abandon in-flight
+    responses by cancelling the job. The worker shares the SensuGoHelper
+    connection pool, so consecutive pages reuse the same sockets.
+    notify, if given, is called after every response that is queued.
+    Full event payloads are put in event_cache, if given, before they are
+    trimmed into records.
+    """
+
+    PUT_POLL_SECONDS = 0.1
+
+    def __init__(
+        self,
+        sensu_go_helper: SensuGoHelper,
+        notify: Callable[[], None] = None,
+        event_cache: EventCache = None,
+    ) -> None:
+        """Initialize FetchWorker."""
+
+        super().__init__(name="FetchWorker", daemon=True)
+        self.sensu_go_helper = sensu_go_helper
+        self.notify = notify
+        self.event_cache = event_cache
+        self.commands = queue.Queue()
+        self.stopping = threading.Event()
+        self.current_job = None
+        self.current_job_lock = threading.Lock()
+        self.logger = structlog.get_logger(InternalDefaults.APPNAME)
+
+    def submit(self, job: FetchJob) -> None:
+        """Queue a FetchJob."""
+
+        self.commands.put(job)
+
+    def stop(self) -> None:
+        """Ask the worker to exit once the current request is done."""
+
+        self.stopping.set()
+        self.commands.put(None)
+
+    def abort(self, job: FetchJob) -> None:
+        """Cancel a job, and abort its request if it is in flight.
+
+        The worker is then free to start on the next job right away,
+        instead of waiting for a slow backend to answer.
+        """
+
+        job.cancel()
+        with self.current_job_lock:
+            if self.current_job is job and self.sensu_go_helper.abort(self):
+                self.logger.debug("FetchWorker.abort", generation=job.generation)
+
+    def fetch_page(self, **kwargs) -> Tuple[Exception, Tuple]:
+        """Make a backend API request and return an (error, result) tuple.
+
+        The response is turned into compact records here, off the main loop.
+        A malformed response is returned as the error too, so that it never
+        ends the worker.
+        """
+
+        self.logger.debug("FetchWorker.fetch_page", **kwargs)
+        try:
+            items, sensu_continue = self.sensu_go_helper.resource_fetch_request(
+                **kwargs
+            )
+            resource = kwargs.get("resource", "events")
+            records = ingest(resource, items)
+            if self.event_cache is not None and resource == "events":
+                self.event_cache.put_many(zip((r.key for r in records), items))
+        except requests.RequestException as e:
+            return (e, {})
+        except Exception as e:
+            self.logger.exception("FetchWorker.fetch_page")
+            return (e, {})
+        return (None, (records, sensu_continue))
+
+    def put(self, job: FetchJob, response: Tuple[Exception, Tuple]) -> bool:
+        """Put a response on the job's Queue.
+
+        Waits while the Queue is full. Returns False if the job was
+        cancelled, or the worker stopped, before there was room.
+        """
+
+        while not job.cancelled.is_set() and not self.stopping.is_set():
+            try:
+                job.q.put(response, timeout=self.PUT_POLL_SECONDS)
+                if self.notify:
+                    self.notify()
+                return True
+            except queue.Full:
+                continue
+        self.logger.debug("FetchWorker.put", dropped=True, generation=job.generation)
+        return False
+
+    def process(self, job: FetchJob) -> None:
+        """Fetch the page(s) requested by a job."""
+
+        with self.current_job_lock:
+            self.current_job = job
+        try:
+            self.__process(job)
+        finally:
+            with self.current_job_lock:
+                self.current_job = None
+
+    def __process(self, job: FetchJob) -> None:
+        kwargs = dict(job.kwargs)
+        while not job.cancelled.is_set():
+            err, result = response = self.fetch_page(**kwargs)
+            if not self.put(job, response):
+                return
+            if err or not job.follow_continue or not result[1]:
+                return
+            kwargs["sensu_continue"] = result[1]
+
+    def run(self) -> None:
+        """Process fetch jobs until stop() is called."""
+
+        while True:
+            job = self.commands.get()
+            if job is None:
+                break
+            self.process(job)
+        self.logger.debug("FetchWorker.run", stopped=True)
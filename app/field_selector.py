@@ -0,0 +1,132 @@
+# Copyright 2022 Two Sigma Open Source, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# <http://www.apache.org/licenses/LICENSE-2.0>
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from app.defaults import Filters
+from typing import List, Optional, Tuple
+import re
+
+# The event fields a filter can be pushed down to.
+# Sensu has no field selector for the check output.
+EVENT_FIELDS = {
+    Filters.EVENT_HOST_REGEX: "event.entity.name",
+    Filters.EVENT_CHECK_REGEX: "event.check.name",
+}
+
+# Characters that are safe to put in a selector value without quoting rules.
+SAFE_VALUE = re.compile(r"[A-Za-z0-9_.\-]+")
+
+REGEX_METACHARACTERS = set(".^$*+?{}[]|()\\")
+
+
+def literal(pattern: str) -> Optional[str]:
+    """The string pattern matches literally, or None if it has metacharacters.
+
+    >>> literal("web-1")
+    'web-1'
+    >>> literal(r"web\\.example")
+    'web.example'
+    >>> literal("web.example") is None
+    True
+    """
+
+    chars = []
+    escaped = False
+    for c in pattern:
+        if escaped:
+            if c.isalnum():
+                return None
+            chars.append(c)
+            escaped = False
+        elif c == "\\":
+            escaped = True
+        elif c in REGEX_METACHARACTERS:
+            return None
+        else:
+            chars.append(c)
+    if escaped:
+        return None
+    return "".join(chars)
+
+
+def alternatives(pattern: str) -> Optional[List[str]]:
+    """The literal alternatives of an "(a|b|c)" group or of a literal, or None."""
+
+    if pattern.startswith("(?:") and pattern.endswith(")"):
+        pattern = pattern[3:-1]
+    elif pattern.startswith("(") and pattern.endswith(")"):
+        pattern = pattern[1:-1]
+    elif "|" in pattern:
+        # "^a|b$" means "^a" or "b$", which is not a list of names.
+        return None
+    if "(" in pattern or ")" in pattern:
+        return None
+    values = [literal(p) for p in pattern.split("|")]
+    if None in values:
+        return None
+    return values
+
+
+def regex_to_selector(field: str, pattern: str) -> Optional[str]:
+    """Translate a regex on field into an exactly equivalent selector.
+
+    >>> regex_to_selector("event.entity.name", "web")
+    'event.entity.name matches "web"'
+    >>> regex_to_selector("event.entity.name", "^web1$")
+    'event.entity.name == "web1"'
+    >>> regex_to_selector("event.check.name", "^(disk|load)$")
+    'event.check.name in [disk,load]'
+    >>> regex_to_selector("event.check.name", "^disk") is None
+    True
+    """
+
+    if pattern.startswith("^") and pattern.endswith("$") and len(pattern) > 1:
+        values = alternatives(pattern[1:-1])
+        if not values or not all(SAFE_VALUE.fullmatch(v) for v in values):
+            return None
+        if len(values) == 1:
+            return f'{field} == "{values[0]}"'
+        return f"{field} in [{','.join(values)}]"
+
+    value = literal(pattern)
+    if value and SAFE_VALUE.fullmatch(value):
+        return f'{field} matches "{value}"'
+    return None
+
+
+def compile_field_selector(filters: List[dict]) -> Tuple[List[str], List[dict]]:
+    """Split event filters into fieldSelector terms and a residual.
+
+    Returns the selector terms, to be joined with "&&", and the filters
+    that still have to be applied client side.
+
+    >>> compile_field_selector(
+    ...     [
+    ...         {"type": Filters.EVENT_HOST_REGEX, "value": "^web1$"},
+    ...         {"type": Filters.EVENT_CHECK_REGEX, "value": "^disk"},
+    ...     ]
+    ... )
+    (['event.entity.name == "web1"'], [{'type': 'CHECK_REGEX', 'value': '^disk'}])
+    """
+
+    terms = []
+    residual = []
+    for f in filters:
+        term = None
+        if f["value"] and f["type"] in EVENT_FIELDS:
+            term = regex_to_selector(EVENT_FIELDS[f["type"]], f["value"])
+        if term:
+            terms.append(term)
+        else:
+            residual.append(f)
+    return terms, residual
@@ -0,0 +1,170 @@
+# Copyright 2022 Two Sigma Open Source, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# <http://www.apache.org/licenses/LICENSE-2.0>
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from app.event_store import EventStore, Selection
+from app.defaults import Filters, ViewOptions
+from app.diff import Delta
+from typing import List, Sequence
+import itertools
+import operator
+import re
+
+# Which column (EventStore) or attribute (SilencedRecord) a filter applies to.
+EVENT_NAME_COLUMNS = {
+    Filters.EVENT_HOST_REGEX: "entity",
+    Filters.EVENT_CHECK_REGEX: "check",
+}
+SILENCED_ATTRIBUTES = {
+    Filters.SILENCED_NAME_REGEX: "name",
+    Filters.SILENCED_CREATOR_REGEX: "creator",
+    Filters.SILENCED_REASON_REGEX: "reason",
+}
+
+
+class FilterPlan:
+    """The user supplied regex filters, compiled once.
+
+    A FilterPlan is built whenever a filter changes and is then reused
+    for every update of the view. The result of filtering is cached
+    against the snapshot it was computed from, so redrawing an unchanged
+    snapshot (e.g. moving the cursor) does no filtering at all.
+    """
+
+    def __init__(self, filters: List[dict]) -> None:
+        """Initialize FilterPlan.
+
+        filters is the list of {"type": ..., "value": ...} kept by Tensu.
+        Empty filter values are ignored. The stores passed to a plan must
+        share their StringTables.
+        """
+
+        self.names = []
+        self.output = None
+        self.silenced = []
+        for f in filters:
+            if not f["value"]:
+                continue
+            r = re.compile(f["value"])
+            if f["type"] in EVENT_NAME_COLUMNS:
+                self.names.append((EVENT_NAME_COLUMNS[f["type"]], r))
+            elif f["type"] == Filters.EVENT_OUTPUT_REGEX:
+                self.output = r
+            elif f["type"] in SILENCED_ATTRIBUTES:
+                getter = operator.attrgetter(SILENCED_ATTRIBUTES[f["type"]])
+                self.silenced.append((r, getter))
+        # Verdicts per string id, extended as the StringTables grow.
+        self.name_masks = [bytearray() for _ in self.names]
+        # Verdicts for outputs and silenced items, by record key.
+        self.matches = {}
+        self.cache_key = None
+        self.cache = None
+
+    def invalidate(self, delta: Delta) -> None:
+        """Forget the verdicts of the items that delta reports as stale."""
+
+        if delta.reset:
+            self.matches = {}
+        else:
+            for k in delta.stale_keys():
+                self.matches.pop(k, None)
+
+    def __name_mask(self, n: int, store: EventStore) -> bytearray:
+        """Verdicts of the n-th name regex, one per interned string."""
+
+        column, r = self.names[n]
+        mask = self.name_masks[n]
+        strings = store.tables[column].strings
+        if len(mask) < len(strings):
+            mask.extend(map(bool, map(r.search, strings[len(mask) :])))
+        return mask
+
+    def select_events(self, store: EventStore, view: str) -> Sequence[int]:
+        """Indices of the rows of store that pass every event filter.
+
+        Status and name filters are fused into a single pass over the
+        columns; the output regex only runs on the rows that are left.
+        """
+
+        if view == ViewOptions.NOT_PASSING:
+            indices = store.not_passing()
+        else:
+            indices = store.all()
+
+        if self.names:
+            verdicts = []
+            for n, (column, _) in enumerate(self.names):
+                ids = map(getattr(store, column).__getitem__, indices)
+                verdicts.append(map(self.__name_mask(n, store).__getitem__, ids))
+            if len(verdicts) > 1:
+                verdicts = [map(min, *verdicts)]
+            indices = list(itertools.compress(indices, verdicts[0]))
+
+        if self.output is not None:
+            search = self.output.search
+            records = store.records
+            output = store.output
+            matches = self.matches
+            selected = []
+            for i in indices:
+                k = records[i].key
+                matched = matches.get(k)
+                if matched is None:
+                    matched = matches[k] = bool(search(output[i]))
+                if matched:
+                    selected.append(i)
+            indices = selected
+
+        return indices
+
+    def select_silenced(self, items: list) -> list:
+        """The silenced items that pass every silenced filter."""
+
+        if not self.silenced:
+            return items
+
+        matches = self.matches
+        filtered = []
+        for item in items:
+            k = item.key
+            matched = matches.get(k)
+            if matched is None:
+                matched = matches[k] = all(
+                    r.search(value(item)) for r, value in self.silenced
+                )
+            if matched:
+                filtered.append(item)
+        return filtered
+
+    def apply(self, items: list, store: EventStore, view: str, version: int):
+        """Filter the current snapshot for view.
+
+        store is the EventStore of the snapshot for the event views, or
+        None. The result is reused as long as version, view, the store
+        and the number of items are unchanged.
+        """
+
+        cache_key = (version, view, store, len(items))
+        if cache_key == self.cache_key:
+            return self.cache
+
+        if view == ViewOptions.SILENCED:
+            result = self.select_silenced(items)
+        elif store is None:
+            result = items
+        else:
+            result = Selection(store.records, self.select_events(store, view))
+
+        self.cache_key = cache_key
+        self.cache = result
+        return result
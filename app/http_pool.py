@@ -0,0 +1,89 @@
+# Copyright 2022 Two Sigma Open Source, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# <http://www.apache.org/licenses/LICENSE-2.0>
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from requests.adapters import HTTPAdapter
+import threading
+import socket
+
+
+class AbortableHTTPAdapter(HTTPAdapter):
+    """A keep-alive HTTPAdapter whose in-flight requests can be aborted.
+
+    The adapter remembers which pooled connection each thread has checked
+    out. abort(thread) shuts down the socket of that connection, which
+    makes the request blocked on it in that thread fail right away with a
+    ConnectionError, instead of waiting for a slow backend to answer.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        """Initialize AbortableHTTPAdapter."""
+
+        self.in_use = {}
+        self.in_use_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": self.__tracking_pool(HTTPConnectionPool),
+            "https": self.__tracking_pool(HTTPSConnectionPool),
+        }
+
+    def __tracking_pool(self, base: type) -> type:
+        """Subclass a urllib3 connection pool to report checkouts to this adapter."""
+
+        adapter = self
+
+        class TrackingPool(base):
+            def _get_conn(self, timeout=None):
+                conn = super()._get_conn(timeout)
+                with adapter.in_use_lock:
+                    adapter.in_use[threading.get_ident()] = conn
+                return conn
+
+            def _put_conn(self, conn):
+                with adapter.in_use_lock:
+                    adapter.in_use.pop(threading.get_ident(), None)
+                super()._put_conn(conn)
+
+        return TrackingPool
+
+    @staticmethod
+    def __shutdown(conn) -> bool:
+        sock = getattr(conn, "sock", None)
+        if sock is None:
+            return False
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            return False
+        return True
+
+    def abort(self, thread: threading.Thread) -> bool:
+        """Abort the request thread is making, if any.
+
+        Returns True if a socket was shut down.
+        """
+
+        with self.in_use_lock:
+            return self.__shutdown(self.in_use.get(thread.ident))
+
+    def close(self) -> None:
+        """Abort every request in flight, and close the pooled connections."""
+
+        with self.in_use_lock:
+            for conn in self.in_use.values():
+                self.__shutdown(conn)
+        super().close()
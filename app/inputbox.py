@@ -13,6 +13,7 @@
 # limitations under the License.
 
 from curses.textpad import Textbox
+from app.display import resize_terminal
 from app.colors import ColorPairs
 from app.window import Window
 import curses
@@ -54,6 +55,7 @@ class InputBox(Window):
         self.win.refresh()
 
     def validator(self, key):
+        resize_terminal()
         if key == curses.ascii.ESC:
             return 7
         return key
@@ -13,7 +13,7 @@
 # limitations under the License.
 
 from app.listselectitem import ListSelectItem
-from app.display import block_on_input
+from app.display import block_on_input, resize_terminal
 from app.colors import ColorPairs
 from app.window import Window
 import curses
@@ -77,6 +77,7 @@ class ListSelect(Window):
         while True:
             self.draw_items()
             key = self.stdscr.getch()
+            resize_terminal()
             if key in (curses.ascii.BEL, curses.ascii.NL, curses.ascii.ESC):
                 break
             if key == curses.KEY_UP:
@@ -13,6 +13,7 @@
 # limitations under the License.
 
 from app.passwordmask import PasswordMask
+from app.display import resize_terminal
 from curses.textpad import Textbox
 from app.colors import ColorPairs
 from app.window import Window
@@ -74,6 +75,10 @@ class LoginPrompt(Window):
         self.p_edit = Textbox(self.p_win.win)
         self.win.refresh()
 
+    def validator(self, key: int) -> int:
+        resize_terminal()
+        return key
+
     def get_credentials(self) -> Tuple[str, str]:
         """Returns the username and password entered."""
 
@@ -85,13 +90,13 @@ class LoginPrompt(Window):
 
         # Blocking method edit()
         self.u_win.win.move(0, 0)
-        username = self.u_edit.edit()  # returns the samething as gather()
+        username = self.u_edit.edit(self.validator)  # returns the samething as gather()
         username = username[: len(username) - 1]
         # Curses adds a trailing space for some effin reason
 
         # Blocking method edit()
         self.p_win.win.move(0, 0)
-        nothing = self.p_edit.edit(mask.mask)  # noqa
+        nothing = self.p_edit.edit(lambda key: mask.mask(self.validator(key)))  # noqa
         password = mask.value()
 
         self.stdscr.refresh()
@@ -0,0 +1,138 @@
+# Copyright 2022 Two Sigma Open Source, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# <http://www.apache.org/licenses/LICENSE-2.0>
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Callable, Sequence
+from collections import deque
+import threading
+import bisect
+import time
+
+# Upper bounds, in milliseconds, of the latency buckets.
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class LatencyHistogram:
+    """A histogram of the most recent request latencies.
+
+    Only the last `window` samples are counted, so the histogram follows
+    the backend when it degrades and when it recovers. With max_age_ms,
+    samples older than that are dropped as well, so a histogram that
+    stops getting samples empties out. Samples are observed from request
+    threads and read from the main loop.
+
+    >>> h = LatencyHistogram(window=4)
+    >>> for ms in (5, 20, 30, 400):
+    ...     h.observe(ms)
+    >>> h.quantile(0.5), h.quantile(0.9)
+    (25, 500)
+    >>> for ms in (8, 8, 8, 8):
+    ...     h.observe(ms)
+    >>> h.quantile(0.9)
+    10
+    >>> now = [0.0]
+    >>> h = LatencyHistogram(max_age_ms=1000, clock=lambda: now[0])
+    >>> h.observe(2000)
+    >>> now[0] = 1.5
+    >>> h.quantile(0.9), len(h)
+    (0, 0)
+    """
+
+    def __init__(
+        self,
+        window: int = 64,
+        buckets: Sequence[int] = LATENCY_BUCKETS_MS,
+        max_age_ms: float = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize LatencyHistogram."""
+
+        self.buckets = tuple(buckets)
+        # One more count for the samples slower than the last bucket.
+        self.counts = [0] * (len(self.buckets) + 1)
+        # (time observed, bucket) pairs, the oldest first.
+        self.samples = deque(maxlen=window)
+        self.max_age_ms = max_age_ms
+        self.clock = clock
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self.lock:
+            self.__expire()
+            return len(self.samples)
+
+    def __expire(self) -> None:
+        """Drop the samples older than max_age_ms, with the lock held."""
+
+        if self.max_age_ms is None:
+            return
+        oldest = self.clock() - self.max_age_ms / 1000
+        while self.samples and self.samples[0][0] < oldest:
+            self.counts[self.samples.popleft()[1]] -= 1
+
+    def observe(self, ms: float) -> None:
+        """Count one request that took ms milliseconds."""
+
+        bucket = bisect.bisect_left(self.buckets, ms)
+        with self.lock:
+            if len(self.samples) == self.samples.maxlen:
+                self.counts[self.samples[0][1]] -= 1
+            self.samples.append((self.clock(), bucket))
+            self.counts[bucket] += 1
+
+    def quantile(self, q: float) -> float:
+        """The upper bound of the bucket the q quantile falls in.
+
+        Returns 0 when nothing was observed, and infinity when the
+        quantile is slower than the last bucket.
+        """
+
+        with self.lock:
+            self.__expire()
+            total = len(self.samples)
+            if total == 0:
+                return 0
+            rank = q * total
+            seen = 0
+            for bucket, count in enumerate(self.counts):
+                seen += count
+                if seen >= rank and count:
+                    break
+        if bucket == len(self.buckets):
+            return float("inf")
+        return self.buckets[bucket]
+
+
+class Counter:
+    """A count of events, incremented from request threads.
+
+    >>> c = Counter()
+    >>> c.increment(); c.increment()
+    >>> int(c)
+    2
+    """
+
+    def __init__(self) -> None:
+        """Initialize Counter."""
+
+        self.value = 0
+        self.lock = threading.Lock()
+
+    def __int__(self) -> int:
+        return self.value
+
+    def increment(self) -> None:
+        """Count one more event."""
+
+        with self.lock:
+            self.value += 1
@@ -0,0 +1,135 @@
+# Copyright 2022 Two Sigma Open Source, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# <http://www.apache.org/licenses/LICENSE-2.0>
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from app.async_sensu_go import AsyncSensuGoHelper
+from app.defaults import InternalDefaults
+from app.background import BackgroundLoop
+from app.metrics import LatencyHistogram
+from app.rate_limiter import Priorities
+from app.event_cache import EventCache
+from concurrent.futures import Future
+from typing import Sequence, Union
+from app.records import EventRecord
+from app.utils import Utils
+import functools
+import structlog
+
+
+class Prefetcher:
+    """Warms the EventCache with the events around the cursor.
+
+    While the cursor is on row N, the full events of rows N-k to N+k
+    (prefetch_rows) are retrieved in the background, nearest rows first,
+    so opening one of them is a cache hit. Events cached less than
+    prefetch_max_age_ms ago are not retrieved again.
+
+    At most prefetch_max_concurrency requests are in flight, and at most
+    prefetch_rate_per_s are started per second. Prefetching pauses for
+    prefetch_backoff_ms whenever the 90th percentile of latency, the time
+    the backend takes to return one prefetched event, is above
+    prefetch_latency_budget_ms. Those latencies are only kept for
+    detail_latency_max_age_ms, so prefetching resumes once the slow
+    requests have aged out.
+    """
+
+    def __init__(
+        self,
+        state: dict,
+        async_sensu_go_helper: AsyncSensuGoHelper,
+        background: BackgroundLoop,
+        event_cache: EventCache,
+        latency: LatencyHistogram,
+    ) -> None:
+        """Initialize Prefetcher."""
+
+        self.state = state
+        self.async_sensu_go_helper = async_sensu_go_helper
+        self.background = background
+        self.event_cache = event_cache
+        self.latency = latency
+        self.candidates = []
+        self.in_flight = set()
+        self.next_submit_time = 0
+        self.logger = structlog.get_logger(InternalDefaults.APPNAME)
+
+    def update(self, items: Sequence, index: int) -> None:
+        """The cursor is on items[index], prefetch the rows around it."""
+
+        rows = [index]
+        for distance in range(1, self.state["prefetch_rows"] + 1):
+            rows += [index + distance, index - distance]
+        self.candidates = [
+            items[i]
+            for i in rows
+            if 0 <= i < len(items) and isinstance(items[i], EventRecord)
+        ]
+        self.pump()
+
+    def degraded(self) -> bool:
+        """Returns True if the backend is too slow to prefetch."""
+
+        return self.latency.quantile(0.9) > self.state["prefetch_latency_budget_ms"]
+
+    def pump(self) -> None:
+        """Start prefetching candidates, within the concurrency and rate budget."""
+
+        now = Utils.current_milli_time()
+        while (
+            self.candidates
+            and len(self.in_flight) < self.state["prefetch_max_concurrency"]
+            and now >= self.next_submit_time
+        ):
+            if self.degraded():
+                self.logger.debug("Prefetcher.pump", degraded=True)
+                self.next_submit_time = now + self.state["prefetch_backoff_ms"]
+                return
+            record = self.candidates.pop(0)
+            if record.key in self.in_flight or self.event_cache.get(
+                record.key, self.state["prefetch_max_age_ms"]
+            ):
+                continue
+            self.in_flight.add(record.key)
+            self.next_submit_time = now + 1000 / self.state["prefetch_rate_per_s"]
+            self.background.submit(
+                self.__prefetch(record), functools.partial(self.__done, record.key)
+            )
+
+    async def __prefetch(self, record: EventRecord) -> None:
+        event = await self.async_sensu_go_helper.get_event(
+            record.entity, record.check, Priorities.PREFETCH
+        )
+        self.event_cache.put(record.key, event)
+
+    def __done(self, key: tuple, future: Future) -> None:
+        """Runs on the main loop once a prefetch has completed."""
+
+        self.in_flight.discard(key)
+        if future.exception() is not None:
+            self.logger.debug(
+                "Prefetcher.__done", key=key, error=str(future.exception())
+            )
+        self.pump()
+
+    def next_deadline(self) -> Union[int, None]:
+        """The time, in milliseconds, pump() can start the next prefetch at.
+
+        Returns None when there is nothing to prefetch, or no room for it.
+        """
+
+        if (
+            self.candidates
+            and len(self.in_flight) < self.state["prefetch_max_concurrency"]
+        ):
+            return self.next_submit_time
+        return None
@@ -0,0 +1,167 @@
+# Copyright 2022 Two Sigma Open Source, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# <http://www.apache.org/licenses/LICENSE-2.0>
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from typing import Callable, List
+import threading
+import time
+
+
+class Priorities:
+    """Request priorities, the most urgent first."""
+
+    AUTH = 0
+    INTERACTIVE = 1
+    BACKGROUND = 2
+    PREFETCH = 3
+
+    NAMES = ("auth", "interactive", "background", "prefetch")
+
+
+class TokenBucket:
+    """Tokens refilled at rate per second, up to capacity.
+
+    take() may overdraw the bucket. The debt is paid back by the refill,
+    which is how sizes that are only known afterwards are charged.
+
+    >>> now = [0.0]
+    >>> bucket = TokenBucket(10, 5, clock=lambda: now[0])
+    >>> bucket.take(8)
+    >>> bucket.wait_time(1)
+    0.4
+    >>> now[0] = 0.4
+    >>> bucket.wait_time(1)
+    0.0
+    """
+
+    def __init__(
+        self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        """Initialize TokenBucket."""
+
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.clock = clock
+        self.updated = clock()
+
+    def refill(self) -> None:
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until the bucket holds amount tokens."""
+
+        self.refill()
+        if self.tokens >= amount:
+            return 0.0
+        return round((amount - self.tokens) / self.rate, 6)
+
+    def take(self, amount: float) -> None:
+        self.refill()
+        self.tokens -= amount
+
+
+class RateLimiter:
+    """Caps the load a client puts on the backend.
+
+    Every request takes a token from a requests per second bucket, and
+    the size of every response is charged to a bytes per second bucket.
+    A limit of 0 disables its bucket. Both allow bursts of burst_s
+    seconds worth of tokens.
+
+    A request waits in acquire() while any bucket is empty, or while a
+    request of a more urgent priority (see Priorities) is waiting, so
+    interactive actions go ahead of background list refreshes. Admitted
+    and throttled requests are counted per priority.
+    """
+
+    def __init__(
+        self, requests_per_s: float, bytes_per_s: float, burst_s: float = 1
+    ) -> None:
+        """Initialize RateLimiter."""
+
+        self.requests = None
+        if requests_per_s:
+            self.requests = TokenBucket(
+                requests_per_s, max(1, requests_per_s * burst_s)
+            )
+        self.bytes = None
+        if bytes_per_s:
+            self.bytes = TokenBucket(bytes_per_s, bytes_per_s * burst_s)
+        n = len(Priorities.NAMES)
+        self.waiting = [0] * n
+        self.admitted = [0] * n
+        self.throttled = [0] * n
+        self.condition = threading.Condition()
+
+    def __wait_time(self) -> float:
+        wait = 0.0
+        if self.requests is not None:
+            wait = self.requests.wait_time(1)
+        if self.bytes is not None:
+            wait = max(wait, self.bytes.wait_time(0))
+        return wait
+
+    def acquire(self, priority: int, cancelled: threading.Event = None) -> bool:
+        """Wait until a request of this priority may be sent.
+
+        Returns False, without admitting the request, if cancelled is set
+        while waiting. See wake().
+        """
+
+        with self.condition:
+            self.waiting[priority] += 1
+            throttled = False
+            try:
+                while True:
+                    if cancelled is not None and cancelled.is_set():
+                        return False
+                    wait = self.__wait_time()
+                    if wait == 0 and not any(self.waiting[:priority]):
+                        break
+                    throttled = True
+                    self.condition.wait(wait or None)
+                if self.requests is not None:
+                    self.requests.take(1)
+                if throttled:
+                    self.throttled[priority] += 1
+                self.admitted[priority] += 1
+                return True
+            finally:
+                self.waiting[priority] -= 1
+                self.condition.notify_all()
+
+    def consume(self, nbytes: int) -> None:
+        """Charge the size of a response to the bytes bucket."""
+
+        if self.bytes is None:
+            return
+        with self.condition:
+            self.bytes.take(nbytes)
+
+    def wake(self) -> None:
+        """Make the waiting requests check whether they were cancelled."""
+
+        with self.condition:
+            self.condition.notify_all()
+
+    def counters(self) -> List[tuple]:
+        """(priority name, admitted, throttled, waiting) for every priority."""
+
+        with self.condition:
+            return list(
+                zip(Priorities.NAMES, self.admitted, self.throttled, self.waiting)
+            )
@@ -0,0 +1,165 @@
+# Copyright 2022 Two Sigma Open Source, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# <http://www.apache.org/licenses/LICENSE-2.0>
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from app.utils import Utils
+from typing import List
+import sys
+
+# Outputs are flattened once per record; no column is ever wider than this.
+DISPLAY_TEXT_MAX = 1024
+
+STATE_LABELS = {0: "passing", 1: "warning", 2: "failing"}
+
+
+class Record:
+    """Base class for compact records.
+
+    Records only carry the fields the list view draws and filters on.
+    Two records are equal when all of their fields are equal; slots with
+    a leading underscore cache values derived from the fields and are not
+    compared.
+    """
+
+    __slots__ = ()
+
+    def __eq__(self, other) -> bool:
+        if type(self) is not type(other):
+            return NotImplemented
+        return all(
+            getattr(self, f) == getattr(other, f)
+            for f in self.__slots__
+            if not f.startswith("_")
+        )
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.key!r})"
+
+
+class EventRecord(Record):
+    """The hot fields of a Sensu event.
+
+    The entity's system block, check history, labels and annotations are
+    dropped at ingest. The full event is kept in the EventCache, and
+    retrieved with AsyncSensuGoHelper.get_event() when it is not there.
+    The strings the list view draws (state_label, output_line, issued_text)
+    are made the first time a row is drawn, and kept with the record.
+    """
+
+    __slots__ = (
+        "key",
+        "namespace",
+        "entity",
+        "check",
+        "status",
+        "state",
+        "issued",
+        "executed",
+        "last_ok",
+        "timestamp",
+        "output",
+        "is_silenced",
+        "silenced",
+        "proxy_entity_name",
+        "_output_line",
+        "_issued_text",
+    )
+
+    def __init__(self, event: dict) -> None:
+        """Initialize EventRecord from an event returned by Sensu."""
+
+        check = event["check"]
+        self.namespace = sys.intern(event.get("metadata", {}).get("namespace", ""))
+        self.entity = sys.intern(event["entity"]["metadata"]["name"])
+        self.check = sys.intern(check["metadata"]["name"])
+        self.key = (self.namespace, self.entity, self.check)
+        self.status = check["status"]
+        self.state = check.get("state", "")
+        self.issued = check["issued"]
+        self.executed = check.get("executed", 0)
+        self.last_ok = check.get("last_ok", 0)
+        self.timestamp = event.get("timestamp", 0)
+        self.output = check["output"]
+        self.is_silenced = check.get("is_silenced", False)
+        self.silenced = tuple(Utils.sensu_dict_get(check, "silenced", []))
+        self.proxy_entity_name = check.get("proxy_entity_name", "")
+        self._output_line = None
+        self._issued_text = None
+
+    @property
+    def state_label(self) -> str:
+        return STATE_LABELS.get(self.status, "unknown")
+
+    @property
+    def output_line(self) -> str:
+        """The output on one line, at most DISPLAY_TEXT_MAX characters."""
+
+        if self._output_line is None:
+            line = Utils.flatten(self.output, DISPLAY_TEXT_MAX)
+            self._output_line = self.output if line == self.output else line
+        return self._output_line
+
+    @property
+    def issued_text(self) -> str:
+        if self._issued_text is None:
+            self._issued_text = Utils.format_timestamp(self.issued)
+        return self._issued_text
+
+
+class SilencedRecord(Record):
+    """The fields of a Sensu silencing entry.
+
+    reason_line and begin_text are the strings the list view draws.
+    """
+
+    __slots__ = (
+        "key",
+        "name",
+        "namespace",
+        "creator",
+        "reason",
+        "begin",
+        "expire",
+        "expire_at",
+        "expire_on_resolve",
+        "subscription",
+        "check",
+        "reason_line",
+        "begin_text",
+    )
+
+    def __init__(self, silenced: dict) -> None:
+        """Initialize SilencedRecord from a silencing entry returned by Sensu."""
+
+        metadata = silenced["metadata"]
+        self.name = metadata["name"]
+        self.key = self.name
+        self.namespace = sys.intern(metadata.get("namespace", ""))
+        self.creator = sys.intern(metadata.get("created_by", ""))
+        self.reason = silenced.get("reason", "(No reason provided)")
+        self.begin = silenced["begin"]
+        self.expire = silenced["expire"]
+        self.expire_at = silenced["expire_at"]
+        self.expire_on_resolve = silenced["expire_on_resolve"]
+        self.subscription = silenced.get("subscription")
+        self.check = silenced.get("check")
+        self.reason_line = Utils.flatten(self.reason, DISPLAY_TEXT_MAX)
+        self.begin_text = Utils.format_timestamp(self.begin)
+
+
+def ingest(resource: str, items: List[dict]) -> List[Record]:
+    """Turn a page of Sensu API responses into compact records."""
+
+    if resource == "silenced":
+        return [SilencedRecord(item) for item in items]
+    return [EventRecord(item) for item in items]
@@ -12,12 +12,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from multiprocessing import Process, Queue
 from app.defaults import InternalDefaults
+from app.fetch_worker import FetchWorker, FetchJob
+from app.event_store import EventStore
+from app.diff import Delta, merge
 from app.sensu_go import SensuGoHelper
 from datetime import datetime
 from app.utils import Utils
 import structlog
+import operator
+import requests
 import queue
 
 
@@ -25,15 +29,25 @@ class ResourceHandler:
     """Handles the fetching of Sensu resources.
 
     ResourceHandler is used by the main loop to make requests within
-    the context of a background Process. This ensures there is no
-    delay on the main control loop when waiting for IO, or else
+    the context of a background FetchWorker thread. This ensures there is
+    no delay on the main control loop when waiting for IO, or else
     the user experiences becomes choppy.
 
-    API requests are made in a separate process and the results are
-    put onto a shared Queue, which is processed by the main control
+    API requests are made by a single long-lived worker and the results
+    are put onto a shared Queue, which is processed by the main control
     loop.
+
+    Every page of a round of fetching must arrive within
+    fetch_cycle_deadline_ms. When a backend is wedged the round is
+    aborted, the last snapshot is kept and marked as stale.
+
+    The interval between two rounds adapts to the backend, see __adapt():
+    it shrinks while events keep changing and grows while nothing does,
+    between update_interval_min_ms and update_interval_max_ms.
     """
 
+    KILL_TIMEOUT_SECONDS = 0.1
+
     def __init__(self, state: dict, sensu_go_helper: SensuGoHelper) -> None:
         """Initialize ResourceHandler.
 
@@ -45,17 +59,32 @@ class ResourceHandler:
         self.call_update = True
         self.items = []
         self.new_items = []
+        self.index = {}
+        self.string_tables = {}
+        self.store = None
+        self.new_store = None
+        self.version = 0
+        self.generation = 0
+        self.delta = Delta()
+        self.pending_delta = Delta()
         self.viewable_items_count = 0
         self.next_update_time = Utils.current_milli_time()
         self.next_fetch_time = Utils.current_milli_time()
+        self.cycle_start = None
+        self.cycle_deadline = None
+        self.stale = False
+        self.update_interval = state["update_interval_ms"]
+        self.adapt_ready = False
         self.last_updated = datetime.utcnow()
         self.state = state
         self.sensu_go_helper = sensu_go_helper
         self.spinner = ["⣾", "⣽", "⣻", "⢿", "⡿", "⣟", "⣯", "⣷"]
         self.spin_index = 0
         self.logger = structlog.get_logger(InternalDefaults.APPNAME)
-        self.fetch_process = Process()
-        self.q = Queue()
+        self.fetch_worker = None
+        self.fetch_job = FetchJob(queue.Queue())
+        self.wakeup_callable = None
+        self.event_cache = None
 
     def __spin(self):
         """Spin! the spinner.
@@ -71,7 +100,7 @@ class ResourceHandler:
     def __is_allowed_to_update(self):
         """Regulates how often to start a new round of fetching.
 
-        Returns True if update_interval_ms has elapsed.
+        Returns True if the update interval has elapsed.
         """
 
         return Utils.current_milli_time() >= self.next_update_time
@@ -84,52 +113,148 @@ class ResourceHandler:
 
         return Utils.current_milli_time() >= self.next_fetch_time
 
+    def __call(self):
+        """Hand the items, and the Delta since the last call, to the callable."""
+
+        delta, self.pending_delta = self.pending_delta, Delta()
+        self.callable(self.items, delta)
+
     def __items_updated(self):
         """Notifies the main loop that new items are available to be drawn."""
 
         self.viewable_items_count = len(self.items)
         self.last_updated = datetime.utcnow()
-        self.callable(self.items)
+        self.__call()
+
+    def __swap(self):
+        """Merge new_items into the current snapshot.
+
+        Unchanged items keep their previous object, and the Delta against
+        the previous snapshot is remembered for the callable. Events are
+        also kept in a columnar EventStore, built page by page.
+
+        Returns how many items changed in a way that matters, see
+        __significant_changes().
+        """
+
+        previous = self.index
+        self.items, self.index, self.delta = merge(
+            self.index, self.new_items, operator.attrgetter("key")
+        )
+        # Merging keeps the order and the values, so the columns still line up.
+        if self.new_store is not None:
+            self.new_store.records = self.items
+        self.store = self.new_store
+        if self.delta:
+            self.version += 1
+        self.stale = False
+        self.pending_delta = self.pending_delta.combine(self.delta)
+        self.logger.debug("ResourceHandler.__swap", delta=repr(self.delta))
+        return self.__significant_changes(previous, self.delta)
+
+    def __significant_changes(self, previous, delta):
+        """Count the items that were added, removed or changed status.
+
+        Every execution of a check changes its event, so an event whose
+        status stayed the same is not counted. Any change to an item
+        without a status (a silenced entry) is.
+        """
+
+        changes = len(delta.added) + len(delta.removed)
+        for key in delta.changed:
+            status = getattr(previous[key], "status", None)
+            if status is None or status != self.index[key].status:
+                changes += 1
+        return changes
+
+    def __adapt(self, changes):
+        """Adapt the update interval to the round of fetching that just ended.
+
+        The interval is halved when items changed, so changes show up
+        sooner during an incident, and grows by half when nothing did, or
+        when the round failed, so idle sessions and a struggling backend
+        see fewer requests. It is never shorter than twice the time the
+        round took, and stays within update_interval_min_ms and
+        update_interval_max_ms. The first round after a reset has nothing
+        to compare against and keeps the interval.
+        """
+
+        elapsed = Utils.current_milli_time() - self.cycle_start
+        if not self.state["update_interval_adaptive"]:
+            self.update_interval = self.state["update_interval_ms"]
+            return
+        if not self.adapt_ready:
+            self.adapt_ready = True
+            return
+        if changes:
+            interval = self.update_interval / 2
+        else:
+            interval = self.update_interval * 1.5
+        interval = max(interval, 2 * elapsed, self.state["update_interval_min_ms"])
+        self.update_interval = min(interval, self.state["update_interval_max_ms"])
+        self.logger.debug(
+            "ResourceHandler.__adapt",
+            changes=changes,
+            elapsed_ms=elapsed,
+            update_interval_ms=self.update_interval,
+        )
+
+    def __receive(self, err, result):
+        """Processes one Response taken off the shared Queue.
+
+        Append results to new_items. If there is no continuation, swap
+        the old data (items) with the newly fetched data (new_items).
+        An error ends the round of fetching and is raised to the caller.
+        """
+
+        if err:
+            # The next round starts over from the first page.
+            self.sensu_continue = None
+            self.fetch_completed = True
+            self.stale = True
+            self.__adapt(0)
+            self.next_update_time = Utils.current_milli_time() + self.update_interval
+            raise err
+
+        items = result[0]
+        self.sensu_continue = result[1]
+        self.logger.debug("ResourceHandler.__receive", items=len(items), fetched=True)
+        self.fetch_status_callable(f"{self.__spin()} Received {len(items)}")
+        self.new_items += items
+        if self.new_store is not None:
+            self.new_store.append_page(items)
+        if not self.sensu_continue:
+            self.fetch_completed = True
+            self.__adapt(self.__swap())
+            self.next_update_time = Utils.current_milli_time() + self.update_interval
+        elif not self.items:
+            self.items += items
+            if self.new_store is not None:
+                self.store = EventStore(self.string_tables)
+                self.store.append_page(items)
 
     def __fetch(self, **kwargs):
         """Processes Responses from the backend API.
 
         The responses are waiting on the shared Queue.
-        If we are allowed to start making requests again, then
-        1. Check if there is anything on the Queue to br processed and process it.
+        In pipelined mode the worker follows Sensu-Continue tokens on its
+        own, so every page that is ready is processed right away.
+        Otherwise, if we are allowed to make requests again, then
+        1. Check if there is anything on the Queue to be processed and process it.
         2. If there is a continuation from Sensu in the response,
-           then make another request. Append results to new_items.
-        3. If there is no continatuion, swap the old data (items) with the
-           newly fetched data (new_items).
+           then request the next page.
         """
         self.logger.debug(
             "ResourceHandler__fetch", fetch_interval_ms=self.state["fetch_interval_ms"]
         )
-        if self.__is_allowed_to_fetch():
+        if self.state["fetch_pipelined"]:
+            self.__drain()
+        elif self.__is_allowed_to_fetch():
             try:
-                err, result = self.q.get_nowait()  # Dont block
-                if err:
-                    raise Exception(err)
-                items = result[0]
-                self.sensu_continue = result[1]
-                self.logger.debug(
-                    "ResourceHandler.__fetch", items=len(items), fetched=True
-                )
-                self.fetch_status_callable(f"{self.__spin()} Received {len(items)}")
-                if not self.sensu_continue:
-                    self.fetch_completed = True
-                    self.next_update_time = (
-                        Utils.current_milli_time() + self.state["update_interval_ms"]
-                    )
-                    self.items = self.new_items
-                else:
+                self.__receive(*self.fetch_job.q.get_nowait())  # Dont block
+                if not self.fetch_completed:
                     kwargs["sensu_continue"] = self.sensu_continue
-                    self.__resource_fetch_request(**kwargs)  # Starts subprocess
-                    self.fetch_completed = False
-
-                self.new_items += items
-                if not self.items:
-                    self.items += items
+                    self.__resource_fetch_request(**kwargs)  # Queues on worker
 
                 self.next_fetch_time = (
                     Utils.current_milli_time() + self.state["fetch_interval_ms"]
@@ -141,56 +266,117 @@ class ResourceHandler:
                 self.logger.debug("ResourceHandler.__fetch", skipped=True)
                 self.fetch_status_callable(f"{self.__spin()} Waiting...")
 
+    def __drain(self):
+        """Processes every page the worker has already fetched."""
+
+        received = 0
+        try:
+            while not self.fetch_completed:
+                self.__receive(*self.fetch_job.q.get_nowait())  # Dont block
+                received += 1
+        except queue.Empty:
+            if not received:
+                self.logger.debug("ResourceHandler.__drain", skipped=True)
+                self.fetch_status_callable(f"{self.__spin()} Waiting...")
+        finally:
+            if received:
+                self.__items_updated()
+
     def __resource_fetch_request(self, **kwargs):
-        """Make a Sensu API request in a separate Process.
+        """Ask the background FetchWorker to make Sensu API requests.
 
-        The response is stored in a shared Queue.
+        The worker is started on first use and then kept alive.
+        In pipelined mode a single job fetches every page, at most
+        fetch_prefetch_depth pages ahead of the main loop.
+        The responses are stored in a shared Queue.
         """
 
         self.logger.debug("ResourceHandler.__resource_fetch_request", **kwargs)
         self.fetch_status_callable(f"{self.__spin()} Fetching...")
-        self.fetch_process = Process(
-            target=self.sensu_go_helper.multi_resource_fetch_request,
-            args=(self.q,),
-            kwargs=kwargs,
+        if self.fetch_worker is None or not self.fetch_worker.is_alive():
+            self.fetch_worker = FetchWorker(
+                self.sensu_go_helper, self.wakeup_callable, self.event_cache
+            )
+            self.fetch_worker.start()
+        kwargs["deadline"] = self.cycle_deadline
+        if self.state["fetch_pipelined"]:
+            q = queue.Queue(maxsize=max(1, self.state["fetch_prefetch_depth"]))
+            self.fetch_job = FetchJob(
+                q, follow_continue=True, generation=self.generation, **kwargs
+            )
+        else:
+            self.fetch_job = FetchJob(
+                self.fetch_job.q, generation=self.generation, **kwargs
+            )
+        self.fetch_worker.submit(self.fetch_job)
+
+    def __cancel(self):
+        """Cancel the current fetch job, aborting its request if in flight."""
+
+        if self.fetch_worker is None:
+            self.fetch_job.cancel()
+        else:
+            self.fetch_worker.abort(self.fetch_job)
+
+    def __expire(self):
+        """Give up on a round of fetching that ran past its deadline.
+
+        The request in flight is aborted and the current items are kept,
+        but marked as stale. Raises a Timeout to the caller.
+        """
+
+        self.logger.debug("ResourceHandler.__expire", generation=self.generation)
+        self.__cancel()
+        self.sensu_go_helper.timeouts.increment()
+        self.fetch_job = FetchJob(queue.Queue())
+        self.sensu_continue = None
+        self.fetch_completed = True
+        self.stale = True
+        self.__adapt(0)
+        self.next_update_time = Utils.current_milli_time() + self.update_interval
+        raise requests.Timeout(
+            f"No response within {self.state['fetch_cycle_deadline_ms']} ms"
         )
-        self.fetch_process.daemon = True
-        self.fetch_process.start()
 
     def kill(self):
         """Immediately stops background request fetching.
 
-        Continually wait for the background worker to terminate cleanly.
-        Calling join(1) blocks for 1 second, waiting for fetch_process
-        to end. kill() should be followed immeditaly by application shutdown.
+        The request in flight is aborted, so the background worker
+        terminates without waiting on the backend. kill() should be
+        followed immediately by application shutdown.
         """
-        while self.fetch_process.exitcode is None:
-            self.logger.debug(
-                "ResourceHandler.kill",
-                terminated=False,
-                waiting=True,
-                fetch_process_exit_code=self.fetch_process.exitcode,
-            )
-            try:
-                self.q.get_nowait()
-                self.q.close()
-            except Exception:
-                self.logger.exception(
-                    "Exception occured while waiting for fetch background process to"
-                    " stop. Ignoring..."
-                )
-            self.fetch_process.join(1)
-        self.logger.debug("ResourceHandler.kill", terminated=True, waiting=False)
+        self.__cancel()
+        if self.fetch_worker is None:
+            return
+        self.fetch_worker.stop()
+        self.fetch_worker.join(self.KILL_TIMEOUT_SECONDS)
+        self.logger.debug(
+            "ResourceHandler.kill", terminated=not self.fetch_worker.is_alive()
+        )
+        self.fetch_worker = None
 
     def reset(self):
-        """Resets the class to an initial state."""
+        """Resets the class to an initial state.
 
-        self.logger.debug("ResourceHandler.reset")
-        self.kill()
-        self.q = Queue()
+        The fetch worker is kept alive, but the current job is cancelled,
+        its request is aborted and its responses are never read.
+        """
+
+        self.logger.debug("ResourceHandler.reset", generation=self.generation)
+        self.__cancel()
+        self.generation += 1
+        self.fetch_job = FetchJob(queue.Queue())
         self.items = []
         self.new_items = []
+        self.index = {}
+        self.store = None
+        self.new_store = None
+        self.version += 1
+        self.pending_delta = Delta(reset=True)
         self.fetch_completed = True
+        self.stale = False
+        self.update_interval = self.state["update_interval_ms"]
+        self.adapt_ready = False
         self.sensu_continue = None
         self.next_update_time = Utils.current_milli_time()
 
@@ -203,10 +389,41 @@ class ResourceHandler:
         """Takes a function as an argument and sets that as the callable.
 
         The callable is what function is called when there is new data available.
+        It receives the items and the Delta since it was last called.
         """
 
         self.callable = callable
 
+    def set_wakeup_callable(self, callable):
+        """Takes a function as an argument and sets that as the wakeup_callable.
+
+        The wakeup_callable is called from the background worker
+        whenever a response is waiting on the shared Queue.
+        """
+
+        self.wakeup_callable = callable
+
+    def set_event_cache(self, event_cache):
+        """Takes an EventCache the background worker fills with full events."""
+
+        self.event_cache = event_cache
+
+    def next_deadline(self):
+        """When get_resource_items next has work to do that is not a response.
+
+        Returns a time in milliseconds, comparable to
+        Utils.current_milli_time(), or None if only a response from the
+        worker (see set_wakeup_callable) can make progress.
+        """
+
+        if self.call_update:
+            return Utils.current_milli_time()
+        if self.fetch_completed:
+            return self.next_update_time
+        if self.state["fetch_pipelined"]:
+            return self.cycle_deadline
+        return min(self.next_fetch_time, self.cycle_deadline)
+
     def set_fetch_status_callable(self, callable):
         """Takes a function as an argument and sets that as the fetch_status_callable.
 
@@ -222,24 +439,37 @@ class ResourceHandler:
         If we are allowed to start making requests,
         and the last round of fetching is done:
         1. Reset some internal state
-        2. Start a new round of fetching in a background process.
+        2. Start a new round of fetching on the background worker.
 
-        If a fetch process is not completed:
-        1. Continue to fetch more data.
+        If a round of fetching is not completed:
+        1. Give up with a Timeout if its deadline has passed.
+        2. Continue to fetch more data.
 
         Otherwise: Wait...
         """
 
         if self.__is_allowed_to_update() and self.fetch_completed:
             self.new_items = []
+            self.new_store = None
+            if kwargs.get("resource", "events") == "events":
+                self.new_store = EventStore(self.string_tables)
             self.fetch_completed = False
+            self.cycle_start = Utils.current_milli_time()
+            self.cycle_deadline = (
+                self.cycle_start + self.state["fetch_cycle_deadline_ms"]
+            )
             kwargs["sensu_continue"] = self.sensu_continue
             self.__resource_fetch_request(**kwargs)
             self.__fetch(**kwargs)
         elif not self.fetch_completed:
             self.__fetch(**kwargs)
+            if (
+                not self.fetch_completed
+                and Utils.current_milli_time() >= self.cycle_deadline
+            ):
+                self.__expire()
         else:
             self.fetch_status_callable(f"{self.__spin()} Waiting...")
         if self.call_update:
-            self.callable(self.items)
+            self.__call()
             self.call_update = False
@@ -14,11 +14,17 @@
 
 from app.defaults import InternalDefaults, AuthenticationOptions
 from requests_kerberos import HTTPKerberosAuth, DISABLED
+from app.circuit_breaker import CircuitBreaker
+from app.rate_limiter import RateLimiter, Priorities
+from app.http_pool import AbortableHTTPAdapter
+from app.metrics import LatencyHistogram, Counter
 from typing import Any, Union, Tuple
-import multiprocessing
+from app.utils import Utils
+import threading
 import structlog
 import requests
 import base64
+import random
 import time
 import json
 import os
@@ -36,6 +42,122 @@ class SensuGoHelper:
         self.state = state
         self.logger = structlog.get_logger(InternalDefaults.APPNAME)
         self.auth_method = self.get_authentication_method()
+        self._session = None
+        self._session_pid = None
+        self._refresh_lock = threading.Lock()
+        self.latency = LatencyHistogram()
+        # The latency of get_event(), by priority, without the list pages.
+        # Old samples age out, so the prefetcher, which stops sending
+        # requests when they are slow, gets to try again.
+        self.detail_latency = tuple(
+            LatencyHistogram(max_age_ms=self.state_value("detail_latency_max_age_ms"))
+            for _ in Priorities.NAMES
+        )
+        self.timeouts = Counter()
+        self.circuit_breaker = CircuitBreaker(
+            self.state_value("circuit_failure_threshold"),
+            self.state_value("circuit_reset_timeout_ms"),
+        )
+        self.rate_limiter = RateLimiter(
+            self.state_value("rate_limit_requests_per_s"),
+            self.state_value("rate_limit_bytes_per_s"),
+            self.state_value("rate_limit_burst_s"),
+        )
+        self._aborts = {}
+        self._aborts_lock = threading.Lock()
+
+    def state_value(self, key: str) -> Any:
+        """Return a configuration value, falling back to the internal default."""
+
+        return self.state.get(key, InternalDefaults.STATE.get(key))
+
+    def timeout(self, deadline: Union[int, None] = None) -> Tuple[float, float]:
+        """The (connect, read) timeouts of a request, in seconds.
+
+        When a deadline (see Utils.current_milli_time) is given, the read
+        timeout is shortened to the time that is left until the deadline.
+        Raises a Timeout if the deadline has already passed.
+        """
+
+        connect = self.state_value("http_connect_timeout_s")
+        read = self.state_value("http_read_timeout_s")
+        if deadline is not None:
+            left = (deadline - Utils.current_milli_time()) / 1000
+            if left <= 0:
+                self.timeouts.increment()
+                raise requests.Timeout("Deadline exceeded before the request")
+            read = min(read, left)
+        return (connect, read)
+
+    def backoff_ms(self, attempt: int) -> float:
+        """How long to wait before retrying a request, in milliseconds.
+
+        The delay grows exponentially with the attempt, up to
+        http_backoff_max_ms, and is fully jittered, so that many clients
+        retrying at once do not hit the backend in lockstep.
+        """
+
+        cap = min(
+            self.state_value("http_backoff_max_ms"),
+            self.state_value("http_backoff_base_ms") * 2 ** (attempt - 1),
+        )
+        return random.uniform(0, cap)
+
+    def make_session(self) -> requests.Session:
+        """Create a requests Session backed by a keep-alive connection pool.
+
+        The pool sizes and keep-alive behaviour are read from the state file
+        (http_pool_connections, http_pool_maxsize and http_keep_alive).
+        """
+
+        session = requests.Session()
+        adapter = AbortableHTTPAdapter(
+            pool_connections=self.state_value("http_pool_connections"),
+            pool_maxsize=self.state_value("http_pool_maxsize"),
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        if not self.state_value("http_keep_alive"):
+            session.headers["Connection"] = "close"
+        return session
+
+    def session(self) -> requests.Session:
+        """Returns the pooled HTTP session for the current process.
+
+        Sockets must never be shared across a fork, so a forked child
+        process gets its own pool instead of reusing the parent's.
+        """
+
+        pid = os.getpid()
+        if self._session is None or self._session_pid != pid:
+            self._session = self.make_session()
+            self._session_pid = pid
+        return self._session
+
+    def abort(self, thread: threading.Thread) -> bool:
+        """Abort the request a thread is making with this helper, if any.
+
+        The request fails with a ConnectionError, and is not retried.
+        Returns True if there was a request in flight to abort.
+        """
+
+        with self._aborts_lock:
+            aborted = self._aborts.get(thread.ident)
+        if aborted is not None:
+            aborted.set()
+            self.rate_limiter.wake()
+        if self._session is None or self._session_pid != os.getpid():
+            return False
+        adapters = set(self._session.adapters.values())
+        return any([adapter.abort(thread) for adapter in adapters])
+
+    def close(self) -> None:
+        """Close all pooled connections."""
+
+        if self._session is not None and self._session_pid == os.getpid():
+            self._session.close()
+        self._session = None
+        self._session_pid = None
 
     def get_authentication_method(self) -> AuthenticationOptions:
         """Automatically discovery best authentication method."""
@@ -111,10 +233,9 @@ class SensuGoHelper:
         Returns the response from the Sensu Backend as a dict object.
         """
 
-        r = self.__request(
+        r = self.__authorized_request(
             method="get",
             uri=f"{self.url()}/api/{self.API_VERSION}/namespaces",
-            headers=self.auth_headers(),
         )
         r.raise_for_status()
         return r.json()
@@ -128,13 +249,22 @@ class SensuGoHelper:
         data: dict = None,
         auth: Union[list, HTTPKerberosAuth] = None,
         json_data: dict = None,
+        timeout: Tuple[float, float] = None,
+        priority: int = Priorities.INTERACTIVE,
+        latency: LatencyHistogram = None,
     ) -> requests.Response:
         """Create and send an HTTP request.
 
         Returns the response object after the request has been completed.
+        timeout defaults to the configured connect and read timeouts, see
+        timeout(). GET requests that fail with a 5xx response or a
+        connection error are retried, see backoff_ms(). A read timeout has
+        already used up the time the caller was willing to wait, so it is
+        not retried. Every attempt goes through the rate limiter, at the
+        given priority, and the circuit breaker. Attempts are also observed
+        in latency, if one is given.
         """
 
-        action = getattr(requests, method.lower(), None)
         self = args[0]
         self.logger.debug(
             "SensuGoHelper.__request",
@@ -145,16 +275,122 @@ class SensuGoHelper:
             data=data,
             auth=auth,
             json_data=json_data,
+            timeout=timeout,
+            priority=priority,
         )
-        return action(
-            url=uri,
-            headers=headers,
-            params=params,
-            data=data,
-            verify=self.state.get("verify_certs", None),
-            auth=auth,
-            json=json_data,
-        )
+        if timeout is None:
+            timeout = self.timeout()
+        retries = 0
+        if method.upper() == "GET":
+            retries = self.state_value("http_retries")
+        aborted = threading.Event()
+        with self._aborts_lock:
+            self._aborts[threading.get_ident()] = aborted
+        try:
+            for attempt in range(retries + 1):
+                if attempt:
+                    delay_ms = self.backoff_ms(attempt)
+                    self.logger.debug(
+                        "SensuGoHelper.__request", retry=attempt, delay_ms=delay_ms
+                    )
+                    if aborted.wait(delay_ms / 1000):
+                        raise requests.ConnectionError("Request aborted")
+                try:
+                    r = self.__send(
+                        aborted,
+                        priority,
+                        latency,
+                        method=method.upper(),
+                        url=uri,
+                        headers=headers,
+                        params=params,
+                        data=data,
+                        verify=self.state.get("verify_certs", None),
+                        auth=auth,
+                        json=json_data,
+                        timeout=timeout,
+                    )
+                except requests.ConnectionError:
+                    if aborted.is_set() or attempt == retries:
+                        raise
+                    continue
+                if r.status_code < 500 or attempt == retries:
+                    return r
+        finally:
+            with self._aborts_lock:
+                del self._aborts[threading.get_ident()]
+
+    def __send(
+        self,
+        aborted: threading.Event,
+        priority: int,
+        latency: Union[LatencyHistogram, None],
+        **kwargs,
+    ) -> requests.Response:
+        """Send one attempt of a request through the limiter and the breaker.
+
+        The time it took is observed in the latency histogram, and an
+        attempt that timed out is counted in timeouts.
+        """
+
+        if not self.rate_limiter.acquire(priority, aborted):
+            raise requests.ConnectionError("Request aborted")
+        self.circuit_breaker.before()
+        if aborted.is_set():
+            self.circuit_breaker.release()
+            raise requests.ConnectionError("Request aborted")
+        start = time.monotonic()
+        try:
+            r = self.session().request(**kwargs)
+        except requests.Timeout:
+            self.timeouts.increment()
+            self.circuit_breaker.failure()
+            raise
+        except requests.ConnectionError:
+            if aborted.is_set():
+                self.circuit_breaker.release()
+            else:
+                self.circuit_breaker.failure()
+            raise
+        except Exception:
+            self.circuit_breaker.release()
+            raise
+        finally:
+            elapsed_ms = (time.monotonic() - start) * 1000
+            self.latency.observe(elapsed_ms)
+            if latency is not None:
+                latency.observe(elapsed_ms)
+        self.rate_limiter.consume(len(r.content or b""))
+        if r.status_code >= 500:
+            self.circuit_breaker.failure()
+        else:
+            self.circuit_breaker.success()
+        return r
+
+    def __authorized_request(self, **kwargs) -> requests.Response:
+        """Send a request with the current access token.
+
+        If the backend rejects the access token with a 401, the token is
+        refreshed and the request is replayed once with the new token.
+        """
+
+        headers = self.auth_headers()
+        r = self.__request(headers=headers, **kwargs)
+        if (
+            r.status_code != 401
+            or self.auth_method == AuthenticationOptions.API_KEY_AUTH
+            or not self.safe_get_auth_value("refresh_token", None)
+        ):
+            return r
+
+        self.logger.debug("SensuGoHelper.__authorized_request", status_code=401)
+        stale_token = headers["Authorization"][len("Bearer ") :]
+        try:
+            self.refresh_access_token(stale_token)
+        except requests.RequestException:
+            self.logger.exception("SensuGoHelper.__authorized_request")
+            return r
+        return self.__request(headers=self.auth_headers(), **kwargs)
 
     def execute_check(self, check_data: dict) -> dict:
         check_name = check_data["check"]
@@ -163,18 +399,23 @@ class SensuGoHelper:
             f"{self.namespace()}/checks/{check_name}/execute"
         )
 
-        r = self.__request(
-            method="post", uri=path, headers=self.auth_headers(), json_data=check_data
-        )
+        r = self.__authorized_request(method="post", uri=path, json_data=check_data)
         r.raise_for_status()
         return r.json()
 
-    def get_event(self, entity: str, check: str) -> dict:
+    def get_event(
+        self, entity: str, check: str, priority: int = Priorities.INTERACTIVE
+    ) -> dict:
         path = (
             f"{self.url()}/api/{self.API_VERSION}/namespaces/"
             f"{self.namespace()}/events/{entity}/{check}"
         )
-        r = self.__request(method="get", uri=path, headers=self.auth_headers())
+        r = self.__authorized_request(
+            method="get",
+            uri=path,
+            priority=priority,
+            latency=self.detail_latency[priority],
+        )
         r.raise_for_status()
         return r.json()
 
@@ -201,9 +442,7 @@ class SensuGoHelper:
             f"{self.url()}/api/{self.API_VERSION}/namespaces/"
             f"{self.namespace()}/silenced"
         )
-        r = self.__request(
-            method="post", uri=path, headers=self.auth_headers(), json_data=silenced
-        )
+        r = self.__authorized_request(method="post", uri=path, json_data=silenced)
         r.raise_for_status()
         return r.status_code
 
@@ -212,7 +451,7 @@ class SensuGoHelper:
             f"{self.url()}/api/{self.API_VERSION}/namespaces/"
             f"{self.namespace()}/silenced/{entry}"
         )
-        r = self.__request(method="delete", uri=path, headers=self.auth_headers())
+        r = self.__authorized_request(method="delete", uri=path)
         r.raise_for_status()
         return r.status_code
 
@@ -224,9 +463,7 @@ class SensuGoHelper:
             f"{self.url()}/api/{self.API_VERSION}/namespaces/"
             f"{self.namespace()}/events/{entity_name}/{check_name}"
         )
-        r = self.__request(
-            method="put", uri=path, headers=self.auth_headers(), json_data=event
-        )
+        r = self.__authorized_request(method="put", uri=path, json_data=event)
         r.raise_for_status()
         return r.status_code
 
@@ -237,11 +474,13 @@ class SensuGoHelper:
         labelSelector: str = "",
         sensu_continue: Union[str, None] = None,
         limit: int = 100,
+        deadline: Union[int, None] = None,
     ) -> Tuple[dict, str]:
         """Higher level API request function.
 
         This function wraps __request and applies various headers
-        and parameters as supplied by the user.
+        and parameters as supplied by the user. The request times out at
+        deadline, if given, see timeout().
         """
 
         params = {
@@ -251,33 +490,20 @@ class SensuGoHelper:
         }
         if sensu_continue:
             params["continue"] = sensu_continue
-        r = self.__request(
+        r = self.__authorized_request(
             method="get",
             uri=(
                 f"{self.url()}/api/{self.API_VERSION}/namespaces/"
                 f"{self.namespace()}/{resource}"
             ),
-            headers=self.auth_headers(),
             params=params,
+            timeout=self.timeout(deadline),
+            priority=Priorities.BACKGROUND,
         )
         continue_key = r.headers.get("Sensu-Continue", None)
         r.raise_for_status()
         return (r.json(), continue_key)
 
-    def multi_resource_fetch_request(self, q: multiprocessing.Queue, **kwargs) -> None:
-        """Multiprocess version of resource_fetch_request.
-
-        This function is meant to be the target of a Process.
-        Make a backend API request to Sensu and put the response on a shared
-        Queue object to be processed by the main application processs.
-        """
-
-        self.logger.debug("SensuGoHelper.multi_resource_fetch_request", **kwargs)
-        try:
-            q.put((None, self.resource_fetch_request(**kwargs)))
-        except requests.exceptions.HTTPError as e:
-            q.put((e, {}))
-
     def get_auth_value(
         self, username: str = None, password: str = None
     ) -> Union[Tuple, HTTPKerberosAuth, None]:
@@ -301,6 +527,7 @@ class SensuGoHelper:
             uri=f"{self.url()}/auth",
             headers=self.BASIC_HEADERS,
             auth=auth,
+            priority=Priorities.AUTH,
         )
         r.raise_for_status()
         return r.json()
@@ -312,7 +539,12 @@ class SensuGoHelper:
         if not auth:
             return
 
-        r = self.__request(method="get", uri=f"{self.url()}/auth/test", auth=auth)
+        r = self.__request(
+            method="get",
+            uri=f"{self.url()}/auth/test",
+            auth=auth,
+            priority=Priorities.AUTH,
+        )
         if r.status_code != 200:
             return False
         return True
@@ -326,6 +558,26 @@ class SensuGoHelper:
             return True
         return False
 
+    def refresh_access_token(self, stale_token: str = None) -> dict:
+        """Refresh the access token, at most once per stale token.
+
+        Concurrent callers that saw the same stale access token share one
+        request to the backend: the first one refreshes, the others wait for
+        it and get the token it received. The new token replaces
+        state["auth"] in one assignment.
+
+        Passing no stale token refreshes the current one.
+        """
+
+        with self._refresh_lock:
+            auth = self.state.get("auth", {})
+            if stale_token is not None and auth.get("access_token") != stale_token:
+                self.logger.debug("SensuGoHelper.refresh_access_token", shared=True)
+                return auth
+            auth = self.refresh()
+            self.state["auth"] = auth
+            return auth
+
     def refresh(self) -> dict:
         """Use the refresh token to get a new access token."""
 
@@ -335,6 +587,7 @@ class SensuGoHelper:
             uri=f"{self.url()}/auth/token",
             headers=self.auth_headers(),
             json_data={"refresh_token": refresh_token},
+            priority=Priorities.AUTH,
         )
         r.raise_for_status()
         return r.json()
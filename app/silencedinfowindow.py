@@ -14,6 +14,7 @@
 
 from app.display import block_on_input
 from app.actionbutton import ActionButton
+from app.records import SilencedRecord
 from app.sensu_go import SensuGoHelper
 from app.datapane import DataPane
 from app.colors import ColorPairs
@@ -25,7 +26,9 @@ import curses
 class SilencedInfoWindow(Window):
     """The window that shows up when you hit enter on a silenced item."""
 
-    def __init__(self, stdscr, item: dict, sensu_go: SensuGoHelper, parent) -> None:
+    def __init__(
+        self, stdscr, item: SilencedRecord, sensu_go: SensuGoHelper, parent
+    ) -> None:
         """Initialize the window."""
         self.parent = parent
         dim = self.get_dimensions()
@@ -77,12 +80,10 @@ class SilencedInfoWindow(Window):
         self.container.win.noutrefresh()
 
         self.data_pane = DataPane(5, self.container.w - 1, 1, 1, parent=self.container)
-        self.data_pane.add_item(("Name:", self.item["metadata"]["name"]))
-        self.data_pane.add_item(("Created By:", self.item["metadata"]["created_by"]))
-        self.data_pane.add_item(("Expires:", self.item["expire_at"]))
-        self.data_pane.add_item(
-            ("Reason:", self.item.get("reason", "(No reason provided)"))
-        )
+        self.data_pane.add_item(("Name:", self.item.name))
+        self.data_pane.add_item(("Created By:", self.item.creator))
+        self.data_pane.add_item(("Expires:", self.item.expire_at))
+        self.data_pane.add_item(("Reason:", self.item.reason))
         self.data_pane.draw()
 
         action_button_clear = ActionButton(
@@ -109,8 +110,6 @@ class SilencedInfoWindow(Window):
                 canceled = True
                 break
         if not canceled:
-            reply = self.sensu_go_helper.delete_silence(self.item["metadata"]["name"])
-            self.logger.debug(
-                "clear_silence", reply=reply, entry=self.item["metadata"]["name"]
-            )
+            reply = self.sensu_go_helper.delete_silence(self.item.name)
+            self.logger.debug("clear_silence", reply=reply, entry=self.item.name)
         curses.halfdelay(1)
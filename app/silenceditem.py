@@ -12,12 +12,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from app.display import header_pre_render
+from app.display import column_layout
+from app.records import SilencedRecord
 from app.colors import ColorPairs
-from datetime import datetime
 from app.window import Window
 from app.utils import Utils
-from typing import Tuple
+from typing import Tuple, Union
 import curses
 
 
@@ -26,7 +26,7 @@ class SilencedItem(Window):
 
     def __init__(
         self,
-        item: dict,
+        item: Union[SilencedRecord, None],
         y: int,
         parent: Window,
         header_infos: Tuple[Tuple[str, int, int]],
@@ -40,19 +40,42 @@ class SilencedItem(Window):
         self.item = item
         self.selected = selected
         self.header_infos = header_infos
+        self.painted = False
         super().__init__(height, width, y, x, parent=parent)
         self.delayed_refresh = True
 
     def draw(self) -> None:
         """Draw the window."""
+
         super().draw()
-        silenced_name = self.item["metadata"]["name"]
-        silenced_by = self.item["metadata"]["created_by"]
-        silenced_reason = self.item.get("reason", "(No reason provided)")
-        silenced_expire_on_resolved = self.item["expire_on_resolve"]  # noqa
-        silenced_begin = self.item["begin"]
-        silenced_expire = self.item["expire"]  # noqa
-        silenced_expire_at = self.item["expire_at"]  # noqa
+        self.paint()
+
+    def update(self, item: Union[SilencedRecord, None], selected: bool = False) -> bool:
+        """Show another silenced entry, or nothing, in the same window.
+
+        Nothing is written when the window already shows this exact record
+        with the same selection state. Returns True if the row was painted.
+        """
+
+        if self.painted and self.item is item and self.selected == selected:
+            return False
+        self.item = item
+        self.selected = selected
+        self.paint()
+        return True
+
+    def paint(self) -> None:
+        """Write the silenced entry into the window."""
+
+        self.painted = True
+        if self.item is None:
+            self.win.bkgd(self.parent.win.getbkgd())
+            self.win.erase()
+            self.win.noutrefresh()
+            return
+
+        silenced_name = self.item.name
+        silenced_by = self.item.creator
 
         name_theme = curses.color_pair(ColorPairs.SILENCED_NAME)
         silenced_by_theme = curses.color_pair(ColorPairs.SILENCED_BY)
@@ -66,47 +89,17 @@ class SilencedItem(Window):
             theme = curses.color_pair(ColorPairs.ITEM_ROW)
 
         self.win.erase()
-        begin_text = datetime.fromtimestamp(silenced_begin).strftime(
-            "%Y-%m-%d %H:%M:%S"
-        )
 
         columns = (
             (silenced_by, silenced_by_theme),
             (silenced_name, name_theme),
-            (silenced_reason, reason_theme),
-            (begin_text, theme),
+            (self.item.reason_line, reason_theme),
+            (self.item.begin_text, theme),
         )
-        curr_x = 0
-
-        # Pre-render
-        available_width = header_pre_render(self.header_infos, self.w - 1)
-
-        # Render
-        add_back_pct = 0
-        for idx, header_info in enumerate(self.header_infos):
-            column_width = header_info[1]
-            column_grow_pct = header_info[2] + add_back_pct
-            add_back_pct = 0
-
-            if column_grow_pct != 0:
-                calculated_width = int(self.w * column_grow_pct) - 1
-                if calculated_width > column_width:
-                    column_width = int(available_width * column_grow_pct) - 1
-                else:
-                    add_back_pct += column_grow_pct
-
-            col_item = columns[idx]
-            col_item_value = col_item[0]
-            col_item_theme = col_item[1]
-            value = Utils.truncate(col_item_value, column_width)
-            self.logger.debug(
-                "SilencedItem.draw",
-                value=value,
-                width=column_width,
-                available_width=available_width,
-            )
+        layout = column_layout(self.header_infos, self.w)
+        for (value, col_item_theme), (curr_x, column_width) in zip(columns, layout):
+            value = Utils.clip(value, column_width)
             self.win.addstr(0, curr_x, value, col_item_theme)
-            curr_x += column_width
 
         self.color(theme)
         self.win.noutrefresh()
@@ -13,6 +13,7 @@
 # limitations under the License.
 
 from app.display import StatusBarBottomHeight
+from app.circuit_breaker import CircuitStates
 from app.colors import ColorPairs
 from app.window import Window
 from app.utils import Utils
@@ -46,13 +47,16 @@ class StatusBarBottom(Window):
     def _s_i(self) -> int:
         return self.state.get("status", {}).get("index", 0)
 
+    def _s_cb(self) -> str:
+        return self.state.get("status", {}).get("circuit", CircuitStates.CLOSED)
+
     def get_text_state(self) -> str:
         """Combine status and fetch text."""
 
         status_text = self.state.get("status_message", "")
         fetch_text = self.state.get("fetch_status", "")
         status_items_text = f"{self._s_vi()}{self._s_ti()}{self._s_fi()}{self._s_i()}"
-        return f"{status_text}{fetch_text}{status_items_text}"
+        return f"{status_text}{fetch_text}{status_items_text}{self._s_cb()}"
 
     def update(self) -> None:
         """If status message has changed then redraw."""
@@ -74,7 +78,11 @@ class StatusBarBottom(Window):
 
         fetch_text = self.state.get("fetch_status", "")
 
-        max_status_len = ((curses.COLS - 1) - len(fetch_text)) + 1
+        circuit_text = ""
+        if self._s_cb() != CircuitStates.CLOSED:
+            circuit_text = f" Circuit {self._s_cb().replace('_', '-').lower()} "
+
+        max_status_len = ((curses.COLS - 1) - len(fetch_text) - len(circuit_text)) + 1
 
         status_theme = self.base_theme
         if self.state.get("status_is_error", False) is True:
@@ -85,6 +93,10 @@ class StatusBarBottom(Window):
 
         fetch_start_x = curses.COLS - len(fetch_text) - 1
 
+        if circuit_text:
+            self.win.addstr(
+                0, fetch_start_x - len(circuit_text), circuit_text, self.error_theme
+            )
         self.win.addstr(0, fetch_start_x, fetch_text, self.fetch_theme)
         self.win.insch(0, curses.COLS - 1, " ", self.fetch_theme)
         self.win.noutrefresh()
@@ -33,10 +33,17 @@ class StatusBarTop(Window):
         self.version_label = f" {VERSION} "
         super().draw()
 
-    def draw(self, updated: datetime.datetime) -> None:
-        """Draw the window."""
+    def draw(self, updated: datetime.datetime, stale: bool = False) -> None:
+        """Draw the window.
 
-        last_updated_text = " Last Updated "
+        When the backend stopped answering, the items are stale and the
+        time of the last update is drawn as a warning.
+        """
+
+        last_updated_text = " Stale Since " if stale else " Last Updated "
+        last_updated_theme = (
+            ColorPairs.RED_ON_BLACK if stale else ColorPairs.GREEN_ON_BLACK
+        )
         last_updated_value = f" {updated.strftime('%Y-%m-%d %H:%M:%S')} "
         lu_size = len(last_updated_text) + len(last_updated_value)
         lu_start = (curses.COLS - 2) - lu_size
@@ -61,7 +68,7 @@ class StatusBarTop(Window):
             0,
             lu_start + len(last_updated_text),
             last_updated_value,
-            curses.color_pair(ColorPairs.GREEN_ON_BLACK),
+            curses.color_pair(last_updated_theme),
         )
 
         if "namespace" in self.state:
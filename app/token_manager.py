@@ -0,0 +1,203 @@
+# Copyright 2022 Two Sigma Open Source, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# <http://www.apache.org/licenses/LICENSE-2.0>
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from app.defaults import AuthenticationOptions, InternalDefaults
+from app.async_sensu_go import AsyncSensuGoHelper
+from app.background import BackgroundLoop
+from concurrent.futures import CancelledError, Future
+from typing import Callable, Union
+from app.utils import Utils
+import functools
+import structlog
+import requests
+
+
+class TokenManager:
+    """Keeps the access token of the Sensu Go backend fresh.
+
+    Authentication and token refreshes run on the BackgroundLoop, so the
+    main loop never waits on the backend or on a Kerberos handshake. The
+    token is refreshed auth_refresh_ahead_s before it expires, through
+    SensuGoHelper.refresh_access_token(), which also serves the requests
+    that hit a 401, so a refresh is never sent twice for one token. A new
+    token replaces state["auth"] in one assignment, so every request path
+    (fetch worker, detail windows, actions) reads either the old token or
+    the new one, never a mix of both.
+
+    Only one authentication or refresh is in flight at a time. The UI is
+    only involved when BASIC credentials have to be typed in, see
+    needs_credentials() and login().
+    """
+
+    def __init__(
+        self,
+        state: dict,
+        async_sensu_go_helper: AsyncSensuGoHelper,
+        background: BackgroundLoop,
+        status: Callable[[str, bool], None] = None,
+    ) -> None:
+        """Initialize TokenManager.
+
+        status(text, is_error) is called on the main loop to report progress.
+        """
+
+        self.state = state
+        self.async_sensu_go_helper = async_sensu_go_helper
+        self.background = background
+        self.status = status
+        self.in_flight = None
+        self.next_check_time = 0
+        self.logger = structlog.get_logger(InternalDefaults.APPNAME)
+
+    @property
+    def auth_method(self) -> str:
+        return self.async_sensu_go_helper.auth_method
+
+    def has_token(self) -> bool:
+        """Returns True if requests to the backend can be authorized."""
+
+        if self.auth_method == AuthenticationOptions.API_KEY_AUTH:
+            return True
+        return "auth" in self.state
+
+    def needs_credentials(self) -> bool:
+        """Returns True if the user has to be prompted for a username/password."""
+
+        return (
+            self.auth_method == AuthenticationOptions.BASIC_AUTH
+            and "auth" not in self.state
+            and self.in_flight is None
+            and Utils.current_milli_time() >= self.next_check_time
+        )
+
+    def refresh_time(self) -> int:
+        """The time, in milliseconds, the access token should be refreshed at."""
+
+        expires_at = self.state["auth"].get("expires_at", 0)
+        return (expires_at - self.state["auth_refresh_ahead_s"]) * 1000
+
+    def next_deadline(self) -> Union[int, None]:
+        """The time, in milliseconds, ensure() has something to do at.
+
+        Returns None when nothing is due until a request completes.
+        """
+
+        if self.auth_method == AuthenticationOptions.API_KEY_AUTH or self.in_flight:
+            return None
+        if "auth" not in self.state:
+            return self.next_check_time
+        return max(self.next_check_time, self.refresh_time())
+
+    def ensure(self) -> None:
+        """Start an authentication or a token refresh when one is due."""
+
+        now = Utils.current_milli_time()
+        if self.in_flight or now < self.next_check_time:
+            return
+        if self.auth_method == AuthenticationOptions.API_KEY_AUTH:
+            self.logger.debug("TokenManager.ensure", skipped=True)
+            self.__status("Authentication skipped...using API_KEY_AUTH")
+            self.next_check_time = float("inf")
+        elif "auth" not in self.state:
+            if self.auth_method == AuthenticationOptions.KERBEROS_AUTH:
+                self.login()
+        elif now >= self.refresh_time():
+            self.logger.debug("TokenManager.ensure", refresh=True)
+            stale_token = self.state["auth"].get("access_token")
+            self.__submit(
+                self.async_sensu_go_helper.refresh_access_token(stale_token),
+                self.__refreshed,
+                None,
+            )
+
+    def login(self, username: str = None, password: str = None) -> None:
+        """Authenticate in the background with the given credentials."""
+
+        self.logger.debug("TokenManager.login", auth_method=self.auth_method)
+        self.__status("Authenticating...")
+        self.__submit(
+            self.__authenticate(username, password), self.__authenticated, username
+        )
+
+    async def __authenticate(
+        self, username: Union[str, None], password: Union[str, None]
+    ) -> Union[dict, None]:
+        """Test the credentials and trade them for a token.
+
+        Returns None if the credentials were rejected.
+        """
+
+        if not await self.async_sensu_go_helper.auth_test(username, password):
+            return None
+        return await self.async_sensu_go_helper.authenticate(username, password)
+
+    def __submit(
+        self, coro, on_done: Callable[[Future, str], None], username: str
+    ) -> None:
+        self.in_flight = self.background.submit(
+            coro, functools.partial(self.__done, on_done, username)
+        )
+
+    def __done(
+        self, on_done: Callable[[Future, str], None], username: str, future: Future
+    ) -> None:
+        """Runs on the main loop once a request has completed."""
+
+        self.in_flight = None
+        try:
+            on_done(future, username)
+        except (Exception, CancelledError) as e:
+            # Malformed replies and cancelled requests are retried like
+            # backend errors, they must not end the main loop.
+            if isinstance(e, requests.RequestException):
+                self.logger.debug("TokenManager.__done", error=str(e))
+            else:
+                self.logger.exception("TokenManager.__done")
+            self.next_check_time = (
+                Utils.current_milli_time() + self.state["auth_retry_interval_ms"]
+            )
+            self.__status(
+                "Error! Unable to authenticate with Sensu Go backend.", is_error=True
+            )
+
+    def __refreshed(self, future: Future, username: None) -> None:
+        try:
+            future.result()
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code == 401:
+                # The refresh token is no longer valid, start over.
+                self.state.pop("auth", None)
+            raise
+        self.logger.debug("TokenManager.__refreshed", refreshed=True)
+
+    def __authenticated(self, future: Future, username: Union[str, None]) -> None:
+        auth = future.result()
+        if auth is None:
+            self.logger.debug("TokenManager.__authenticated", authenticated=False)
+            self.__status("Authentication Rejected!", is_error=True)
+            if self.auth_method != AuthenticationOptions.BASIC_AUTH:
+                # Only typing in other credentials can make BASIC succeed.
+                self.next_check_time = (
+                    Utils.current_milli_time() + self.state["auth_retry_interval_ms"]
+                )
+            return
+        self.state["auth"] = auth
+        if username:
+            self.state["username"] = username
+        self.logger.debug("TokenManager.__authenticated", authenticated=True)
+        self.__status("Logged in!")
+
+    def __status(self, text: str, is_error: bool = False) -> None:
+        if self.status:
+            self.status(text, is_error)
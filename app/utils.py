@@ -39,12 +39,40 @@ class Utils:
         >>> Utils.truncate(s3, 14)
         'some very'
         """
-        flattened = " ".join(text.strip().split())
+        return Utils.clip(Utils.flatten(text), max_width)
 
-        if len(flattened) > max_width:
-            return flattened[0 : max_width - 3] + "..."
+    @staticmethod
+    def flatten(text: str, max_len: int = None) -> str:
+        """Collapse all whitespace, newlines included, to single spaces.
+
+        If max_len is given, the result is cut at max_len characters.
+
+        >>> Utils.flatten("  CRITICAL:\\n  disk   full\\n")
+        'CRITICAL: disk full'
+        >>> Utils.flatten("CRITICAL: disk full", 8)
+        'CRITICAL'
+        """
+        flattened = " ".join(text.split())
+        if max_len is not None:
+            return flattened[:max_len]
+        return flattened
+
+    @staticmethod
+    def clip(text: str, max_width: int) -> str:
+        """Truncate an already flattened string according to max_width.
+
+        >>> Utils.clip("someverylongdescription", 14)
+        'someverylon...'
+        """
+        if len(text) > max_width:
+            return text[0 : max_width - 3] + "..."
         else:
-            return flattened
+            return text
+
+    @staticmethod
+    def format_timestamp(timestamp: int) -> str:
+        """Format an epoch timestamp in local time, the way tables show it."""
+        return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
 
     @staticmethod
     def sensu_dict_get(d: dict, item: str, default: Any) -> Any:
@@ -0,0 +1,60 @@
+# Copyright 2022 Two Sigma Open Source, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# <http://www.apache.org/licenses/LICENSE-2.0>
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+
+
+class Waker:
+    """A pipe that wakes up a selector from another thread or a signal handler.
+
+    wake() writes a byte to the pipe, which makes the read end readable
+    until drain() is called. Both ends are non-blocking, so wake() never
+    blocks, even when nobody has drained the pipe for a while.
+    """
+
+    def __init__(self) -> None:
+        """Initialize Waker."""
+
+        self.read_fd, self.write_fd = os.pipe()
+        os.set_blocking(self.read_fd, False)
+        os.set_blocking(self.write_fd, False)
+
+    def fileno(self) -> int:
+        """The file descriptor to register with a selector."""
+
+        return self.read_fd
+
+    def wake(self) -> None:
+        """Make the read end readable."""
+
+        try:
+            os.write(self.write_fd, b"\0")
+        except (BlockingIOError, OSError):
+            # The pipe is full (already readable) or closed.
+            pass
+
+    def drain(self) -> None:
+        """Read every pending wakeup."""
+
+        try:
+            while os.read(self.read_fd, 4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def close(self) -> None:
+        """Close both ends of the pipe."""
+
+        os.close(self.read_fd)
+        os.close(self.write_fd)
@@ -12,7 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from app.display import handle_terminal_resize
+from app.display import handle_terminal_resize, resize_terminal
 from app.defaults import InternalDefaults
 import structlog
 import curses
@@ -58,6 +58,7 @@ class Window:
     def check_resized(self) -> bool:
         """Convenience function."""
         if self.stdscr:
+            resize_terminal()
             if curses.is_term_resized(self.nrows, self.ncols):
                 handle_terminal_resize(self.stdscr)
                 self.set_max_yx()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+
+# Copyright 2022 Two Sigma Open Source, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# <http://www.apache.org/licenses/LICENSE-2.0>
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Compare list based event filtering against the columnar EventStore.
+
+Usage: scripts/benchmark_event_store.py [SIZE ...]
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.event_store import EventStore  # noqa: E402
+from app.records import EventRecord  # noqa: E402
+import operator  # noqa: E402
+import random  # noqa: E402
+import time  # noqa: E402
+import re  # noqa: E402
+
+HOST_REGEX = re.compile("^web-1")
+CHECK_REGEX = re.compile("disk|load")
+
+
+def synthetic_events(n):
+    random.seed(n)
+    checks = ["disk", "load", "ntp", "memory", "swap", "http", "dns", "cpu"]
+    for i in range(n):
+        status = random.choice((0, 0, 0, 0, 1, 2))
+        yield EventRecord(
+            {
+                "metadata": {"namespace": "default"},
+                "entity": {"metadata": {"name": f"web-{i // len(checks)}"}},
+                "check": {
+                    "metadata": {"name": checks[i % len(checks)]},
+                    "status": status,
+                    "issued": 1654000000 + random.randrange(86400),
+                    "executed": 1654000000,
+                    "last_ok": 1653990000,
+                    "output": f"status {status} from check {i}",
+                },
+            }
+        )
+
+
+def list_path(records):
+    filtered = list(filter(lambda x: x.status != 0, records))
+    filtered = list(filter(lambda x: HOST_REGEX.search(x.entity), filtered))
+    filtered = list(filter(lambda x: CHECK_REGEX.search(x.check), filtered))
+    return sorted(filtered, key=operator.attrgetter("issued"))
+
+
+def store_path(store):
+    indices = store.not_passing()
+    indices = store.select(indices, "entity", HOST_REGEX)
+    indices = store.select(indices, "check", CHECK_REGEX)
+    return store.sort_by(indices, "issued")
+
+
+def best_of(func, arg, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(arg)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main(sizes):
+    print(f"{'events':>10} {'list (ms)':>12} {'store (ms)':>12} {'speedup':>8}")
+    for n in sizes:
+        records = list(synthetic_events(n))
+        store = EventStore()
+        for start in range(0, n, 500):
+            store.append_page(records[start : start + 500])
+        list_time, expected = best_of(list_path, records)
+        store_time, indices = best_of(store_path, store)
+        assert [store.records[i] for i in indices] == expected
+        print(
+            f"{n:>10} {list_time * 1000:>12.1f} {store_time * 1000:>12.1f}"
+            f" {list_time / store_time:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
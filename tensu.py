@@ -16,39 +16,54 @@
 
 from app.display import (
     handle_terminal_resize,
+    note_terminal_resized,
+    resize_terminal,
 )
-from app.defaults import ViewOptions, InternalDefaults, AuthenticationOptions, Filters
+from app.defaults import ViewOptions, InternalDefaults, Filters
 from app.silencedinfowindow import SilencedInfoWindow
 from app.dataviewcontainer import DataViewContainer
+from app.field_selector import compile_field_selector
+from app.circuit_breaker import CircuitOpenError
+from app.debugoverlay import DebugOverlay
+from app.filter_plan import FilterPlan
+from app.diff import Delta
 from datetime import datetime, timezone
 from app.resource_handler import ResourceHandler
+from app.async_sensu_go import AsyncSensuGoHelper
 from app.eventinfowindow import EventInfoWindow
 from app.actionbarbottom import ActionBarBottom
 from app.statusbarbottom import StatusBarBottom
 from app.displaymessage import DisplayMessage
 from app.controlbartop import ControlBarTop
+from app.event_cache import EventCache
+from app.rate_limiter import Priorities
+from app.prefetcher import Prefetcher
+from app.token_manager import TokenManager
 from app.contextbutton import ContextButton
 from app.controlbutton import ControlButton
 from app.statusbartop import StatusBarTop
 from app.loginprompt import LoginPrompt
 from app.sensu_go import SensuGoHelper
 from app.listselect import ListSelect
+from app.background import BackgroundLoop
 from app.inputbox import InputBox
 from app.colors import ColorPairs
+from app.wakeup import Waker
 from app.utils import Utils
 from curses import wrapper
 import traceback
+import selectors
 import structlog
 import requests
 import argparse
 import logging
+import signal
 import curses
 import locale
-import time
+import select
 import json
 import sys
 import os
-import re
 
 
 class Tensu:
@@ -66,9 +81,10 @@ class Tensu:
         self.configure_logger()
         self.state = self.get_state()
         self.filters = []
+        self.field_selector = []
+        self.filter_plan = FilterPlan(self.filters)
         self.authenticated = False
         self.selected_index = 0
-        self.next_auth_check_time = Utils.current_milli_time()
         self.nrows = 0
         self.ncols = 0
 
@@ -91,6 +107,30 @@ class Tensu:
         self.resource_handler = ResourceHandler(self.state, self.sensu_go_helper)
         self.resource_handler.set_callable(self.update_view)
         self.resource_handler.set_fetch_status_callable(self.update_fetch_status)
+        self.pending_moves = []
+        self.input_pending = False
+        self.waker = Waker()
+        self.resource_handler.set_wakeup_callable(self.waker.wake)
+        self.event_cache = EventCache(
+            self.state["event_cache_size"], self.state["event_cache_ttl_ms"]
+        )
+        self.resource_handler.set_event_cache(self.event_cache)
+        self.async_sensu_go_helper = AsyncSensuGoHelper(
+            self.state, self.sensu_go_helper
+        )
+        self.background = BackgroundLoop(self.waker.wake)
+        self.token_manager = TokenManager(
+            self.state, self.async_sensu_go_helper, self.background, self.update_status
+        )
+        self.prefetcher = Prefetcher(
+            self.state,
+            self.async_sensu_go_helper,
+            self.background,
+            self.event_cache,
+            self.sensu_go_helper.detail_latency[Priorities.PREFETCH],
+        )
+        self.selector = selectors.DefaultSelector()
+        self.debug_overlay = None
 
     def configure_logger(self):
         """Configures the application logger
@@ -122,13 +162,28 @@ class Tensu:
         self.logger = structlog.get_logger(InternalDefaults.APPNAME)
 
     def set_filter(self, filter_type, filter_value):
-        """Set an event or silenced filter."""
+        """Set an event or silenced filter.
+
+        Event filters that can be expressed exactly as a Sensu fieldSelector
+        are sent to the backend, the rest are applied client side. When the
+        fieldSelector changes, the current snapshot no longer matches it, so
+        it is thrown away and fetched again.
+        """
 
         for filter in self.filters:
             if filter["type"] == filter_type:
                 filter["value"] = filter_value
-                return
-        self.filters.append({"type": filter_type, "value": filter_value})
+                break
+        else:
+            self.filters.append({"type": filter_type, "value": filter_value})
+
+        field_selector, residual = [], self.filters
+        if self.state["fetch_selector_pushdown"]:
+            field_selector, residual = compile_field_selector(self.filters)
+        if field_selector != self.field_selector:
+            self.field_selector = field_selector
+            self.resource_handler.reset()
+        self.filter_plan = FilterPlan(residual)
 
     def get_filter_value(self, filter_type):
         """Returns the value of a filter."""
@@ -147,6 +202,8 @@ class Tensu:
         self.make_data_view()
         self.make_action_bar_bottom()
         self.make_status_bar_bottom()
+        if self.debug_overlay is not None:
+            self.make_debug_overlay()
         self.resource_handler.force_call()
 
     def max_events_to_fetch(self):
@@ -190,23 +247,36 @@ class Tensu:
         with open(self.state_file, "w") as f:
             f.write(json.dumps(self.state, indent=4))
 
-    def page_index(self, direction):
-        """Moves the event item cursor up or down a full page."""
-
-        # 0 = up, 1 = down
-        data_view_h = self.data_view.container.h - 1
-        if direction == 0:
-            self.move_index(-data_view_h)
-        else:
-            self.move_index(data_view_h)
-
     def move_index(self, direction):
-        """Moves the event item cursor up or down one single item."""
+        """Moves the event item cursor up or down one single item.
+
+        Movements are queued and applied on the next update_view, so a
+        burst of keys is drawn once.
+        """
 
-        self.selected_index += direction
+        self.pending_moves.append(direction)
         self.logger.debug("move_index", direction=direction)
         self.resource_handler.force_call()
 
+    def movement(self, ch):
+        """Returns how far a cursor movement key moves, or None for other keys."""
+
+        if ch == curses.KEY_DOWN or ch == ord("j"):
+            return 1
+        if ch == curses.KEY_UP or ch == ord("k"):
+            return -1
+        data_view_h = self.data_view.container.h - 1
+        if ch == 338:  # PageDown
+            return data_view_h
+        if ch == 339:  # PageUp
+            return -data_view_h
+        return None
+
+    def input_ready(self):
+        """Returns True if more keys can be read without waiting."""
+
+        return bool(select.select([sys.stdin], [], [], 0)[0])
+
     def change_view(self, view_option):
         """Switches view states."""
 
@@ -216,6 +286,7 @@ class Tensu:
         self.data_view.offset = 0
         self.data_view.index = 0
         self.selected_index = 0
+        self.pending_moves = []
         self.resource_handler.reset()
         self.resource_handler.force_call()
 
@@ -224,11 +295,13 @@ class Tensu:
 
         input_box = InputBox(self.s, title, self.get_filter_value(filter))
         self.selected_index = 0
+        self.pending_moves = []
         self.data_view.offset = 0
         self.data_view.index = 0
         input_box.draw()
         regex = input_box.get_input()
         self.set_filter(filter, regex)
+        self.data_view.invalidate()
         self.resource_handler.force_call()
 
     def resize_term(self):
@@ -238,22 +311,43 @@ class Tensu:
         self.make_windows()
 
     def handle_user_input(self):
-        """Handle input from users keyboard."""
+        """Handle input from users keyboard.
+
+        Every key that is already waiting is read. Consecutive cursor
+        movements are queued and drawn once, by the next update_view.
+        Any other key is handled after the queued movements are drawn,
+        so it acts on the item the cursor ended up on.
+        """
+
+        while True:
+            ch = self.s.getch()
+            if ch == -1:
+                return
+            if ch == 410:  # KEY_RESIZE
+                continue
+
+            direction = self.movement(ch)
+            if direction is not None:
+                self.move_index(direction)
+            elif self.pending_moves:
+                curses.ungetch(ch)
+                self.input_pending = True
+                return
+            else:
+                self.handle_key(ch)
+                return
+
+            if not self.input_ready():
+                return
 
-        ch = self.s.getch()
-        if ch == -1 or ch == 410:
-            return
+    def handle_key(self, ch):
+        """Handle a single key that is not a cursor movement."""
 
         self.logger.debug("handle_user_input", key=ch)
 
         if ch == ord("q") or ch == ord("Q"):
             raise KeyboardInterrupt
 
-        if ch == 338:  # PageDown
-            self.page_index(1)
-        if ch == 339:  # PageUp
-            self.page_index(0)
-
         if ch == 27:  # Alt
             nextch = self.s.getch()
             if nextch == 49:  # 1
@@ -266,6 +360,9 @@ class Tensu:
         if ch == 16:  # Ctrl+P
             self.set_namespace()
 
+        if ch == 4:  # Ctrl+D
+            self.toggle_debug_overlay()
+
         if ch == 6:  # Ctrl+F
             if self.view_state_is_events():
                 self.prompt_and_set_filter(
@@ -322,12 +419,6 @@ class Tensu:
             if self.view_state_is_silenced():
                 self.show_silenced_info()
 
-        if ch == curses.KEY_DOWN or ch == ord("j"):
-            self.move_index(1)
-
-        if ch == curses.KEY_UP or ch == ord("k"):
-            self.move_index(-1)
-
     def show_silenced_info(self):
         """Show a modal window with additional information.
 
@@ -347,7 +438,13 @@ class Tensu:
         """
 
         w = EventInfoWindow(
-            self.s, self.data_view.selected_item, self.sensu_go_helper, self.data_view
+            self.s,
+            self.data_view.selected_item,
+            self.sensu_go_helper,
+            self.data_view,
+            self.async_sensu_go_helper,
+            self.background,
+            self.event_cache,
         )
         w.draw()
         w.input_loop()
@@ -478,64 +575,43 @@ class Tensu:
 
         return self.state["view"] == ViewOptions.SILENCED
 
-    def apply_filters(self, items):
-        """Filters events and silenced items from the user supplied regex filters."""
-
-        filtered = items
-        for f in self.filters:
-            r = re.compile(f["value"])
-            if self.view_state_is_events():
-                if f["type"] == Filters.EVENT_HOST_REGEX:
-                    filtered = list(
-                        filter(
-                            lambda x: r.search(x["entity"]["metadata"]["name"]),
-                            filtered,
-                        )
-                    )
-                if f["type"] == Filters.EVENT_CHECK_REGEX:
-                    filtered = list(
-                        filter(
-                            lambda x: r.search(x["check"]["metadata"]["name"]), filtered
-                        )
-                    )
-                if f["type"] == Filters.EVENT_OUTPUT_REGEX:
-                    filtered = list(
-                        filter(lambda x: r.search(x["check"]["output"]), filtered)
-                    )
+    def apply_filters(self, items, delta):
+        """Filters events and silenced items from the user supplied regex filters.
 
-            if self.view_state_is_silenced():
-                if f["type"] == Filters.SILENCED_NAME_REGEX:
-                    filtered = list(
-                        filter(lambda x: r.search(x["metadata"]["name"]), filtered)
-                    )
-                if f["type"] == Filters.SILENCED_CREATOR_REGEX:
-                    filtered = list(
-                        filter(
-                            lambda x: r.search(x["metadata"]["created_by"]), filtered
-                        )
-                    )
-                if f["type"] == Filters.SILENCED_REASON_REGEX:
-                    filtered = list(
-                        filter(
-                            lambda x: r.search(x.get("reason", "(No reason provided)")),
-                            filtered,
-                        )
-                    )
-        return filtered
-
-    def update_view(self, items):
-        """Updates the data view when there are new items."""
+        The compiled FilterPlan caches its result for the current snapshot,
+        and only items that the Delta reports as added or changed are run
+        through the output/silenced regexes again.
+        """
 
+        self.filter_plan.invalidate(delta)
+        store = None
         if self.view_state_is_events():
-            items = self.apply_filters(items)
-        if self.view_state_is_silenced():
-            items = self.apply_filters(items)
+            store = self.resource_handler.store
+        return self.filter_plan.apply(
+            items, store, self.state["view"], self.resource_handler.version
+        )
+
+    def update_view(self, items, delta):
+        """Updates the data view when there are new items.
+
+        delta describes what changed since the last call.
+        """
+
+        items = self.apply_filters(items, delta)
+
+        moves, self.pending_moves = self.pending_moves, []
+        for direction in moves:
+            self.selected_index = self.data_view.scroll(
+                len(items), self.selected_index + direction
+            )
 
         self.selected_index = self.data_view.render_view(
             items,
             self.selected_index,
         )
 
+        self.prefetcher.update(items, self.selected_index + self.data_view.offset)
+
         self.state.setdefault("status", {})["index"] = (
             self.selected_index + 1 + self.data_view.offset
         )
@@ -547,7 +623,9 @@ class Tensu:
 
         self.update_status("")
 
-        self.status_bar_top.draw(self.resource_handler.last_updated)
+        self.status_bar_top.draw(
+            self.resource_handler.last_updated, self.resource_handler.stale
+        )
 
     def fetch_data(self):
         """Fetches data from the backend API.
@@ -560,10 +638,13 @@ class Tensu:
 
             if self.state["view"] == ViewOptions.NOT_PASSING:
                 kwargs["resource"] = "events"
-                kwargs["fieldSelector"] = 'event.check.state != "passing"'
+                kwargs["fieldSelector"] = " && ".join(
+                    ['event.check.state != "passing"'] + self.field_selector
+                )
 
             elif self.state["view"] == ViewOptions.ALL:
                 kwargs["resource"] = "events"
+                kwargs["fieldSelector"] = " && ".join(self.field_selector)
 
             elif self.state["view"] == ViewOptions.SILENCED:
                 kwargs["resource"] = "silenced"
@@ -573,13 +654,33 @@ class Tensu:
 
             self.resource_handler.get_resource_items(**kwargs)
 
-        except requests.RequestException:
+        except CircuitOpenError:
+            self.logger.debug("Sensu GO backend circuit is open.")
+            self.update_status(
+                "Sensu Go backend is unavailable, showing the last known events.",
+                is_error=True,
+            )
+            self.status_bar_top.draw(self.resource_handler.last_updated, stale=True)
+        except requests.Timeout:
+            timeouts = int(self.sensu_go_helper.timeouts)
+            self.logger.warning(
+                "Timed out trying to retrieve events from Sensu GO backend.",
+                timeouts=timeouts,
+            )
+            self.update_status(
+                f"Timed out! Sensu Go backend is not responding ({timeouts} timeouts).",
+                is_error=True,
+            )
+            self.status_bar_top.draw(self.resource_handler.last_updated, stale=True)
+        except (requests.RequestException, KeyError, TypeError, ValueError):
+            # The fetch worker also hands over the errors of malformed pages.
             self.logger.exception(
                 "Error trying to retrieve events from Sensu GO backend."
             )
             self.update_status(
                 "Error! Failed to retrieve events from Sensu Go backend.", is_error=True
             )
+            self.status_bar_top.draw(self.resource_handler.last_updated, stale=True)
 
     def make_status_bar_top(self):
         """Draws the top status bar."""
@@ -599,6 +700,31 @@ class Tensu:
         self.state["fetch_status"] = text
         self.status_bar_bottom.update()
 
+    def make_debug_overlay(self):
+        """Draws the debug overlay over the data view."""
+
+        self.debug_overlay = DebugOverlay(
+            self.sensu_go_helper, self.data_view.container
+        )
+        self.debug_overlay.draw()
+
+    def toggle_debug_overlay(self):
+        """Shows or hides the debug overlay."""
+
+        if self.debug_overlay is None:
+            self.make_debug_overlay()
+        else:
+            self.debug_overlay = None
+            self.data_view.invalidate()
+            self.resource_handler.force_call()
+
+    def update_circuit_status(self):
+        """Shows the state of the circuit breaker in the bottom status bar."""
+
+        circuit_breaker = self.sensu_go_helper.circuit_breaker
+        self.state.setdefault("status", {})["circuit"] = circuit_breaker.state
+        self.status_bar_bottom.update()
+
     def update_status(self, text, is_error=False):
         """Updates the bottom left side status with text."""
 
@@ -609,66 +735,18 @@ class Tensu:
     def check_authentication(self):
         """Checks authentication.
 
-        If there is no access token, or the access token is invalid or expired,
-        and if there is no refresh token, then re-authenticate with user credentials
-        to receive a new access token and refresh token.
-
-        If there is an access token, check if valid, if it expires soon then request
-        a new access token using the refresh token.
+        Authenticating and refreshing the access token ahead of its expiry
+        happen in the background, see TokenManager. The main loop only
+        blocks when BASIC credentials have to be typed in.
         """
-        auth_method = self.sensu_go_helper.auth_method
-
-        if Utils.current_milli_time() >= self.next_auth_check_time:
-            self.logger.debug("check_authentication", auth_method=auth_method)
-            try:
-                if (
-                    "auth" in self.state
-                    and self.sensu_go_helper.is_token_expired()
-                    and auth_method is not AuthenticationOptions.API_KEY_AUTH
-                ):
-                    self.state["auth"] = self.sensu_go_helper.refresh()
-                elif (
-                    "auth" not in self.state
-                    and auth_method is not AuthenticationOptions.API_KEY_AUTH
-                ):
-                    self.update_status("Authenticating...")
-                    username = None
-                    password = None
-                    if auth_method == AuthenticationOptions.BASIC_AUTH:
-                        prompt = LoginPrompt(self.state, self.s)
-                        username, password = prompt.get_credentials()
-
-                    if not self.sensu_go_helper.auth_test(username, password):
-                        self.logger.debug("check_authentication", authenticated=False)
-                        self.update_status("Authentication Rejected!", is_error=True)
-                        self.next_auth_check_time = Utils.current_milli_time()
-                        time.sleep(1)
-                        self.check_authentication()
-
-                    self.state["auth"] = self.sensu_go_helper.authenticate(
-                        username, password
-                    )
-                    if username:
-                        self.state["username"] = username
-                    self.update_status("Logged in!")
-                    time.sleep(1)
-                    self.logger.debug("check_authentication", authenticated=True)
-                else:
-                    self.update_status("Authentication skipped...using API_KEY_AUTH")
-                    self.logger.debug(
-                        "check_authentication",
-                        authenticated=False,
-                        skipped=True,
-                        auth_method=auth_method,
-                    )
-            except requests.RequestException:
-                self.update_status(
-                    "Error! Unable to authenticate with Sensu Go backend.",
-                    is_error=True,
-                )
 
-            finally:
-                self.next_auth_check_time = Utils.current_milli_time() + (1000 * 10)
+        if self.token_manager.needs_credentials():
+            prompt = LoginPrompt(self.state, self.s)
+            username, password = prompt.get_credentials()
+            self.data_view.invalidate()
+            self.token_manager.login(username, password)
+        else:
+            self.token_manager.ensure()
 
     def set_namespace(self):
         """Display a prompt to choose from a list of Sensu namespaces."""
@@ -680,7 +758,11 @@ class Tensu:
             ls = ListSelect(self.state, self.s, namespace_list, "Select Namespace")
             ls.draw()
             ns = ls.select()
-            self.state["namespace"] = ns
+            if ns != self.state.get("namespace"):
+                self.state["namespace"] = ns
+                self.resource_handler.reset()
+                self.resource_handler.force_call()
+            self.data_view.invalidate()
         except requests.RequestException:
             self.update_status(
                 "Error! Failed to retrieve list of namespaces from Sensu Go backend.",
@@ -704,30 +786,77 @@ class Tensu:
     def check_resized(self):
         """Checks if the terminal has been resized."""
 
+        resize_terminal()
         if curses.is_term_resized(self.nrows, self.ncols):
             self.resize_term()
             self.set_max_yx()
 
+    def handle_sigwinch(self, signum, frame):
+        """Remember that the terminal was resized, and wake up the main loop."""
+
+        note_terminal_resized()
+        self.waker.wake()
+
+    def next_deadline(self):
+        """Return the time, in milliseconds, the main loop must wake up by."""
+
+        deadlines = [
+            Utils.current_milli_time() + self.state["main_loop_max_sleep_ms"],
+            self.resource_handler.next_deadline(),
+            self.token_manager.next_deadline(),
+            self.prefetcher.next_deadline(),
+        ]
+        return min(d for d in deadlines if d is not None)
+
+    def wait_for_events(self):
+        """Sleep until there is input, a wakeup or the next deadline.
+
+        Returns True if there is keyboard input to read.
+        """
+
+        timeout = max(0, self.next_deadline() - Utils.current_milli_time()) / 1000
+        has_input, self.input_pending = self.input_pending, False
+        if has_input:
+            timeout = 0
+        for key, _ in self.selector.select(timeout):
+            if key.fileobj is self.waker:
+                self.waker.drain()
+            else:
+                has_input = True
+        return has_input
+
     def main_loop(self):
         """The main control loop.
 
         These are all the functions that run every step of the
         main control loop, and are responsible for drawing the screen
-        and responding to user input.
+        and responding to user input. Each step first sleeps until
+        there is input, the fetch worker has a response, the terminal
+        was resized, or a fetch/auth deadline has passed.
         """
 
-        self.handle_user_input()
+        if self.wait_for_events():
+            self.handle_user_input()
         self.check_resized()
+        self.background.run_callbacks()
         self.check_authentication()
-        self.check_default_namespace()
-        self.fetch_data()
+        if self.token_manager.has_token():
+            self.check_default_namespace()
+            self.fetch_data()
+            self.prefetcher.pump()
+        elif self.pending_moves:
+            # Nothing is fetched without a token, draw the movements anyway.
+            self.update_view(self.resource_handler.items, Delta())
+        self.update_circuit_status()
+        if self.debug_overlay is not None:
+            self.debug_overlay.update()
         curses.doupdate()
-        curses.napms(10)
 
     def main(self, stdscr):
         """Entrypoint of the application.
 
-        The screen is refreshed every 1/10th of a second.
+        The main loop sleeps until a key is pressed, a response arrives,
+        the terminal is resized or the next deadline, see next_deadline().
         Exceptions are bubbled up and caught here.
         """
 
@@ -752,6 +881,11 @@ class Tensu:
 
             # Create initial windows
             self.make_windows()
+
+            # Wake up the main loop on input, responses and resizes
+            self.selector.register(sys.stdin, selectors.EVENT_READ)
+            self.selector.register(self.waker, selectors.EVENT_READ)
+            signal.signal(signal.SIGWINCH, self.handle_sigwinch)
         except Exception:
             curses.endwin()
             print(
@@ -768,6 +902,8 @@ class Tensu:
                 self.main_loop()
             except KeyboardInterrupt:
                 self.resource_handler.kill()
+                self.background.stop()
+                self.async_sensu_go_helper.close()
                 raise
 
             except curses.error:
@@ -776,6 +912,7 @@ class Tensu:
                     f"Error!\nCheck {self.debug_log_file}\nYour terminal dimensions may"
                     " be too small!",
                 ).draw()
+                self.data_view.invalidate()
                 self.logger.exception(
                     "Tensu encountered an error when trying to draw the screen. Your"
                     " terminal dimensions may be too small!"
@@ -788,6 +925,7 @@ class Tensu:
                     " continue.\nYou can report bugs to"
                     f" https://github.com/twosigma/tensu\n\n{traceback.format_exc()}",
                 ).draw()
+                self.data_view.invalidate()
                 self.logger.exception(
                     "Tensu encountered an unhandled exception. You can report bugs to"
                     " https://github.com/twosigma/tensu."
@@ -4,14 +4,38 @@ import doctest
 import unittest
 from app import display
 from app import utils
+from app import field_selector
+from app import metrics
+from app import rate_limiter
 from tests.test_display import DisplayTests  # noqa
 from tests.test_utils import UtilTests  # noqa
 from tests.test_sensu_go import SensuGoHelperTests  # noqa
+from tests.test_fetch_worker import FetchWorkerTests  # noqa
+from tests.test_async_sensu_go import AsyncSensuGoHelperTests  # noqa
+from tests.test_diff import DiffTests  # noqa
+from tests.test_records import RecordTests  # noqa
+from tests.test_event_store import EventStoreTests  # noqa
+from tests.test_filter_plan import FilterPlanTests  # noqa
+from tests.test_field_selector import FieldSelectorTests  # noqa
+from tests.test_wakeup import WakerTests  # noqa
+from tests.test_background import BackgroundLoopTests  # noqa
+from tests.test_token_manager import TokenManagerTests  # noqa
+from tests.test_event_cache import EventCacheTests  # noqa
+from tests.test_eventinfowindow import EventInfoWindowTests  # noqa
+from tests.test_prefetcher import PrefetcherTests  # noqa
+from tests.test_http_pool import AbortableHTTPAdapterTests  # noqa
+from tests.test_resource_handler import ResourceHandlerTests  # noqa
+from tests.test_circuit_breaker import CircuitBreakerTests  # noqa
+from tests.test_rate_limiter import RateLimiterTests  # noqa
+from tests.test_main_loop import MainLoopTests  # noqa
 
 
 def load_tests(loader, tests, ignore):
     tests.addTests(doctest.DocTestSuite(display))
     tests.addTests(doctest.DocTestSuite(utils))
+    tests.addTests(doctest.DocTestSuite(field_selector))
+    tests.addTests(doctest.DocTestSuite(metrics))
+    tests.addTests(doctest.DocTestSuite(rate_limiter))
     return tests
 
 
@@ -0,0 +1,130 @@
+# Copyright 2022 Two Sigma Open Source, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# <http://www.apache.org/licenses/LICENSE-2.0>
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from app.async_sensu_go import AsyncSensuGoHelper
+from app.defaults import AuthenticationOptions
+from app.sensu_go import SensuGoHelper
+from requests import HTTPError
+from requests import Response
+from unittest import mock
+import threading
+import unittest
+import asyncio
+import time
+
+
+class AsyncSensuGoHelperTests(unittest.IsolatedAsyncioTestCase):
+    def fake_api_response(self, content, status_code=200, headers={}):
+        r = Response()
+        r.status_code = status_code
+        r.headers = headers
+        r._content = content.encode()
+        return r
+
+    def make_helper(self, state):
+        helper = AsyncSensuGoHelper(state)
+        self.addCleanup(helper.close)
+        return helper
+
+    @mock.patch("os.environ", new={"SENSU_API_KEY": "ABC123"})
+    def test_auth_method(self):
+        helper = self.make_helper({})
+        assert helper.auth_method == AuthenticationOptions.API_KEY_AUTH
+
+    def test_shares_sensu_go_helper(self):
+        sensu_go_helper = SensuGoHelper({})
+        helper = AsyncSensuGoHelper({}, sensu_go_helper)
+        self.addCleanup(helper.close)
+        assert helper.sensu_go_helper is sensu_go_helper
+
+    @mock.patch(
+        "app.sensu_go.requests.Session.request",
+        return_value=mock.MagicMock(status_code=200),
+    )
+    async def test_refresh(self, m):
+        refresh_token = "i-am-a-refresh-token"
+        helper = self.make_helper(
+            {
+                "url": "https://my-sensu-go:8080",
+                "auth": {"access_token": "token", "refresh_token": refresh_token},
+            }
+        )
+        expected_headers = helper.sensu_go_helper.auth_headers()
+        await helper.refresh()
+        m.assert_called_once_with(
+            method="POST",
+            auth=None,
+            data=None,
+            headers=expected_headers,
+            json={"refresh_token": refresh_token},
+            params=None,
+            url="https://my-sensu-go:8080/auth/token",
+            verify=None,
+            timeout=(3.05, 10),
+        )
+
+    async def test_namespaces_200(self):
+        r = self.fake_api_response('[ {"name": "default"}, {"name": "other"} ]')
+        with mock.patch.object(
+            SensuGoHelper, "_SensuGoHelper__request", return_value=r
+        ):
+            helper = self.make_helper(
+                {"sensu_api_key": "abc123", "url": "https://my-sensu-go:8080/"}
+            )
+            namespaces = await helper.get_namespaces()
+            assert namespaces[0]["name"] == "default"
+
+    async def test_namespaces_400(self):
+        r = self.fake_api_response("[]", status_code=400)
+        with mock.patch.object(
+            SensuGoHelper, "_SensuGoHelper__request", return_value=r
+        ):
+            helper = self.make_helper(
+                {"sensu_api_key": "abc123", "url": "https://my-sensu-go:8080/"}
+            )
+            with self.assertRaises(HTTPError):
+                await helper.get_namespaces()
+
+    async def test_resource_fetch_request(self):
+        r = self.fake_api_response("[]", headers={"Sensu-Continue": "next"})
+        with mock.patch.object(
+            SensuGoHelper, "_SensuGoHelper__request", return_value=r
+        ) as m:
+            helper = self.make_helper(
+                {"sensu_api_key": "abc123", "url": "https://my-sensu-go:8080/"}
+            )
+            result = await helper.resource_fetch_request(resource="silenced")
+            assert result == ([], "next")
+            assert m.call_args.kwargs["uri"].endswith("/silenced")
+
+    async def test_concurrency_is_bounded(self):
+        lock = threading.Lock()
+        active = [0, 0]
+
+        def fake_get_event(entity, check, priority):
+            with lock:
+                active[0] += 1
+                active[1] = max(active)
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+            return {"entity": entity, "check": check}
+
+        helper = self.make_helper({"http_max_concurrency": 2})
+        with mock.patch.object(helper.sensu_go_helper, "get_event", fake_get_event):
+            results = await asyncio.gather(
+                *(helper.get_event(f"host{i}", "check") for i in range(6))
+            )
+        assert [r["entity"] for r in results] == [f"host{i}" for i in range(6)]
+        assert active[1] == 2
@@ -0,0 +1,55 @@
+# Copyright 2022 Two Sigma Open Source, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# <http://www.apache.org/licenses/LICENSE-2.0>
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from app.background import BackgroundLoop
+import threading
+import unittest
+import asyncio
+
+
+class BackgroundLoopTests(unittest.TestCase):
+    def setUp(self):
+        self.notified = threading.Event()
+        self.background = BackgroundLoop(self.notified.set)
+        self.addCleanup(self.background.stop)
+
+    def test_callbacks_run_on_the_calling_thread(self):
+        async def work():
+            await asyncio.sleep(0.01)
+            return threading.current_thread()
+
+        done = []
+        future = self.background.submit(work(), done.append)
+        assert future.result(5) is self.background
+        assert self.notified.wait(5)
+        assert self.background.run_callbacks() == 1
+        assert done == [future]
+        assert self.background.run_callbacks() == 0
+
+    def test_exceptions_are_kept_in_the_future(self):
+        async def fail():
+            raise ValueError("nope")
+
+        done = []
+        self.background.submit(fail(), done.append)
+        assert self.notified.wait(5)
+        self.background.run_callbacks()
+        with self.assertRaises(ValueError):
+            done[0].result()
+
+    def test_stop_cancels_pending_work(self):
+        future = self.background.submit(asyncio.sleep(60))
+        self.background.stop()
+        assert not self.background.is_alive()
+        assert future.cancelled()
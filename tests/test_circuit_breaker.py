@@ -0,0 +1,77 @@
+# Copyright 2022 Two Sigma Open Source, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# <http://www.apache.org/licenses/LICENSE-2.0>
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from app.circuit_breaker import CircuitBreaker, CircuitOpenError, CircuitStates
+from requests import RequestException
+from app.utils import Utils
+from unittest import mock
+import unittest
+
+
+class CircuitBreakerTests(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(Utils, "current_milli_time", return_value=1000)
+        self.now = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker(3, 500)
+
+    def test_opens_after_consecutive_failures(self):
+        for _ in range(2):
+            self.breaker.before()
+            self.breaker.failure()
+        self.breaker.before()
+        self.breaker.success()
+        for _ in range(3):
+            assert self.breaker.state == CircuitStates.CLOSED
+            self.breaker.before()
+            self.breaker.failure()
+        assert self.breaker.state == CircuitStates.OPEN
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before()
+
+    def test_open_error_is_a_request_exception(self):
+        assert issubclass(CircuitOpenError, RequestException)
+
+    def test_half_open_lets_one_probe_through(self):
+        for _ in range(3):
+            self.breaker.failure()
+        self.now.return_value = 1500
+        self.breaker.before()
+        assert self.breaker.state == CircuitStates.HALF_OPEN
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before()
+        self.breaker.success()
+        assert self.breaker.state == CircuitStates.CLOSED
+        self.breaker.before()
+
+    def test_failed_probe_opens_again(self):
+        for _ in range(3):
+            self.breaker.failure()
+        self.now.return_value = 1500
+        self.breaker.before()
+        self.breaker.failure()
+        assert self.breaker.state == CircuitStates.OPEN
+        assert self.breaker.retry_time() == 2000
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before()
+
+    def test_released_probe_can_be_retried(self):
+        for _ in range(3):
+            self.breaker.failure()
+        self.now.return_value = 1500
+        self.breaker.before()
+        self.breaker.release()
+        assert self.breaker.state == CircuitStates.HALF_OPEN
+        self.breaker.before()
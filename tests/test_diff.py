@@ -0,0 +1,62 @@
+# Copyright 2022 Two Sigma Open Source, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# <http://www.apache.org/licenses/LICENSE-2.0>
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from app.diff import Delta, merge
+import unittest
+
+
+def silence(name, reason="maintenance"):
+    return {"metadata": {"name": name}, "reason": reason}
+
+
+def silenced_key(silenced):
+    return silenced["metadata"]["name"]
+
+
+class DiffTests(unittest.TestCase):
+    def test_merge_from_empty(self):
+        fresh = [silence("a:*"), silence("b:*")]
+        items, index, delta = merge({}, fresh, silenced_key)
+        assert items == fresh
+        assert delta.added == ["a:*", "b:*"]
+        assert not delta.removed and not delta.changed
+        assert index["b:*"] is fresh[1]
+
+    def test_merge_keeps_unchanged_objects(self):
+        _, index, _ = merge({}, [silence("a:*"), silence("b:*")], silenced_key)
+        old_a = index["a:*"]
+        items, index, delta = merge(
+            index, [silence("a:*"), silence("b:*", "oops")], silenced_key
+        )
+        assert items[0] is old_a
+        assert delta.changed == ["b:*"]
+        assert len(delta) == 1
+
+    def test_merge_detects_removed(self):
+        _, index, _ = merge({}, [silence("a:*"), silence("b:*")], silenced_key)
+        items, index, delta = merge(index, [silence("b:*")], silenced_key)
+        assert delta.removed == ["a:*"]
+        assert delta.stale_keys() == ["a:*"]
+        assert list(index) == ["b:*"]
+
+    def test_no_changes_is_falsy(self):
+        _, index, _ = merge({}, [silence("a:*")], silenced_key)
+        _, _, delta = merge(index, [silence("a:*")], silenced_key)
+        assert not delta
+
+    def test_combine(self):
+        combined = Delta(added=["a"]).combine(Delta(changed=["b"]))
+        assert combined.added == ["a"] and combined.changed == ["b"]
+        assert Delta(added=["a"]).combine(Delta(reset=True)).reset
+        assert Delta(reset=True).combine(Delta(added=["a"])).reset
@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from app.window import Window
 from unittest import mock
 from app import display
 import unittest
@@ -40,6 +41,21 @@ class DisplayTests(unittest.TestCase):
         val = display.header_pre_render(headers, 80 - 1)
         assert val == 59
 
+    def test_column_layout(self):
+        layout = display.column_layout(display.EventHeaders, 120)
+        assert layout == ((0, 8), (8, 30), (38, 32), (70, 29), (99, 19))
+        assert display.column_layout(display.EventHeaders, 120) is layout
+        layout = display.column_layout(display.SilencedHeaders, 120)
+        assert layout == ((0, 20), (20, 55), (75, 23), (98, 19))
+
+    @mock.patch("structlog.get_logger", mock.MagicMock())
+    def test_column_layout_cleared_on_resize(self):
+        display.column_layout(display.EventHeaders, 80)
+        assert display.column_layout.cache_info().currsize > 0
+        with mock.patch("app.display.curses", mock.MagicMock()):
+            display.handle_terminal_resize(mock.MagicMock())
+        assert display.column_layout.cache_info().currsize == 0
+
     @mock.patch("structlog.get_logger", mock.MagicMock())
     def test_handle_terminal_resize(self):
         stdscr = mock.MagicMock()
@@ -56,6 +72,27 @@ class DisplayTests(unittest.TestCase):
 
         test_it()
 
+    @mock.patch("app.display.os.get_terminal_size", return_value=(120, 40))
+    @mock.patch("app.display.curses")
+    def test_resize_terminal_after_sigwinch(self, curses, get_terminal_size):
+        display.resize_terminal()
+        curses.resizeterm.assert_not_called()
+        display.note_terminal_resized()
+        display.resize_terminal()
+        curses.resizeterm.assert_called_once_with(40, 120)
+        display.resize_terminal()
+        assert curses.resizeterm.call_count == 1
+
+    @mock.patch("app.window.resize_terminal")
+    @mock.patch("app.window.curses.is_term_resized", return_value=False)
+    def test_modal_loops_see_resizes(self, is_term_resized, resize_terminal):
+        window = Window.__new__(Window)
+        window.stdscr = mock.Mock()
+        window.nrows, window.ncols = 24, 80
+        assert not window.check_resized()
+        resize_terminal.assert_called_once_with()
+        is_term_resized.assert_called_once_with(24, 80)
+
     def test_block_on_input(self):
         curses = mock.MagicMock()
         stdscr = mock.MagicMock()
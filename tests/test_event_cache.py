@@ -0,0 +1,64 @@
+# Copyright 2022 Two Sigma Open Source, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# <http://www.apache.org/licenses/LICENSE-2.0>
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from app.event_cache import EventCache
+from unittest import mock
+import unittest
+
+
+class EventCacheTests(unittest.TestCase):
+    def test_get_and_put(self):
+        cache = EventCache(10, 1000)
+        assert cache.get("a") is None
+        event = {"n": 1}
+        cache.put("a", event)
+        assert cache.get("a") is event
+        assert len(cache) == 1
+
+    def test_least_recently_used_is_evicted(self):
+        cache = EventCache(2, 1000)
+        cache.put_many([("a", 1), ("b", 2)])
+        assert cache.get("a") == 1
+        cache.put("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+    def test_expired_events_are_not_served(self):
+        cache = EventCache(10, 1000)
+        with mock.patch("app.utils.Utils.current_milli_time", return_value=0):
+            cache.put("a", 1)
+        with mock.patch("app.utils.Utils.current_milli_time", return_value=999):
+            assert cache.get("a") == 1
+        with mock.patch("app.utils.Utils.current_milli_time", return_value=1000):
+            assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_put_renews(self):
+        cache = EventCache(10, 1000)
+        with mock.patch("app.utils.Utils.current_milli_time", return_value=0):
+            cache.put("a", 1)
+        with mock.patch("app.utils.Utils.current_milli_time", return_value=900):
+            cache.put("a", 2)
+        with mock.patch("app.utils.Utils.current_milli_time", return_value=1500):
+            assert cache.get("a") == 2
+
+    def test_max_age(self):
+        cache = EventCache(10, 1000)
+        with mock.patch("app.utils.Utils.current_milli_time", return_value=0):
+            cache.put("a", 1)
+        with mock.patch("app.utils.Utils.current_milli_time", return_value=500):
+            assert cache.get("a", max_age_ms=600) == 1
+            assert cache.get("a", max_age_ms=500) is None
+            assert cache.get("a") == 1
@@ -0,0 +1,81 @@
+# Copyright 2022 Two Sigma Open Source, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# <http://www.apache.org/licenses/LICENSE-2.0>
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from app.event_store import EventStore, Selection, StringTable
+from tests.test_records import fake_event
+from app.records import EventRecord
+import unittest
+import re
+
+
+def make_store(tables=None):
+    store = EventStore(tables)
+    store.append_page(
+        [
+            EventRecord(fake_event("web1", "disk", 2, "DISK CRITICAL")),
+            EventRecord(fake_event("web1", "load", 0, "LOAD OK")),
+        ]
+    )
+    store.append_page(
+        [
+            EventRecord(fake_event("db1", "disk", 1, "DISK WARNING")),
+            EventRecord(fake_event("db2", "ntp", 300, "NTP UNKNOWN")),
+        ]
+    )
+    return store
+
+
+class EventStoreTests(unittest.TestCase):
+    def test_append_page(self):
+        store = make_store()
+        assert len(store) == 4
+        assert list(store.status) == [2, 0, 1, 255]
+        assert store.tables["entity"].strings[store.entity[2]] == "db1"
+
+    def test_not_passing(self):
+        assert make_store().not_passing() == [0, 2, 3]
+
+    def test_select(self):
+        store = make_store()
+        assert store.select(store.all(), "entity", re.compile("^web")) == [0, 1]
+        assert store.select([1, 2, 3], "check", re.compile("disk")) == [2]
+        assert store.select_output([0, 1, 2], re.compile("CRIT|WARN")) == [0, 2]
+
+    def test_sort_and_count(self):
+        store = make_store()
+        assert store.sort_by([0, 1, 2, 3], "status") == [1, 2, 0, 3]
+        assert store.count_by_status() == {0: 1, 1: 1, 2: 1, 255: 1}
+        assert store.count_by_status([0, 2]) == {1: 1, 2: 1}
+
+    def test_shared_string_table(self):
+        tables = {}
+        first = make_store(tables)
+        second = make_store(tables)
+        assert list(first.entity) == list(second.entity)
+        assert len(tables["entity"]) == 3
+        assert len(tables["check"]) == 3
+
+    def test_string_table(self):
+        strings = StringTable()
+        assert strings.intern("web1") == 0
+        assert strings.intern("db1") == 1
+        assert strings.intern("web1") == 0
+        assert len(strings) == 2
+
+    def test_selection(self):
+        store = make_store()
+        selection = Selection(store.records, [0, 2, 3])
+        assert len(selection) == 3
+        assert selection[1].entity == "db1"
+        assert [r.entity for r in selection[1:5]] == ["db1", "db2"]
@@ -0,0 +1,144 @@
+# Copyright 2022 Two Sigma Open Source, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# <http://www.apache.org/licenses/LICENSE-2.0>
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from app.eventinfowindow import EventInfoWindow
+from concurrent.futures import Future
+from tests.test_records import fake_event
+from app.background import BackgroundLoop
+from datetime import datetime, timedelta
+from app.event_cache import EventCache
+from app.records import EventRecord
+from unittest import mock
+import unittest
+import copy
+
+
+def done(result):
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+class EventInfoWindowTests(unittest.TestCase):
+    def setUp(self):
+        self.event = fake_event()
+        self.window = EventInfoWindow.__new__(EventInfoWindow)
+        self.window.logger = mock.Mock()
+        self.window.event_cache = EventCache(100, 60000)
+        self.window.in_flight = None
+        self.window.next_update_time = datetime.utcnow() + timedelta(seconds=3)
+        self.window.item = self.event
+        self.window.record = EventRecord(self.event)
+        self.window.draw_item = mock.Mock()
+
+    def test_same_execution_is_not_repainted(self):
+        self.window.receive(done(copy.deepcopy(self.event)))
+        self.window.draw_item.assert_not_called()
+
+    def test_silencing_change_is_repainted(self):
+        silenced = copy.deepcopy(self.event)
+        silenced["check"]["is_silenced"] = True
+        self.assertFalse(EventInfoWindow.is_unchanged(self.event, silenced))
+        self.window.receive(done(silenced))
+        self.window.draw_item.assert_called_once_with()
+        self.assertTrue(self.window.record.is_silenced)
+
+    def test_status_change_is_repainted(self):
+        resolved = copy.deepcopy(self.event)
+        resolved["check"]["status"] = 0
+        self.window.receive(done(resolved))
+        self.window.draw_item.assert_called_once_with()
+        self.assertEqual(self.window.record.status, 0)
+
+    def test_record_is_refreshed_without_repaint(self):
+        same = copy.deepcopy(self.event)
+        same["check"]["output"] = "DISK CRITICAL - 99%"
+        self.window.receive(done(same))
+        self.window.draw_item.assert_not_called()
+        self.assertIs(self.window.item, same)
+        self.assertEqual(self.window.record.output, "DISK CRITICAL - 99%")
+
+    def test_malformed_event_keeps_last_event(self):
+        malformed = copy.deepcopy(self.event)
+        del malformed["check"]["status"]
+        self.window.receive(done(malformed))
+        self.window.draw_item.assert_not_called()
+        self.assertIs(self.window.item, self.event)
+        self.assertGreater(self.window.next_update_time, datetime.utcnow())
+
+    def test_cancelled_request_keeps_last_event(self):
+        future = Future()
+        future.cancel()
+        self.window.in_flight = future
+        self.window.receive(future)
+        self.window.draw_item.assert_not_called()
+        self.assertIs(self.window.item, self.event)
+        self.assertIsNone(self.window.in_flight)
+
+    def test_redraw_after_action(self):
+        self.window.draw = mock.Mock()
+        self.window.item = copy.deepcopy(self.event)
+        self.window.item["check"]["status"] = 0
+        self.window.redraw()
+        self.window.draw.assert_called_once_with()
+        self.window.draw_item.assert_called_once_with()
+        self.assertEqual(self.window.record.status, 0)
+
+    def test_update_item_polls_only_its_own_request(self):
+        self.window.background = mock.Mock()
+        item = copy.deepcopy(self.event)
+        item["check"]["status"] = 0
+        self.window.in_flight = done(item)
+        self.window.update_item()
+        self.window.background.run_callbacks.assert_not_called()
+        self.assertIsNone(self.window.in_flight)
+        self.assertIs(self.window.item, item)
+
+    def test_update_item_waits_for_pending_request(self):
+        self.window.background = mock.Mock()
+        self.window.in_flight = Future()
+        self.window.update_item()
+        self.window.draw_item.assert_not_called()
+        self.assertIsNotNone(self.window.in_flight)
+
+    def test_retrieved_event_is_cached_without_polling(self):
+        background = BackgroundLoop()
+        self.addCleanup(background.stop)
+        item = copy.deepcopy(self.event)
+        item["check"]["status"] = 0
+        self.window.background = background
+        self.window.async_sensu_go_helper = mock.Mock()
+        self.window.async_sensu_go_helper.get_event = mock.AsyncMock(return_value=item)
+        self.window.retrieve()
+        # The window was closed, nobody polls the request anymore.
+        self.window.in_flight.result(timeout=5)
+        key = self.window.record.key
+        self.assertIs(self.window.event_cache.get(key), item)
+        self.assertEqual(background.run_callbacks(), 0)
+
+    def test_malformed_event_is_not_cached(self):
+        background = BackgroundLoop()
+        self.addCleanup(background.stop)
+        malformed = copy.deepcopy(self.event)
+        del malformed["check"]["output"]
+        self.window.background = background
+        self.window.async_sensu_go_helper = mock.Mock()
+        self.window.async_sensu_go_helper.get_event = mock.AsyncMock(
+            return_value=malformed
+        )
+        self.window.retrieve()
+        with self.assertRaises(KeyError):
+            self.window.in_flight.result(timeout=5)
+        self.assertIsNone(self.window.event_cache.get(self.window.record.key))
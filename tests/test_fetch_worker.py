@@ -0,0 +1,183 @@
+# Copyright 2022 Two Sigma Open Source, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# <http://www.apache.org/licenses/LICENSE-2.0>
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from app.fetch_worker import FetchWorker, FetchJob
+from tests.test_records import fake_event, fake_silenced
+from app.event_cache import EventCache
+from app.records import SilencedRecord
+from app.sensu_go import SensuGoHelper
+from app.wakeup import Waker
+from requests import ConnectionError
+from unittest import mock
+import threading
+import unittest
+import select
+import queue
+import time
+
+
+class FetchWorkerTests(unittest.TestCase):
+    def start_worker(self, side_effect, notify=None):
+        patcher = mock.patch.object(
+            SensuGoHelper, "resource_fetch_request", side_effect=side_effect
+        )
+        self.fetch = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch(
+            "app.fetch_worker.ingest", side_effect=lambda resource, items: items
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        worker = FetchWorker(SensuGoHelper({}), notify)
+        worker.start()
+
+        def stop():
+            worker.stop()
+            worker.join(5)
+
+        self.addCleanup(stop)
+        return worker
+
+    def test_fetch_page_ingests_records(self):
+        silenced = {
+            "metadata": {"name": "entity:host1:*", "created_by": "me"},
+            "begin": 0,
+            "expire": -1,
+            "expire_at": 0,
+            "expire_on_resolve": False,
+        }
+        with mock.patch.object(
+            SensuGoHelper, "resource_fetch_request", return_value=([silenced], None)
+        ):
+            worker = FetchWorker(SensuGoHelper({}))
+            err, (records, sensu_continue) = worker.fetch_page(resource="silenced")
+        assert err is None and sensu_continue is None
+        assert isinstance(records[0], SilencedRecord)
+        assert records[0].name == "entity:host1:*"
+
+    def test_fetch_page_caches_full_events(self):
+        event = fake_event()
+        cache = EventCache(10, 60000)
+        pages = [([event], None), ([fake_silenced()], None)]
+        with mock.patch.object(
+            SensuGoHelper, "resource_fetch_request", side_effect=pages
+        ):
+            worker = FetchWorker(SensuGoHelper({}), event_cache=cache)
+            err, (records, _) = worker.fetch_page(resource="events")
+            worker.fetch_page(resource="silenced")
+        assert cache.get(records[0].key) is event
+        assert len(cache) == 1
+
+    def test_worker_serves_many_jobs(self):
+        pages = [([{"n": 1}], "next"), ([{"n": 2}], None)]
+        worker = self.start_worker(pages)
+        q = queue.Queue()
+        worker.submit(FetchJob(q, limit=1))
+        worker.submit(FetchJob(q, limit=1, sensu_continue="next"))
+        assert q.get(timeout=5) == (None, pages[0])
+        assert q.get(timeout=5) == (None, pages[1])
+        assert self.fetch.call_count == 2
+
+    def test_worker_notifies_after_each_response(self):
+        pages = [([1], "a"), ([2], None)]
+        waker = Waker()
+        self.addCleanup(waker.close)
+        worker = self.start_worker(pages, waker.wake)
+        q = queue.Queue()
+        worker.submit(FetchJob(q, follow_continue=True))
+        for page in pages:
+            assert select.select([waker], [], [], 5)[0] == [waker]
+            waker.drain()
+            assert q.get(timeout=5) == (None, page)
+
+    def test_worker_follows_continue_tokens(self):
+        pages = [([1], "a"), ([2], "b"), ([3], None)]
+        worker = self.start_worker(pages)
+        q = queue.Queue(maxsize=1)
+        worker.submit(FetchJob(q, follow_continue=True, limit=1))
+        assert [q.get(timeout=5)[1] for _ in pages] == pages
+        assert self.fetch.call_args_list[2] == mock.call(limit=1, sensu_continue="b")
+
+    def test_cancelled_job_stops_fetching(self):
+        pages = [([1], "a"), ([2], "b"), ([3], None)]
+        worker = self.start_worker(pages)
+        q = queue.Queue(maxsize=1)
+        job = FetchJob(q, follow_continue=True)
+        worker.submit(job)
+        done = queue.Queue()
+        # The second page is blocked waiting for room on the full Queue.
+        while self.fetch.call_count < 2:
+            time.sleep(0.01)
+        job.cancel()
+        worker.submit(FetchJob(done))
+        assert done.get(timeout=5) == (None, pages[2])
+        assert q.get_nowait() == (None, pages[0])
+        assert self.fetch.call_count == 3
+
+    def test_worker_survives_request_errors(self):
+        error = ConnectionError("boom")
+        worker = self.start_worker([error, ([], None)])
+        q = queue.Queue()
+        worker.submit(FetchJob(q, follow_continue=True))
+        worker.submit(FetchJob(q))
+        assert q.get(timeout=5) == (error, {})
+        assert q.get(timeout=5) == (None, ([], None))
+
+    def test_worker_survives_malformed_responses(self):
+        event = fake_event()
+        del event["check"]["output"]
+        pages = [([event], None), ([fake_event()], None)]
+        with mock.patch.object(
+            SensuGoHelper, "resource_fetch_request", side_effect=pages
+        ):
+            worker = FetchWorker(SensuGoHelper({}))
+            worker.start()
+            self.addCleanup(worker.join, 5)
+            self.addCleanup(worker.stop)
+            q = queue.Queue()
+            worker.submit(FetchJob(q, resource="events"))
+            worker.submit(FetchJob(q, resource="events"))
+            err, result = q.get(timeout=5)
+            assert isinstance(err, KeyError) and result == {}
+            err, (records, _) = q.get(timeout=5)
+        assert err is None and records[0].key == ("default", "host1", "disk")
+
+    def test_abort_in_flight_request(self):
+        aborted = threading.Event()
+
+        def slow_then_fast(**kwargs):
+            if kwargs.get("limit") == 1:
+                # Blocks like a slow backend, until the socket is aborted.
+                aborted.wait(10)
+                raise ConnectionError("aborted")
+            return ([2], None)
+
+        worker = self.start_worker(slow_then_fast)
+        slow, done = queue.Queue(), queue.Queue()
+        job = FetchJob(slow, generation=1, limit=1)
+        worker.submit(job)
+        while self.fetch.call_count < 1:
+            time.sleep(0.01)
+        with mock.patch.object(
+            SensuGoHelper, "abort", side_effect=lambda thread: aborted.set() or True
+        ) as abort:
+            start = time.monotonic()
+            worker.abort(job)
+            worker.submit(FetchJob(done, generation=2))
+            assert done.get(timeout=5) == (None, ([2], None))
+        assert time.monotonic() - start < 1
+        abort.assert_called_once_with(worker)
+        assert job.cancelled.is_set()
+        # The page of the abandoned generation was dropped.
+        assert slow.empty()
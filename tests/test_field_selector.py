@@ -0,0 +1,60 @@
+# Copyright 2022 Two Sigma Open Source, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# <http://www.apache.org/licenses/LICENSE-2.0>
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from app.field_selector import compile_field_selector, regex_to_selector
+from app.defaults import Filters
+import unittest
+
+FIELD = "event.entity.name"
+
+
+class FieldSelectorTests(unittest.TestCase):
+    def test_exact_translations(self):
+        assert regex_to_selector(FIELD, "web-1") == f'{FIELD} matches "web-1"'
+        assert regex_to_selector(FIELD, r"^web\.1$") == f'{FIELD} == "web.1"'
+        assert regex_to_selector(FIELD, "^(?:a|b)$") == f"{FIELD} in [a,b]"
+
+    def test_inexact_patterns_are_not_translated(self):
+        for pattern in [
+            "web.1",
+            "^web",
+            "web$",
+            "^a|b$",
+            "^(a|b)c$",
+            "^(a|(b))$",
+            r"^a\$",
+            r"\d+",
+            "web 1",
+            'web"1',
+            "^$",
+        ]:
+            assert regex_to_selector(FIELD, pattern) is None, pattern
+
+    def test_compile_field_selector(self):
+        filters = [
+            {"type": Filters.EVENT_HOST_REGEX, "value": "web"},
+            {"type": Filters.EVENT_CHECK_REGEX, "value": "^(disk|load)$"},
+            {"type": Filters.EVENT_OUTPUT_REGEX, "value": "CRITICAL"},
+            {"type": Filters.SILENCED_NAME_REGEX, "value": "web"},
+        ]
+        terms, residual = compile_field_selector(filters)
+        assert terms == [
+            'event.entity.name matches "web"',
+            "event.check.name in [disk,load]",
+        ]
+        assert residual == filters[2:]
+
+    def test_empty_filters_are_residual(self):
+        filters = [{"type": Filters.EVENT_HOST_REGEX, "value": ""}]
+        assert compile_field_selector(filters) == ([], filters)
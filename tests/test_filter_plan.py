@@ -0,0 +1,94 @@
+# Copyright 2022 Two Sigma Open Source, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# <http://www.apache.org/licenses/LICENSE-2.0>
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from app.records import EventRecord, SilencedRecord
+from tests.test_records import fake_event, fake_silenced
+from tests.test_event_store import make_store
+from app.defaults import Filters, ViewOptions
+from app.filter_plan import FilterPlan
+from app.event_store import EventStore
+from app.diff import Delta
+from unittest import mock
+import unittest
+
+
+def plan(**values):
+    return FilterPlan([{"type": t, "value": v} for t, v in values.items()])
+
+
+class FilterPlanTests(unittest.TestCase):
+    def test_no_filters(self):
+        store = make_store()
+        result = plan().apply(store.records, store, ViewOptions.ALL, 1)
+        assert list(result) == store.records
+        result = plan().apply(store.records, store, ViewOptions.NOT_PASSING, 1)
+        assert [r.entity for r in result] == ["web1", "db1", "db2"]
+
+    def test_event_filters(self):
+        store = make_store()
+        p = plan(
+            **{
+                Filters.EVENT_HOST_REGEX: "1$",
+                Filters.EVENT_CHECK_REGEX: "disk|load",
+                Filters.EVENT_OUTPUT_REGEX: "",
+            }
+        )
+        assert p.output is None
+        assert p.select_events(store, ViewOptions.ALL) == [0, 1, 2]
+        assert p.select_events(store, ViewOptions.NOT_PASSING) == [0, 2]
+
+    def test_output_filter(self):
+        store = make_store()
+        p = plan(**{Filters.EVENT_OUTPUT_REGEX: "CRIT|WARN"})
+        assert p.select_events(store, ViewOptions.ALL) == [0, 2]
+        assert p.matches[("default", "web1", "load")] is False
+
+    def test_name_masks_grow_with_string_table(self):
+        tables = {}
+        p = plan(**{Filters.EVENT_HOST_REGEX: "^db"})
+        assert p.select_events(make_store(tables), ViewOptions.ALL) == [2, 3]
+        store = EventStore(tables)
+        store.append_page([EventRecord(fake_event("db3")), *make_store().records])
+        assert p.select_events(store, ViewOptions.ALL) == [0, 3, 4]
+        assert list(p.name_masks[0]) == [0, 1, 1, 1]
+
+    def test_result_cached_by_version(self):
+        store = make_store()
+        p = plan(**{Filters.EVENT_HOST_REGEX: "web"})
+        with mock.patch.object(
+            FilterPlan, "select_events", wraps=p.select_events
+        ) as select_events:
+            first = p.apply(store.records, store, ViewOptions.ALL, 1)
+            assert p.apply(store.records, store, ViewOptions.ALL, 1) is first
+            assert select_events.call_count == 1
+            p.apply(store.records, store, ViewOptions.ALL, 2)
+            p.apply(store.records, store, ViewOptions.NOT_PASSING, 2)
+            assert select_events.call_count == 3
+
+    def test_silenced_filters(self):
+        items = [
+            SilencedRecord(fake_silenced("entity:web1:*", reason="maintenance")),
+            SilencedRecord(fake_silenced("entity:db1:*")),
+        ]
+        p = plan(**{Filters.SILENCED_REASON_REGEX: "maint"})
+        assert p.apply(items, None, ViewOptions.SILENCED, 1) == items[:1]
+        assert plan().apply(items, None, ViewOptions.SILENCED, 1) is items
+
+    def test_invalidate(self):
+        p = plan()
+        p.matches = {"a": True, "b": False}
+        p.invalidate(Delta(changed=["a"]))
+        assert p.matches == {"b": False}
+        p.invalidate(Delta(reset=True))
+        assert p.matches == {}
@@ -0,0 +1,89 @@
+# Copyright 2022 Two Sigma Open Source, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# <http://www.apache.org/licenses/LICENSE-2.0>
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from app.sensu_go import SensuGoHelper
+from requests import ConnectionError
+import threading
+import unittest
+import time
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.release.wait(10)
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    def log_message(self, *args):
+        pass
+
+
+class AbortableHTTPAdapterTests(unittest.TestCase):
+    def setUp(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), SlowHandler)
+        server.daemon_threads = True
+        server.release = threading.Event()
+        threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.addCleanup(server.release.set)
+        self.helper = SensuGoHelper(
+            {
+                "url": f"http://127.0.0.1:{server.server_address[1]}",
+                "namespace": "default",
+                "sensu_api_key": "abc123",
+            }
+        )
+        self.addCleanup(self.helper.close)
+
+    def start_request(self):
+        """Make a request that blocks on the server, in another thread."""
+
+        errors = []
+
+        def request():
+            try:
+                self.helper.get_event("host", "check")
+            except ConnectionError as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=request)
+        thread.start()
+        for _ in range(500):
+            if self.helper.abort(thread):
+                return thread, errors
+            time.sleep(0.01)
+        self.fail("the request never started")
+
+    def test_abort_in_flight_request(self):
+        start = time.monotonic()
+        thread, errors = self.start_request()
+        thread.join(5)
+        assert not thread.is_alive()
+        assert len(errors) == 1
+        assert time.monotonic() - start < 5
+
+    def test_abort_other_thread_is_a_noop(self):
+        assert not self.helper.abort(threading.current_thread())
+
+    def test_close_aborts_every_request(self):
+        thread, errors = self.start_request()
+        thread.join(5)
+        other, other_errors = self.start_request()
+        self.helper.close()
+        other.join(5)
+        assert len(other_errors) == 1
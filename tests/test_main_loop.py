@@ -0,0 +1,63 @@
+# Copyright 2022 Two Sigma Open Source, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# <http://www.apache.org/licenses/LICENSE-2.0>
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from tensu import Tensu
+from unittest import mock
+import unittest
+import curses
+
+
+class MainLoopTests(unittest.TestCase):
+    def make_app(self, keys):
+        """A Tensu that is not logged in, reading keys instead of a terminal."""
+
+        app = Tensu.__new__(Tensu)
+        app.pending_moves = []
+        app.input_pending = False
+        app.debug_overlay = None
+        app.s = mock.Mock()
+        app.s.getch.side_effect = keys
+        app.data_view = mock.Mock()
+        app.data_view.container.h = 10
+        app.resource_handler = mock.Mock(items=[])
+        app.token_manager = mock.Mock()
+        app.token_manager.has_token.return_value = False
+        for name in (
+            "logger",
+            "background",
+            "check_resized",
+            "check_authentication",
+            "update_circuit_status",
+            "fetch_data",
+        ):
+            setattr(app, name, mock.Mock())
+        # Like the real update_view, drawing the view applies the movements.
+        app.update_view = mock.Mock(side_effect=lambda *_: app.pending_moves.clear())
+        app.wait_for_events = lambda: True
+        app.input_ready = lambda: True
+        return app
+
+    @mock.patch("curses.doupdate")
+    @mock.patch("curses.ungetch")
+    def test_moves_are_drawn_without_a_token(self, ungetch, doupdate):
+        # The q put back after the movement is read again by the next step.
+        app = self.make_app([curses.KEY_DOWN, ord("q"), ord("q")])
+        app.main_loop()
+        ungetch.assert_called_once_with(ord("q"))
+        app.update_view.assert_called_once()
+        assert app.pending_moves == []
+        app.fetch_data.assert_not_called()
+        with self.assertRaises(KeyboardInterrupt):
+            app.main_loop()
@@ -0,0 +1,110 @@
+# Copyright 2022 Two Sigma Open Source, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# <http://www.apache.org/licenses/LICENSE-2.0>
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from app.defaults import InternalDefaults
+from tests.test_records import fake_event
+from app.background import BackgroundLoop
+from app.metrics import LatencyHistogram
+from app.event_cache import EventCache
+from app.rate_limiter import Priorities
+from app.prefetcher import Prefetcher
+from app.records import EventRecord
+from app.utils import Utils
+from unittest import mock
+import threading
+import unittest
+import asyncio
+
+
+class PrefetcherTests(unittest.TestCase):
+    def setUp(self):
+        self.background = BackgroundLoop()
+        self.addCleanup(self.background.stop)
+        self.state = dict(InternalDefaults.STATE)
+        self.state["prefetch_rows"] = 2
+        self.state["prefetch_rate_per_s"] = float("inf")
+        self.cache = EventCache(100, 60000)
+        self.latency = LatencyHistogram()
+        self.helper = mock.Mock()
+        self.requested = []
+        self.release = threading.Event()
+
+        async def get_event(entity, check, priority):
+            assert priority == Priorities.PREFETCH
+            self.requested.append(entity)
+            while not self.release.is_set():
+                await asyncio.sleep(0.001)
+            return fake_event(entity)
+
+        self.helper.get_event = get_event
+        self.prefetcher = Prefetcher(
+            self.state, self.helper, self.background, self.cache, self.latency
+        )
+        self.items = [EventRecord(fake_event(f"host{i}")) for i in range(10)]
+
+    def run_all(self):
+        """Complete the requests, and the ones they start, on this thread."""
+
+        self.release.set()
+        for _ in range(100):
+            if not self.prefetcher.in_flight and not self.prefetcher.candidates:
+                return
+            on_done, future = self.background.callbacks.get(timeout=5)
+            on_done(future)
+
+    def test_nearest_rows_first_within_concurrency(self):
+        self.prefetcher.update(self.items, 5)
+        assert len(self.prefetcher.in_flight) == 2
+        self.run_all()
+        assert self.requested == ["host5", "host6", "host4", "host7", "host3"]
+        for i in range(3, 8):
+            assert self.cache.get(self.items[i].key) is not None
+        assert self.cache.get(self.items[8].key) is None
+
+    def test_fresh_events_are_not_fetched_again(self):
+        self.cache.put(self.items[0].key, fake_event("host0"))
+        self.prefetcher.update(self.items, 0)
+        self.run_all()
+        assert self.requested == ["host1", "host2"]
+
+    def test_rate_budget(self):
+        self.state["prefetch_rate_per_s"] = 1
+        self.prefetcher.update(self.items, 5)
+        assert len(self.prefetcher.in_flight) == 1
+        assert self.prefetcher.next_deadline() > 0
+
+    def test_backs_off_when_backend_is_slow(self):
+        for _ in range(10):
+            self.latency.observe(2000)
+        self.prefetcher.update(self.items, 5)
+        assert self.requested == []
+        assert not self.prefetcher.in_flight
+        assert self.prefetcher.next_deadline() == self.prefetcher.next_submit_time
+
+    def test_resumes_once_slow_requests_age_out(self):
+        now = [1000.0]
+        self.latency = LatencyHistogram(max_age_ms=30000, clock=lambda: now[0])
+        self.prefetcher.latency = self.latency
+        self.latency.observe(600)
+        self.prefetcher.update(self.items, 5)
+        assert self.requested == [] and not self.prefetcher.in_flight
+        # No prefetch can add samples while backing off, only time heals it.
+        now[0] += 31
+        with mock.patch.object(
+            Utils,
+            "current_milli_time",
+            return_value=self.prefetcher.next_submit_time,
+        ):
+            self.prefetcher.pump()
+        assert len(self.prefetcher.in_flight) == 2
@@ -0,0 +1,97 @@
+# Copyright 2022 Two Sigma Open Source, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# <http://www.apache.org/licenses/LICENSE-2.0>
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from app.rate_limiter import RateLimiter, Priorities
+import threading
+import unittest
+import time
+
+
+class RateLimiterTests(unittest.TestCase):
+    def counters(self, limiter):
+        return {name: (a, t) for name, a, t, _ in limiter.counters()}
+
+    def test_unlimited_admits_everything(self):
+        limiter = RateLimiter(0, 0)
+        for _ in range(100):
+            assert limiter.acquire(Priorities.BACKGROUND)
+        limiter.consume(10**9)
+        assert self.counters(limiter)["background"] == (100, 0)
+
+    def test_requests_per_second_are_capped(self):
+        limiter = RateLimiter(50, 0, burst_s=0.1)
+        start = time.monotonic()
+        for _ in range(10):
+            limiter.acquire(Priorities.BACKGROUND)
+        # 5 tokens of burst, then one token every 20ms.
+        assert time.monotonic() - start >= 0.09
+        admitted, throttled = self.counters(limiter)["background"]
+        assert admitted == 10 and throttled >= 4
+
+    def test_bytes_are_charged_after_the_response(self):
+        limiter = RateLimiter(0, 1000, burst_s=0.1)
+        limiter.acquire(Priorities.BACKGROUND)
+        limiter.consume(150)
+        start = time.monotonic()
+        # The 50 bytes of debt are paid back in 50ms.
+        limiter.acquire(Priorities.BACKGROUND)
+        assert time.monotonic() - start >= 0.04
+        assert self.counters(limiter)["background"] == (2, 1)
+
+    def test_interactive_requests_go_first(self):
+        limiter = RateLimiter(20, 0, burst_s=0.05)
+        limiter.acquire(Priorities.BACKGROUND)
+        order = []
+
+        def request(priority):
+            limiter.acquire(priority)
+            order.append(priority)
+
+        threads = [
+            threading.Thread(target=request, args=(Priorities.PREFETCH,)),
+            threading.Thread(target=request, args=(Priorities.BACKGROUND,)),
+        ]
+        for thread in threads:
+            thread.start()
+        while sum(limiter.waiting) < 2:
+            time.sleep(0.001)
+        interactive = threading.Thread(target=request, args=(Priorities.INTERACTIVE,))
+        interactive.start()
+        for thread in threads + [interactive]:
+            thread.join(5)
+        assert order == [
+            Priorities.INTERACTIVE,
+            Priorities.BACKGROUND,
+            Priorities.PREFETCH,
+        ]
+
+    def test_cancelled_wait_is_not_admitted(self):
+        limiter = RateLimiter(1, 0)
+        limiter.acquire(Priorities.BACKGROUND)
+        cancelled = threading.Event()
+        result = []
+        thread = threading.Thread(
+            target=lambda: result.append(
+                limiter.acquire(Priorities.BACKGROUND, cancelled)
+            )
+        )
+        thread.start()
+        while not limiter.waiting[Priorities.BACKGROUND]:
+            time.sleep(0.001)
+        cancelled.set()
+        limiter.wake()
+        thread.join(0.5)
+        assert result == [False]
+        assert self.counters(limiter)["background"] == (1, 0)
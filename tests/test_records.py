@@ -0,0 +1,106 @@
+# Copyright 2022 Two Sigma Open Source, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# <http://www.apache.org/licenses/LICENSE-2.0>
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from app.records import DISPLAY_TEXT_MAX, EventRecord, SilencedRecord, ingest
+from app.utils import Utils
+from unittest import mock
+import unittest
+
+
+def fake_event(entity="host1", check="disk", status=2, output="DISK CRITICAL"):
+    return {
+        "metadata": {"namespace": "default"},
+        "timestamp": 1654000000,
+        "entity": {
+            "metadata": {"name": entity, "namespace": "default"},
+            "system": {"hostname": entity, "os": "linux"},
+        },
+        "check": {
+            "metadata": {"name": check, "namespace": "default"},
+            "status": status,
+            "state": "failing",
+            "issued": 1654000000,
+            "executed": 1654000000,
+            "last_ok": 1653990000,
+            "output": output,
+            "is_silenced": False,
+            "silenced": None,
+            "proxy_entity_name": "",
+            "history": [{"status": status, "executed": 1654000000}],
+        },
+    }
+
+
+def fake_silenced(name="entity:host1:*", reason=None):
+    silenced = {
+        "metadata": {"name": name, "namespace": "default", "created_by": "admin"},
+        "begin": 1654000000,
+        "expire": -1,
+        "expire_at": 0,
+        "expire_on_resolve": False,
+        "subscription": "entity:host1",
+    }
+    if reason:
+        silenced["reason"] = reason
+    return silenced
+
+
+class RecordTests(unittest.TestCase):
+    def test_event_record_fields(self):
+        record = EventRecord(fake_event())
+        assert record.key == ("default", "host1", "disk")
+        assert record.status == 2
+        assert record.output == "DISK CRITICAL"
+        assert record.silenced == ()
+        assert not hasattr(record, "__dict__")
+
+    def test_event_record_display_strings(self):
+        record = EventRecord(fake_event(output="  DISK\nCRITICAL  " + "x" * 2000))
+        assert record.state_label == "failing"
+        assert record.output_line.startswith("DISK CRITICAL x")
+        assert len(record.output_line) == DISPLAY_TEXT_MAX
+        assert EventRecord(fake_event(status=3)).state_label == "unknown"
+        plain = EventRecord(fake_event())
+        assert plain.output_line is plain.output
+        assert len(plain.issued_text) == len("2022-05-31 12:26:40")
+
+    def test_event_record_display_strings_are_lazy(self):
+        with mock.patch.object(Utils, "flatten") as flatten:
+            with mock.patch.object(Utils, "format_timestamp") as format_timestamp:
+                record = EventRecord(fake_event())
+                flatten.assert_not_called()
+                format_timestamp.assert_not_called()
+                record.output_line
+                record.output_line
+                record.issued_text
+        flatten.assert_called_once()
+        format_timestamp.assert_called_once()
+        # Cached strings do not make a record differ from a fresh one.
+        assert record == EventRecord(fake_event())
+
+    def test_event_record_equality(self):
+        assert EventRecord(fake_event()) == EventRecord(fake_event())
+        assert EventRecord(fake_event()) != EventRecord(fake_event(status=0))
+
+    def test_silenced_record_default_reason(self):
+        record = SilencedRecord(fake_silenced())
+        assert record.key == "entity:host1:*"
+        assert record.creator == "admin"
+        assert record.reason == "(No reason provided)"
+        record = SilencedRecord(fake_silenced(reason="planned\n  maintenance"))
+        assert record.reason_line == "planned maintenance"
+
+    def test_ingest(self):
+        assert isinstance(ingest("events", [fake_event()])[0], EventRecord)
+        assert isinstance(ingest("silenced", [fake_silenced()])[0], SilencedRecord)
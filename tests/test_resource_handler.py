@@ -0,0 +1,164 @@
+# Copyright 2022 Two Sigma Open Source, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# <http://www.apache.org/licenses/LICENSE-2.0>
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from app.resource_handler import ResourceHandler
+from tests.test_records import fake_event
+from app.fetch_worker import FetchWorker
+from app.defaults import InternalDefaults
+from app.sensu_go import SensuGoHelper
+from app.records import ingest
+from app.utils import Utils
+from requests import ConnectionError, Timeout
+from unittest import mock
+import unittest
+
+
+class ResourceHandlerTests(unittest.TestCase):
+    def make_handler(self, **state):
+        state = dict(InternalDefaults.STATE, fetch_cycle_deadline_ms=1000, **state)
+        self.sensu_go_helper = SensuGoHelper(state)
+        handler = ResourceHandler(state, self.sensu_go_helper)
+        self.updates = []
+        handler.set_callable(lambda items, delta: self.updates.append(items))
+        handler.set_fetch_status_callable(lambda text: None)
+        patcher = mock.patch.object(FetchWorker, "start")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(FetchWorker, "is_alive", return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return handler
+
+    def test_wedged_cycle_expires_and_goes_stale(self):
+        handler = self.make_handler()
+        now = Utils.current_milli_time()
+        with mock.patch.object(Utils, "current_milli_time", return_value=now):
+            handler.get_resource_items(resource="events", limit=10)
+        job = handler.fetch_job
+        assert job.kwargs["deadline"] == now + 1000
+        assert handler.next_deadline() == now + 1000
+        with mock.patch.object(Utils, "current_milli_time", return_value=now + 1000):
+            with mock.patch.object(FetchWorker, "abort") as abort:
+                with self.assertRaises(Timeout):
+                    handler.get_resource_items(resource="events", limit=10)
+        abort.assert_called_once_with(job)
+        assert handler.fetch_completed and handler.stale
+        assert int(self.sensu_go_helper.timeouts) == 1
+        assert (
+            handler.next_update_time == now + 1000 + handler.state["update_interval_ms"]
+        )
+
+    def test_failed_cycle_restarts_from_first_page(self):
+        handler = self.make_handler()
+        now = handler.next_update_time
+        with mock.patch.object(Utils, "current_milli_time", return_value=now):
+            handler.get_resource_items(resource="events", limit=10)
+            events = ingest("events", [fake_event("h1"), fake_event("h2")])
+            handler.fetch_job.q.put((None, (events, "c1")))
+            handler.fetch_job.q.put((ConnectionError("boom"), {}))
+            with self.assertRaises(ConnectionError):
+                handler.get_resource_items(resource="events", limit=10)
+        assert handler.stale and handler.sensu_continue is None
+        with mock.patch.object(
+            Utils, "current_milli_time", return_value=handler.next_update_time
+        ):
+            handler.get_resource_items(resource="events", limit=10)
+        assert handler.fetch_job.kwargs["sensu_continue"] is None
+
+    def test_expired_cycle_restarts_from_first_page(self):
+        handler = self.make_handler()
+        now = Utils.current_milli_time()
+        with mock.patch.object(Utils, "current_milli_time", return_value=now):
+            handler.get_resource_items(resource="events", limit=10)
+            events = ingest("events", [fake_event("h1")])
+            handler.fetch_job.q.put((None, (events, "c1")))
+        with mock.patch.object(Utils, "current_milli_time", return_value=now + 1000):
+            with mock.patch.object(FetchWorker, "abort"):
+                with self.assertRaises(Timeout):
+                    handler.get_resource_items(resource="events", limit=10)
+        assert handler.sensu_continue is None
+        with mock.patch.object(
+            Utils, "current_milli_time", return_value=handler.next_update_time
+        ):
+            handler.get_resource_items(resource="events", limit=10)
+        assert handler.fetch_job.kwargs["sensu_continue"] is None
+
+    def test_completed_cycle_is_not_stale(self):
+        handler = self.make_handler()
+        handler.stale = True
+        handler.get_resource_items(resource="silenced", limit=10)
+        handler.fetch_job.q.put((None, ([], None)))
+        handler.get_resource_items(resource="silenced", limit=10)
+        assert handler.fetch_completed and not handler.stale
+        assert int(self.sensu_go_helper.timeouts) == 0
+
+    def run_cycle(self, handler, statuses, elapsed_ms=100):
+        """Run one round of fetching that returns one event per status."""
+
+        now = handler.next_update_time
+        with mock.patch.object(Utils, "current_milli_time", return_value=now):
+            handler.get_resource_items(resource="events", limit=10)
+        events = [fake_event(f"host{i}", status=s) for i, s in enumerate(statuses)]
+        handler.fetch_job.q.put((None, (ingest("events", events), None)))
+        now += elapsed_ms
+        with mock.patch.object(Utils, "current_milli_time", return_value=now):
+            handler.get_resource_items(resource="events", limit=10)
+        assert handler.fetch_completed
+        return handler.update_interval
+
+    def test_quiet_namespace_backs_off_to_max(self):
+        handler = self.make_handler(update_interval_max_ms=30000)
+        assert self.run_cycle(handler, [0, 2]) == 10000
+        intervals = [self.run_cycle(handler, [0, 2]) for _ in range(4)]
+        assert intervals == [15000, 22500, 30000, 30000]
+
+    def test_changes_shrink_interval_to_min(self):
+        handler = self.make_handler(update_interval_min_ms=3000)
+        self.run_cycle(handler, [0, 2])
+        assert self.run_cycle(handler, [2, 2]) == 5000
+        assert self.run_cycle(handler, [2, 2, 1]) == 3000
+        assert self.run_cycle(handler, [2]) == 3000
+
+    def test_check_executions_are_not_changes(self):
+        handler = self.make_handler()
+        self.run_cycle(handler, [2])
+        event = fake_event("host0", status=2)
+        event["check"]["executed"] += 60
+        now = handler.next_update_time
+        with mock.patch.object(Utils, "current_milli_time", return_value=now):
+            handler.get_resource_items(resource="events", limit=10)
+            handler.fetch_job.q.put((None, (ingest("events", [event]), None)))
+            handler.get_resource_items(resource="events", limit=10)
+        assert handler.delta.changed
+        assert handler.update_interval == 15000
+
+    def test_interval_covers_slow_cycles(self):
+        handler = self.make_handler()
+        self.run_cycle(handler, [0])
+        assert self.run_cycle(handler, [2], elapsed_ms=8000) == 16000
+
+    def test_reset_restores_interval(self):
+        handler = self.make_handler()
+        self.run_cycle(handler, [0])
+        self.run_cycle(handler, [0])
+        assert handler.update_interval == 15000
+        handler.reset()
+        assert handler.update_interval == 10000
+        assert self.run_cycle(handler, [2]) == 10000
+
+    def test_fixed_interval(self):
+        handler = self.make_handler(update_interval_adaptive=False)
+        for statuses in ([0], [0], [2]):
+            assert self.run_cycle(handler, statuses) == 10000
@@ -14,9 +14,13 @@
 
 from app.defaults import AuthenticationOptions
 from app.sensu_go import SensuGoHelper
-from requests import HTTPError
+from requests import ConnectionError, HTTPError, ReadTimeout, Timeout
+from app.circuit_breaker import CircuitOpenError
+from app.rate_limiter import Priorities
 from requests import Response
+from app.utils import Utils
 from unittest import mock
+import threading
 import unittest
 import logging
 import time
@@ -119,7 +123,10 @@ class SensuGoHelperTests(unittest.TestCase):
         sensu_go_helper = SensuGoHelper({"auth": {"expires_at": five_minutes_future}})
         assert sensu_go_helper.is_token_expired() is False
 
-    @mock.patch("app.sensu_go.requests.post")
+    @mock.patch(
+        "app.sensu_go.requests.Session.request",
+        return_value=mock.MagicMock(status_code=200),
+    )
     def test_refresh(self, m):
         refresh_token = "i-am-a-refresh-token"
         url = "https://my-sensu-go:8080"
@@ -133,6 +140,7 @@ class SensuGoHelperTests(unittest.TestCase):
         expected_headers = sensu_go_helper.auth_headers()
         sensu_go_helper.refresh()
         m.assert_called_once_with(
+            method="POST",
             auth=None,
             data=None,
             headers=expected_headers,
@@ -140,8 +148,75 @@ class SensuGoHelperTests(unittest.TestCase):
             params=None,
             url="https://my-sensu-go:8080/auth/token",
             verify=None,
+            timeout=(3.05, 10),
         )
 
+    def fake_backend(self, refresh_delay=0):
+        """A Session.request side effect that only accepts the "new" token."""
+
+        calls = []
+
+        def request(method=None, url=None, headers=None, json=None, **kwargs):
+            calls.append((method, url))
+            if url.endswith("/auth/token"):
+                time.sleep(refresh_delay)
+                return self.fake_api_response(
+                    '{"access_token": "new", "refresh_token": "r2"}'
+                )
+            if headers["Authorization"] != "Bearer new":
+                return self.fake_api_response("{}", status_code=401)
+            return self.fake_api_response('{"check": {}}')
+
+        return calls, request
+
+    def test_401_refreshes_and_replays(self):
+        calls, request = self.fake_backend()
+        state = {
+            "url": "https://my-sensu-go:8080",
+            "namespace": "default",
+            "auth": {"access_token": "old", "refresh_token": "r"},
+        }
+        sensu_go_helper = SensuGoHelper(state)
+        with mock.patch("app.sensu_go.requests.Session.request", side_effect=request):
+            assert sensu_go_helper.get_event("host", "check") == {"check": {}}
+        assert state["auth"]["access_token"] == "new"
+        assert [method for method, url in calls] == ["GET", "POST", "GET"]
+
+    def test_401_refresh_is_single_flight(self):
+        calls, request = self.fake_backend(refresh_delay=0.1)
+        sensu_go_helper = SensuGoHelper(
+            {
+                "url": "https://my-sensu-go:8080",
+                "namespace": "default",
+                "auth": {"access_token": "old", "refresh_token": "r"},
+            }
+        )
+        results = []
+        with mock.patch("app.sensu_go.requests.Session.request", side_effect=request):
+            threads = [
+                threading.Thread(
+                    target=lambda: results.append(
+                        sensu_go_helper.get_event("host", "check")
+                    )
+                )
+                for _ in range(8)
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        assert len(results) == 8
+        assert [method for method, url in calls].count("POST") == 1
+
+    def test_401_api_key_is_not_retried(self):
+        calls, request = self.fake_backend()
+        sensu_go_helper = SensuGoHelper(
+            {"sensu_api_key": "abc123", "url": "https://my-sensu-go:8080"}
+        )
+        with mock.patch("app.sensu_go.requests.Session.request", side_effect=request):
+            self.assertRaises(HTTPError, sensu_go_helper.get_namespaces)
+        assert len(calls) == 1
+
     def test_auth_headers_bearer(self):
         sensu_go_helper = SensuGoHelper(
             {"auth": {"access_token": self.fake_access_token}}
@@ -178,7 +253,10 @@ class SensuGoHelperTests(unittest.TestCase):
             )
             self.assertRaises(HTTPError, sensu_go_helper.get_namespaces)
 
-    @mock.patch("app.sensu_go.requests.get")
+    @mock.patch(
+        "app.sensu_go.requests.Session.request",
+        return_value=mock.MagicMock(status_code=200),
+    )
     def test_request(self, m):
         sensu_go_helper = SensuGoHelper({})
         sensu_go_helper._SensuGoHelper__request(
@@ -191,6 +269,7 @@ class SensuGoHelperTests(unittest.TestCase):
             json_data=None,
         )
         m.assert_called_once_with(
+            method="GET",
             auth=("username", "password"),
             data=None,
             headers={"X-Header-1": "FooBar"},
@@ -198,4 +277,139 @@ class SensuGoHelperTests(unittest.TestCase):
             params=None,
             url="https://my-sensu-go:8080/",
             verify=None,
+            timeout=(3.05, 10),
+        )
+
+    def test_timeout_is_clipped_to_deadline(self):
+        sensu_go_helper = SensuGoHelper({"http_read_timeout_s": 10})
+        assert sensu_go_helper.timeout() == (3.05, 10)
+        with mock.patch.object(Utils, "current_milli_time", return_value=1000):
+            assert sensu_go_helper.timeout(3000) == (3.05, 2)
+            with self.assertRaises(Timeout):
+                sensu_go_helper.timeout(1000)
+        assert int(sensu_go_helper.timeouts) == 1
+
+    @mock.patch(
+        "app.sensu_go.requests.Session.request", side_effect=ReadTimeout("slow")
+    )
+    def test_request_timeouts_are_counted_not_retried(self, m):
+        sensu_go_helper = SensuGoHelper({"http_connect_timeout_s": 1})
+        with self.assertRaises(Timeout):
+            sensu_go_helper._SensuGoHelper__request(method="get", uri="http://x/")
+        assert m.call_args.kwargs["timeout"] == (1, 10)
+        assert m.call_count == 1
+        assert int(sensu_go_helper.timeouts) == 1
+        assert len(sensu_go_helper.latency) == 1
+
+    def test_get_is_retried_with_backoff(self):
+        sensu_go_helper = SensuGoHelper({"http_retries": 2})
+        responses = [
+            ConnectionError("reset"),
+            self.fake_api_response("{}", status_code=503),
+            self.fake_api_response("{}"),
+        ]
+        with mock.patch(
+            "app.sensu_go.requests.Session.request", side_effect=responses
+        ) as m:
+            with mock.patch.object(
+                SensuGoHelper, "backoff_ms", return_value=0
+            ) as backoff:
+                r = sensu_go_helper._SensuGoHelper__request(
+                    method="get", uri="http://x/"
+                )
+        assert r.status_code == 200
+        assert m.call_count == 3
+        assert backoff.call_args_list == [mock.call(1), mock.call(2)]
+        # The success resets the failures counted by the breaker.
+        assert sensu_go_helper.circuit_breaker.failures == 0
+
+    def test_post_is_not_retried(self):
+        sensu_go_helper = SensuGoHelper({})
+        r = self.fake_api_response("{}", status_code=503)
+        with mock.patch("app.sensu_go.requests.Session.request", return_value=r) as m:
+            sensu_go_helper._SensuGoHelper__request(method="post", uri="http://x/")
+        assert m.call_count == 1
+        assert sensu_go_helper.circuit_breaker.failures == 1
+
+    def test_backoff_is_jittered_and_capped(self):
+        sensu_go_helper = SensuGoHelper(
+            {"http_backoff_base_ms": 100, "http_backoff_max_ms": 300}
+        )
+        with mock.patch("random.uniform", side_effect=lambda a, b: b):
+            caps = [sensu_go_helper.backoff_ms(n) for n in (1, 2, 3, 4)]
+        assert caps == [100, 200, 300, 300]
+        assert 0 <= sensu_go_helper.backoff_ms(1) <= 100
+
+    def test_abort_stops_retries(self):
+        sensu_go_helper = SensuGoHelper({"http_backoff_base_ms": 10000})
+        thread = threading.current_thread()
+
+        def reset(**kwargs):
+            sensu_go_helper.abort(thread)
+            raise ConnectionError("aborted")
+
+        with mock.patch(
+            "app.sensu_go.requests.Session.request", side_effect=reset
+        ) as m:
+            start = time.monotonic()
+            with self.assertRaises(ConnectionError):
+                sensu_go_helper._SensuGoHelper__request(method="get", uri="http://x/")
+        assert time.monotonic() - start < 1
+        assert m.call_count == 1
+        # An aborted request says nothing about the health of the backend.
+        assert sensu_go_helper.circuit_breaker.failures == 0
+
+    def test_open_circuit_fails_fast(self):
+        sensu_go_helper = SensuGoHelper(
+            {"circuit_failure_threshold": 2, "http_retries": 5}
+        )
+        r = self.fake_api_response("{}", status_code=502)
+        with mock.patch("app.sensu_go.requests.Session.request", return_value=r) as m:
+            with mock.patch.object(SensuGoHelper, "backoff_ms", return_value=0):
+                with self.assertRaises(CircuitOpenError):
+                    sensu_go_helper._SensuGoHelper__request(
+                        method="get", uri="http://x/"
+                    )
+        assert m.call_count == 2
+
+    def test_requests_go_through_the_rate_limiter(self):
+        sensu_go_helper = SensuGoHelper({"url": "http://x", "sensu_api_key": "k"})
+        limiter = sensu_go_helper.rate_limiter
+        r = self.fake_api_response("[]")
+        with mock.patch("app.sensu_go.requests.Session.request", return_value=r):
+            with mock.patch.object(limiter, "consume") as consume:
+                sensu_go_helper.resource_fetch_request()
+                sensu_go_helper.get_event("host", "check", Priorities.PREFETCH)
+        counters = {name: admitted for name, admitted, _, _ in limiter.counters()}
+        assert counters == {"auth": 0, "interactive": 0, "background": 1, "prefetch": 1}
+        assert consume.call_args_list == [mock.call(2), mock.call(2)]
+
+    def test_detail_latency_excludes_list_pages(self):
+        sensu_go_helper = SensuGoHelper({"url": "http://x", "sensu_api_key": "k"})
+        r = self.fake_api_response("{}")
+        with mock.patch("app.sensu_go.requests.Session.request", return_value=r):
+            sensu_go_helper.resource_fetch_request()
+            sensu_go_helper.resource_fetch_request()
+            sensu_go_helper.get_event("host", "check", Priorities.PREFETCH)
+        assert len(sensu_go_helper.latency) == 3
+        detail = [len(h) for h in sensu_go_helper.detail_latency]
+        assert detail == [0, 0, 0, 1]
+
+    def test_session_is_reused(self):
+        sensu_go_helper = SensuGoHelper({})
+        assert sensu_go_helper.session() is sensu_go_helper.session()
+
+    def test_session_is_not_shared_across_fork(self):
+        sensu_go_helper = SensuGoHelper({})
+        session = sensu_go_helper.session()
+        with mock.patch("os.getpid", return_value=-1):
+            assert sensu_go_helper.session() is not session
+
+    def test_session_pool_configuration(self):
+        sensu_go_helper = SensuGoHelper(
+            {"http_pool_maxsize": 3, "http_keep_alive": False}
         )
+        session = sensu_go_helper.session()
+        adapter = session.get_adapter("https://my-sensu-go:8080/")
+        assert adapter._pool_maxsize == 3
+        assert session.headers["Connection"] == "close"
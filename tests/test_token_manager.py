@@ -0,0 +1,152 @@
+# Copyright 2022 Two Sigma Open Source, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# <http://www.apache.org/licenses/LICENSE-2.0>
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from app.defaults import AuthenticationOptions, InternalDefaults
+from app.token_manager import TokenManager
+from app.background import BackgroundLoop
+from requests import HTTPError, Response
+from unittest import mock
+import threading
+import unittest
+import asyncio
+import time
+
+
+class TokenManagerTests(unittest.TestCase):
+    def setUp(self):
+        self.notified = threading.Event()
+        self.background = BackgroundLoop(self.notified.set)
+        self.addCleanup(self.background.stop)
+        self.state = dict(InternalDefaults.STATE)
+        self.helper = mock.Mock()
+        self.helper.auth_test = mock.AsyncMock(return_value=True)
+        self.helper.authenticate = mock.AsyncMock(return_value={"expires_at": 0})
+        self.helper.refresh_access_token = mock.AsyncMock()
+        self.status = []
+        self.manager = TokenManager(
+            self.state,
+            self.helper,
+            self.background,
+            lambda text, is_error: self.status.append((text, is_error)),
+        )
+
+    def complete(self):
+        """Wait for the request in flight and run its callback."""
+
+        assert self.notified.wait(5)
+        self.notified.clear()
+        self.background.run_callbacks()
+
+    def test_api_key_needs_nothing(self):
+        self.helper.auth_method = AuthenticationOptions.API_KEY_AUTH
+        assert self.manager.has_token()
+        self.manager.ensure()
+        assert self.manager.in_flight is None
+        assert self.manager.next_deadline() is None
+
+    def test_kerberos_authenticates_in_the_background(self):
+        self.helper.auth_method = AuthenticationOptions.KERBEROS_AUTH
+        assert not self.manager.needs_credentials()
+        self.manager.ensure()
+        in_flight = self.manager.in_flight
+        assert in_flight is not None
+        # Only one authentication at a time.
+        self.manager.ensure()
+        assert self.manager.in_flight is in_flight
+        self.complete()
+        assert self.state["auth"] == {"expires_at": 0}
+        assert self.status[-1] == ("Logged in!", False)
+        self.helper.authenticate.assert_awaited_once_with(None, None)
+
+    def test_basic_login(self):
+        self.helper.auth_method = AuthenticationOptions.BASIC_AUTH
+        assert self.manager.needs_credentials()
+        self.manager.ensure()
+        assert self.manager.in_flight is None
+        self.manager.login("user", "secret")
+        assert not self.manager.needs_credentials()
+        self.complete()
+        assert self.manager.has_token()
+        assert self.state["username"] == "user"
+
+    def test_basic_rejected_prompts_again(self):
+        self.helper.auth_method = AuthenticationOptions.BASIC_AUTH
+        self.helper.auth_test.return_value = False
+        self.manager.login("user", "wrong")
+        self.complete()
+        assert self.status[-1] == ("Authentication Rejected!", True)
+        assert self.manager.needs_credentials()
+        self.helper.authenticate.assert_not_awaited()
+
+    def test_refresh_ahead_of_expiry(self):
+        self.helper.auth_method = AuthenticationOptions.KERBEROS_AUTH
+        expires_at = int(time.time()) + 10 + self.state["auth_refresh_ahead_s"]
+        self.state["auth"] = {"expires_at": expires_at}
+        assert self.manager.next_deadline() == (expires_at - 30) * 1000
+        self.manager.ensure()
+        assert self.manager.in_flight is None
+
+        self.state["auth"] = {"access_token": "a", "expires_at": int(time.time()) + 5}
+        refreshed = {"access_token": "b", "expires_at": int(time.time()) + 900}
+
+        async def refresh_access_token(stale_token):
+            self.state["auth"] = refreshed
+            return refreshed
+
+        self.helper.refresh_access_token.side_effect = refresh_access_token
+        self.manager.ensure()
+        self.complete()
+        self.helper.refresh_access_token.assert_awaited_once_with("a")
+        assert self.state["auth"] is refreshed
+
+    def test_rejected_refresh_starts_over(self):
+        self.helper.auth_method = AuthenticationOptions.KERBEROS_AUTH
+        self.state["auth"] = {"expires_at": 0}
+        response = Response()
+        response.status_code = 401
+        self.helper.refresh_access_token.side_effect = HTTPError(response=response)
+        self.manager.ensure()
+        self.complete()
+        assert "auth" not in self.state
+        assert self.status[-1][1] is True
+        # Retried after auth_retry_interval_ms.
+        self.manager.ensure()
+        assert self.manager.in_flight is None
+        assert self.manager.next_deadline() > time.time() * 1000
+
+    def test_malformed_reply_is_retried(self):
+        self.helper.auth_method = AuthenticationOptions.KERBEROS_AUTH
+        self.helper.authenticate.side_effect = ValueError("Expecting value")
+        self.manager.ensure()
+        self.complete()
+        assert "auth" not in self.state
+        assert self.status[-1][1] is True
+        assert self.manager.next_deadline() > time.time() * 1000
+
+    def test_cancelled_request_is_retried(self):
+        self.helper.auth_method = AuthenticationOptions.KERBEROS_AUTH
+        started = threading.Event()
+
+        async def authenticate(username, password):
+            started.set()
+            await asyncio.sleep(60)
+
+        self.helper.authenticate.side_effect = authenticate
+        self.manager.ensure()
+        assert started.wait(5)
+        self.manager.in_flight.cancel()
+        self.complete()
+        assert self.manager.in_flight is None
+        assert self.status[-1][1] is True
+        assert self.manager.next_deadline() > time.time() * 1000
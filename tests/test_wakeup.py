@@ -0,0 +1,45 @@
+# Copyright 2022 Two Sigma Open Source, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# <http://www.apache.org/licenses/LICENSE-2.0>
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from app.wakeup import Waker
+import selectors
+import threading
+import unittest
+
+
+class WakerTests(unittest.TestCase):
+    def setUp(self):
+        self.waker = Waker()
+        self.addCleanup(self.waker.close)
+        self.selector = selectors.DefaultSelector()
+        self.addCleanup(self.selector.close)
+        self.selector.register(self.waker, selectors.EVENT_READ)
+
+    def test_wake_and_drain(self):
+        assert self.selector.select(0) == []
+        self.waker.wake()
+        self.waker.wake()
+        assert len(self.selector.select(0)) == 1
+        self.waker.drain()
+        assert self.selector.select(0) == []
+
+    def test_wake_from_another_thread(self):
+        threading.Timer(0.05, self.waker.wake).start()
+        assert len(self.selector.select(5)) == 1
+
+    def test_wake_never_blocks(self):
+        for _ in range(100000):
+            self.waker.wake()
+        self.waker.drain()
+        assert self.selector.select(0) == []